@@ -0,0 +1,56 @@
+"""Archive export/import throughput and peak memory.
+
+Generates a vault, streams it through TarExport into a temp file (the way
+a client would receive it) and imports that file into a second vault,
+reporting MB/s and the peak Python allocation of each direction.
+
+    python -m benchmarks.bench_archive [--depth 3] [--fanout 6] [--median-bytes 2048] [--format tar.gz]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.vaultgen import VaultShape, generate_vault
+from src.repositories.archive import TarExport, archive_formats, import_tar
+from src.repositories.vault import VaultManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--median-bytes", type=int, default=2048)
+    parser.add_argument("--format", choices=archive_formats(), default="tar")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source"
+        stats = generate_vault(source, VaultShape(depth=args.depth, fanout=args.fanout, median_bytes=args.median_bytes))
+        print(f"{stats['files']} files, {stats['bytes'] / 1e6:.1f} MB")
+        archive = Path(tmp) / f"vault.{args.format}"
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(archive, "wb") as f:
+            for chunk in TarExport(VaultManager(source), "", args.format):
+                f.write(chunk)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        print(f"export: {seconds:.2f}s, {stats['bytes'] / seconds / 1e6:.1f} MB/s, "
+              f"archive {archive.stat().st_size / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB")
+
+        tracemalloc.reset_peak()
+        target = Path(tmp) / "target"
+        target.mkdir()
+        with open(archive, "rb") as f:
+            report = import_tar(VaultManager(target), f)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"import: {report['seconds']:.2f}s, {report['bytes_per_second'] / 1e6:.1f} MB/s, "
+              f"{report['files']} files, {report['skipped']} skipped, peak {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
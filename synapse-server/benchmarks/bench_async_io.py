@@ -0,0 +1,112 @@
+"""Read/write throughput of the vault routes at increasing concurrency.
+
+Compares the previous synchronous handlers (plain `def` routes calling
+VaultManager on Starlette's threadpool) with the current async routes
+backed by AsyncVaultManager. Runs in-process over ASGI, so it measures
+server-side scheduling rather than network cost.
+
+    python -m benchmarks.bench_async_io [--ops 2000] [--clients 1 32 256]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Body, Depends, FastAPI
+
+from src.api.vault_router import vault_router, vault_exception_handler
+from src.dependencies import get_vault
+from src.repositories.vault import VaultError, VaultManager
+from src.settings import get_settings
+
+DOCUMENTS = 256
+DOCUMENT_BYTES = 4096
+
+
+def make_vault() -> Path:
+    vault_dir = Path(tempfile.mkdtemp(prefix="synapse-bench-"))
+    (vault_dir / "notes").mkdir()
+    body = ("lorem ipsum " * (DOCUMENT_BYTES // 12))[:DOCUMENT_BYTES]
+    for i in range(DOCUMENTS):
+        (vault_dir / "notes" / f"n{i}.md").write_text(body)
+    return vault_dir
+
+
+def configure(vault_dir: Path) -> None:
+    # Configure through the environment like the real app; dependency_overrides
+    # makes FastAPI re-analyse the dependency graph on every request
+    os.environ["VAULT_DIR"] = str(vault_dir)
+    get_settings.cache_clear()
+
+
+def sync_app(vault_dir: Path) -> FastAPI:
+    """The handlers as they were: sync def + blocking VaultManager calls on
+    Starlette's threadpool (same VaultManager wiring as the async routes)."""
+    configure(vault_dir)
+    app = FastAPI()
+
+    @app.get("/d/{path:path}")
+    def get_path(path: str, vault: VaultManager = Depends(get_vault)):
+        return vault.get_document(path)
+
+    @app.put("/d/files/{file_path:path}")
+    def update_file(file_path: str, content: str = Body("", media_type="text/plain"), vault: VaultManager = Depends(get_vault)):
+        return vault.update_file(file_path, content)
+
+    app.add_exception_handler(VaultError, vault_exception_handler)
+    return app
+
+
+def async_app(vault_dir: Path) -> FastAPI:
+    configure(vault_dir)
+    app = FastAPI()
+    app.include_router(vault_router, prefix="/d")
+    app.add_exception_handler(VaultError, vault_exception_handler)
+    return app
+
+
+async def run_load(app: FastAPI, kind: str, clients: int, ops: int) -> float:
+    """Issue `ops` requests spread over `clients` concurrent workers; return ops/s."""
+    transport = httpx.ASGITransport(app=app)
+    body = "updated " * (DOCUMENT_BYTES // 8)
+    counter = iter(range(ops))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in counter:
+                path = f"notes/n{i % DOCUMENTS}.md"
+                if kind == "read":
+                    response = await client.get(f"/d/{path}")
+                else:
+                    response = await client.put(f"/d/files/{path}", content=body, headers={"Content-Type": "text/plain"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 32, 256])
+    args = parser.parse_args()
+
+    vault_dir = make_vault()
+    apps = {"before (sync def)": sync_app(vault_dir), "after (async)": async_app(vault_dir)}
+    results = []
+    for label, app in apps.items():
+        for kind in ("read", "write"):
+            for clients in args.clients:
+                throughput = asyncio.run(run_load(app, kind, clients, args.ops))
+                results.append({"variant": label, "op": kind, "clients": clients, "ops_per_sec": round(throughput, 1)})
+                print(f"{label:<18} {kind:<5} clients={clients:<4} {throughput:9.1f} ops/s")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Cost of encoding and compressing a large DirectoryInfo tree.
+
+Builds an in-memory tree shaped like a real listing (default 50k nodes)
+and times each way the API can turn it into a response body: FastAPI's
+default path (jsonable_encoder + JSONResponse), JSONResponse alone, and
+FastJSONResponse (orjson when installed). The encoded body is then
+compressed with every encoding CompressionMiddleware can negotiate here.
+
+    python -m benchmarks.bench_encoding [--nodes 50000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.compression import available_encoders
+from src.api.responses import FastJSONResponse, orjson
+
+
+def build_tree(nodes: int, fanout: int = 12, seed: int = 0) -> dict:
+    """A DirectoryInfo tree with `nodes` entries, ~1/8 of them directories."""
+    rng = random.Random(seed)
+    now = time.time()
+    root = {"path": ".", "type": "directory", "created_at": now, "modified_at": now, "children": []}
+    directories = [root]
+    for i in range(nodes - 1):
+        parent = directories[min(len(directories) - 1, i // fanout)]
+        prefix = "" if parent["path"] == "." else parent["path"] + "/"
+        stamp = now - rng.random() * 86400 * 365
+        if rng.random() < 0.125:
+            node = {"path": f"{prefix}folder-{i}", "type": "directory", "created_at": stamp, "modified_at": stamp, "children": []}
+            directories.append(node)
+        else:
+            node = {"path": f"{prefix}note-{i}.md", "type": "file", "created_at": stamp, "modified_at": stamp,
+                    "size": rng.randrange(200, 20000), "content": None}
+        parent["children"].append(node)
+    return root
+
+
+def timed(func: Callable[[], bytes], repeat: int) -> Tuple[float, bytes]:
+    best = float("inf")
+    result = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tree = build_tree(args.nodes)
+    print(f"{args.nodes} nodes, orjson {'installed' if orjson else 'not installed'}; best of {args.repeat}")
+    print(f"{'encoder':<40} {'ms':>9} {'bytes':>11}")
+    encoders: List[tuple] = [
+        ("jsonable_encoder + JSONResponse (default)", lambda: JSONResponse(jsonable_encoder(tree)).body),
+        ("JSONResponse", lambda: JSONResponse(tree).body),
+        ("FastJSONResponse", lambda: FastJSONResponse(tree).body),
+    ]
+    body = b""
+    for name, func in encoders:
+        seconds, body = timed(func, args.repeat)
+        print(f"{name:<40} {seconds * 1000:>9.1f} {len(body):>11}")
+
+    print(f"{'compression':<40} {'ms':>9} {'bytes':>11}")
+    for name, make in available_encoders().items():
+        def compress():
+            encoder = make()
+            return encoder.compress(body) + encoder.finish()
+        seconds, compressed = timed(compress, args.repeat)
+        print(f"{name:<40} {seconds * 1000:>9.1f} {len(compressed):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Quick-open latency over a large set of paths.
+
+Feeds generated paths (no files are written) to a MetadataIndex and times
+PathIndex queries of increasing length, cold and after warm().
+
+    python -m benchmarks.bench_quickopen [--paths 100000] [--repeat 20]
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.vaultgen import WORDS
+from src.repositories.metadata_index import ROOT_KEY, EntryMeta, MetadataIndex
+from src.repositories.quickopen import PathIndex
+
+QUERIES = ["n", "mt", "plan", "rvw", "meetnote", "draftsummary", "dir3", "zzz"]
+
+
+def paths(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    # A vocabulary of real words plus invented ones, for some diversity
+    vocabulary = WORDS + ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 9))) for _ in range(2000)]
+    now = time.time()
+    for i in range(count):
+        directory = "/".join(rng.choice(vocabulary).title() if rng.random() < 0.3 else rng.choice(vocabulary)
+                             for _ in range(rng.randint(1, 4)))
+        name = rng.choice("-_ ").join(rng.choices(vocabulary, k=rng.randint(1, 3)))
+        suffix = ".chat" if rng.random() < 0.2 else ".md"
+        yield f"{directory}/{name}-{i}{suffix}", EntryMeta("file", 1024, now, now - rng.random() * 90 * 86400, 0)
+
+
+def timed(index: PathIndex, query: str, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = index.search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples), hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    index = MetadataIndex(Path("/nonexistent"))
+    now = time.time()
+    index.load([(ROOT_KEY, EntryMeta("directory", 0, now, now, 0)), *paths(args.paths)])
+    quick_open = PathIndex(index)
+    start = time.perf_counter()
+    count = len(quick_open)
+    print(f"{count} paths indexed in {(time.perf_counter() - start) * 1000:.0f} ms")
+    for query in QUERIES[:2]:
+        start = time.perf_counter()
+        quick_open.search(query)
+        print(f"cold {query!r}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    quick_open.warm()
+    print(f"warm(): {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"{'query':>14} {'median ms':>10} {'max ms':>8}  best match")
+    for query in QUERIES:
+        median, worst, hits = timed(quick_open, query, args.repeat)
+        print(f"{query:>14} {median:>10.2f} {worst:>8.2f}  {hits[0]['path'] if hits else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Read throughput of the real server at increasing worker counts.
+
+Generates a vault, then for each worker count starts
+`uvicorn src.main:app --workers N` with WORKER_COHERENCE=true and drives
+it from client processes (one keep-alive connection each) reading random
+documents for a fixed time. Also checks that a write made through one
+connection is visible on every other one, whichever worker serves it.
+Needs uvicorn and, to show scaling, at least as many cores as workers
+plus clients.
+
+    python -m benchmarks.bench_workers [--workers 1 2 4] [--clients 8] [--seconds 10]
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from urllib.parse import quote
+
+from benchmarks.vaultgen import VaultShape, documents, generate_vault
+
+PORT = 8765
+
+
+def wait_until_up(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def client(port: int, paths: List[str], seconds: float, seed: int, results) -> None:
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    requests = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        conn.request("GET", "/api/v1/d/" + quote(rng.choice(paths)))
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"read failed with {response.status}")
+        requests += 1
+    results.put(requests)
+
+
+def check_coherence(port: int, connections: int = 8) -> bool:
+    """Write on one connection, then read the new file's listing on several
+    (each likely served by a different worker)."""
+    name = f"coherence-{time.time_ns()}.md"
+    writer = http.client.HTTPConnection("127.0.0.1", port)
+    writer.request("POST", f"/api/v1/d/files/{name}", body="x", headers={"Content-Type": "text/plain"})
+    writer.getresponse().read()
+    deadline = time.monotonic() + 2.0
+    readers = [http.client.HTTPConnection("127.0.0.1", port) for _ in range(connections)]
+    while time.monotonic() < deadline:
+        seen = 0
+        for conn in readers:
+            conn.request("GET", "/api/v1/d?max_depth=1")
+            if name in conn.getresponse().read().decode("utf-8"):
+                seen += 1
+        if seen == connections:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run(vault: Path, workers: int, clients: int, seconds: float, paths: List[str]) -> float:
+    env = {**os.environ, "VAULT_DIR": str(vault), "WORKER_COHERENCE": "true"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(PORT), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_until_up(PORT)
+        if not check_coherence(PORT):
+            print(f"  {workers} workers: a write was not visible on every connection within 2 s")
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client, args=(PORT, paths, seconds, seed, results)) for seed in range(clients)]
+        for process in processes:
+            process.start()
+        total = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        return total / seconds
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        sys.exit("bench_workers needs uvicorn (pip install uvicorn)")
+
+    vault = Path(tempfile.mkdtemp(prefix="synapse-workers-"))
+    try:
+        generate_vault(vault, VaultShape(depth=2, fanout=6))
+        paths = documents(vault)
+        print(f"{len(paths)} documents, {args.clients} clients, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            throughput = run(vault, workers, args.clients, args.seconds, paths)
+            baseline = baseline or throughput
+            print(f"{workers:>8} {throughput:>10.0f} {throughput / baseline:>7.2f}x")
+    finally:
+        shutil.rmtree(vault, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Repeatable performance scenarios for the vault server.
+
+Generates a synthetic vault (see vaultgen.py), then runs each scenario
+against VaultManager directly and against the FastAPI app in-process over
+ASGI. Prints a JSON report with throughput, latency percentiles and peak
+RSS so results can be diffed between commits.
+
+    python -m benchmarks.suite --depth 3 --fanout 6 --ops 500 --out report.json
+    python -m benchmarks.suite ... --baseline report.json   # relative changes
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from src.api.vault_router import vault_router, vault_exception_handler
+from src.dependencies import vault_for
+from src.repositories.vault import VaultError, VaultManager
+from src.settings import get_settings
+
+from .vaultgen import VaultShape, documents, generate_vault
+
+SCENARIOS = ("list_tree", "list_shallow", "deep_get", "autosave_storm", "mixed")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(target: str, scenario: str, latencies: List[float], elapsed: float, concurrency: int) -> Dict:
+    return {
+        "target": target,
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "ops": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+class Workload:
+    """Picks the operations each scenario performs, identically for both targets."""
+
+    def __init__(self, docs: List[str], seed: int):
+        self.docs = docs
+        depth = max(doc.count("/") for doc in docs)
+        self.deep_docs = [doc for doc in docs if doc.count("/") == depth]
+        self.hot_docs = docs[:8]
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def next_op(self, scenario: str, i: int) -> tuple:
+        if scenario == "list_tree":
+            return ("list", "", None)
+        if scenario == "list_shallow":
+            return ("list", "", 1)
+        if scenario == "deep_get":
+            return ("get", self.deep_docs[i % len(self.deep_docs)])
+        if scenario == "autosave_storm":
+            return ("put", self.hot_docs[i % len(self.hot_docs)], f"autosave {i}\n" * 64)
+        with self.lock:
+            roll = self.rng.random()
+            doc = self.rng.choice(self.docs)
+        if roll < 0.80:
+            return ("get", doc)
+        if roll < 0.95:
+            return ("list", os.path.dirname(doc), 1)
+        return ("put", doc, f"mixed edit {i}\n" * 32)
+
+
+def run_vault(vault: VaultManager, workload: Workload, scenario: str, ops: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    counter = iter(range(ops))
+    counter_lock = threading.Lock()
+
+    def call(op: tuple):
+        if op[0] == "list":
+            vault.list_directory(op[1], max_depth=op[2])
+        elif op[0] == "get":
+            vault.get_document(op[1])
+        else:
+            vault.update_file(op[1], op[2])
+
+    def worker():
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            op = workload.next_op(scenario, i)
+            start = time.perf_counter()
+            call(op)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize("vault", scenario, latencies, time.perf_counter() - start, concurrency)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(vault_router, prefix="/api/v1/d")
+    app.add_exception_handler(VaultError, vault_exception_handler)
+    return app
+
+
+async def run_app(app: FastAPI, workload: Workload, scenario: str, ops: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    counter = iter(range(ops))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench/api/v1/d") as client:
+        async def call(op: tuple) -> httpx.Response:
+            if op[0] == "list":
+                params = {} if op[2] is None else {"max_depth": op[2]}
+                return await client.get(f"/{op[1]}" if op[1] else "", params=params)
+            if op[0] == "get":
+                return await client.get(f"/{op[1]}")
+            return await client.put(f"/files/{op[1]}", content=op[2], headers={"Content-Type": "text/plain"})
+
+        async def worker():
+            for i in counter:
+                op = workload.next_op(scenario, i)
+                start = time.perf_counter()
+                response = await call(op)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize("app", scenario, latencies, time.perf_counter() - start, concurrency)
+
+
+def compare(report: Dict, baseline: Dict) -> List[Dict]:
+    """Relative change of throughput and p99 per (target, scenario) against a baseline report."""
+    previous = {(r["target"], r["scenario"]): r for r in baseline["results"]}
+    deltas = []
+    for result in report["results"]:
+        before = previous.get((result["target"], result["scenario"]))
+        if before is None:
+            continue
+        deltas.append({
+            "target": result["target"],
+            "scenario": result["scenario"],
+            "throughput_change": round(result["throughput"] / before["throughput"] - 1, 3) if before["throughput"] else None,
+            "p99_change": round(result["p99_ms"] / before["p99_ms"] - 1, 3) if before["p99_ms"] else None,
+        })
+    return deltas
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Run the vault benchmark suite")
+    for field, default in asdict(VaultShape()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--vault", type=Path, help="Benchmark an existing vault instead of generating one")
+    parser.add_argument("--ops", type=int, default=300, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients for storm/mixed scenarios")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--targets", nargs="+", choices=("vault", "app"), default=["vault", "app"])
+    parser.add_argument("--out", type=Path, help="Also write the JSON report here")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    shape = VaultShape(**{field: getattr(args, field) for field in asdict(VaultShape())})
+    if args.vault:
+        vault_dir, vault_stats = args.vault.resolve(), {}
+    else:
+        vault_dir = Path(tempfile.mkdtemp(prefix="synapse-bench-")).resolve()
+        vault_stats = generate_vault(vault_dir, shape)
+
+    os.environ["VAULT_DIR"] = str(vault_dir)
+    get_settings.cache_clear()
+    settings = get_settings()
+    workload = Workload(documents(vault_dir), shape.seed)
+
+    results = []
+    for scenario in args.scenarios:
+        concurrency = args.concurrency if scenario in ("autosave_storm", "mixed") else 1
+        if "vault" in args.targets:
+            results.append(run_vault(vault_for(settings), workload, scenario, args.ops, concurrency))
+            print(json.dumps(results[-1]), file=sys.stderr)
+        if "app" in args.targets:
+            results.append(asyncio.run(run_app(build_app(), workload, scenario, args.ops, concurrency)))
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "shape": asdict(shape),
+            "vault": vault_stats,
+            "ops": args.ops,
+        },
+        "results": results,
+    }
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        report["comparison"] = {"baseline_commit": baseline["meta"]["commit"], "changes": compare(report, baseline)}
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        args.out.write_text(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Synthetic vault generator for benchmarks.
+
+    python -m benchmarks.vaultgen /tmp/vault --depth 3 --fanout 8 --files-per-dir 20
+"""
+import argparse
+import json
+import math
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+WORDS = (
+    "synapse note idea link graph garden draft meeting review project plan "
+    "memory cache index search query vault tree branch leaf root chat reply "
+    "question answer summary todo done later follow up research paper quote"
+).split()
+
+
+@dataclass
+class VaultShape:
+    depth: int = 3              # directory levels below the root
+    fanout: int = 6             # subdirectories per directory
+    files_per_dir: int = 20
+    median_bytes: int = 2048    # file sizes are log-normal around this median
+    size_sigma: float = 1.0
+    chat_ratio: float = 0.2     # share of .chat files, the rest are .md
+    seed: int = 1
+
+
+def _markdown(rng: random.Random, size: int) -> str:
+    lines = [f"# {' '.join(rng.choices(WORDS, k=3)).title()}", ""]
+    length = len(lines[0]) + 1
+    while length < size:
+        if rng.random() < 0.1:
+            line = f"## {' '.join(rng.choices(WORDS, k=2)).title()}"
+        elif rng.random() < 0.1:
+            line = f"- [ ] {' '.join(rng.choices(WORDS, k=5))} [[{rng.choice(WORDS)}]]"
+        else:
+            line = " ".join(rng.choices(WORDS, k=12)) + "."
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size] + "\n"
+
+
+def _chat(rng: random.Random, size: int) -> str:
+    messages = []
+    length = 0
+    while length < size:
+        message = json.dumps({"role": rng.choice(["user", "assistant"]), "content": " ".join(rng.choices(WORDS, k=20))})
+        messages.append(message)
+        length += len(message) + 1
+    return "\n".join(messages) + "\n"
+
+
+def generate_vault(root: Path, shape: VaultShape) -> Dict[str, int]:
+    """Create a vault under root with the given shape.
+
+    Returns:
+        Counts of created directories, files and bytes
+    """
+    rng = random.Random(shape.seed)
+    root.mkdir(parents=True, exist_ok=True)
+    stats = {"directories": 0, "files": 0, "bytes": 0}
+    pending: List[tuple] = [(root, 0)]
+    while pending:
+        directory, level = pending.pop()
+        for i in range(shape.files_per_dir):
+            size = max(16, int(rng.lognormvariate(math.log(shape.median_bytes), shape.size_sigma)))
+            if rng.random() < shape.chat_ratio:
+                path, content = directory / f"chat-{i}.chat", _chat(rng, size)
+            else:
+                path, content = directory / f"note-{i}.md", _markdown(rng, size)
+            path.write_text(content, encoding="utf-8")
+            stats["files"] += 1
+            stats["bytes"] += len(content.encode("utf-8"))
+        if level < shape.depth:
+            for i in range(shape.fanout):
+                child = directory / f"dir-{level + 1}-{i}"
+                child.mkdir()
+                stats["directories"] += 1
+                pending.append((child, level + 1))
+    return stats
+
+
+def documents(root: Path) -> List[str]:
+    """All .md/.chat paths in a vault, relative to root and sorted."""
+    return sorted(
+        str(path.relative_to(root)) for path in root.rglob("*")
+        if path.suffix in (".md", ".chat") and ".synapse" not in path.parts
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic vault")
+    parser.add_argument("root", type=Path)
+    for field, default in asdict(VaultShape()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+    shape = VaultShape(**{field: getattr(args, field) for field in asdict(VaultShape())})
+    print(json.dumps(generate_vault(args.root, shape)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import asyncio
+import io
+from typing import AsyncIterator
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..repositories.archive import ARCHIVE_MEDIA_TYPES, TarExport, archive_formats, import_tar
+from ..repositories.vault import VaultManager
+from ..dependencies import get_vault
+from .responses import FastJSONResponse
+
+
+archive_router = APIRouter()
+
+class _RequestReader(io.RawIOBase):
+    """Blocking file object over a request body, for use off the event loop.
+
+    Each read waits for the next body chunk on the loop, so the upload is
+    consumed only as fast as the reader goes.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks
+        self._loop = loop
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                chunk = asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop).result()
+            except StopAsyncIteration:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+@archive_router.get("/export")
+@archive_router.get("/export/{path:path}")
+async def export_archive(
+    path: str = "",
+    format: str = Query("tar", pattern="^tar(\\.gz|\\.zst)?$"),
+    vault: VaultManager = Depends(get_vault)
+):
+    """Stream a directory (the whole vault by default) as a tar, tar.gz or
+    tar.zst archive, built while it is sent."""
+    if format not in archive_formats():
+        raise HTTPException(status_code=400, detail=f"Archive format {format} is not available")
+    export = await run_in_threadpool(TarExport, vault, path, format)
+    name = "vault" if export.key == "." else export.location.name
+    return StreamingResponse(
+        export,
+        media_type=ARCHIVE_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(f'{name}.{format}')}"},
+    )
+
+@archive_router.post("/import")
+@archive_router.post("/import/{path:path}")
+async def import_archive(
+    request: Request,
+    path: str = "",
+    overwrite: bool = True,
+    vault: VaultManager = Depends(get_vault)
+):
+    """Unpack an uploaded tar archive (optionally gzip/bz2/xz/zstd
+    compressed) into a directory, streaming it from the request body.
+
+    Responds with what was imported, the entries that were rejected and
+    the throughput.
+    """
+    reader = io.BufferedReader(_RequestReader(request.stream(), asyncio.get_running_loop()), buffer_size=1 << 20)
+    return FastJSONResponse(await run_in_threadpool(import_tar, vault, reader, path, overwrite))
@@ -0,0 +1,55 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from ..repositories.catalog import Catalog
+from ..repositories.metadata_index import ROOT_KEY
+from ..repositories.vault import VaultManager
+from ..dependencies import get_catalog, get_vault
+
+
+catalog_router = APIRouter()
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+@catalog_router.get("/entries")
+def query_entries(
+    path: str = "",
+    recursive: bool = True,
+    type: Optional[str] = Query(None, pattern="^(file|directory)$"),
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    modified_after: Optional[float] = None,
+    modified_before: Optional[float] = None,
+    sort: str = Query("-modified", pattern="^-?(path|modified|size)$"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    vault: VaultManager = Depends(get_vault),
+    catalog: Catalog = Depends(get_catalog)
+):
+    """Entries below `path` (the whole subtree unless recursive=false),
+    filtered by type, size and modification time, answered from the
+    catalog's indexes rather than a tree walk. Pass next_cursor back as
+    `cursor` for the next page."""
+    under = vault.normalize_path(path) if path else ROOT_KEY
+    return catalog.query(
+        under=under,
+        recursive=recursive,
+        type=type,
+        min_size=min_size,
+        max_size=max_size,
+        modified_after=modified_after,
+        modified_before=modified_before,
+        sort=sort,
+        limit=limit,
+        cursor=cursor,
+    )
+
+@catalog_router.get("/recent")
+def recently_modified(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    catalog: Catalog = Depends(get_catalog)
+):
+    """The most recently modified files in the vault."""
+    return catalog.query(type="file", sort="-modified", limit=limit)["entries"]
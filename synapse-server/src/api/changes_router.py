@@ -0,0 +1,82 @@
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+
+from ..repositories.changes import ChangeFeed
+from ..dependencies import get_change_feed
+
+
+changes_router = APIRouter()
+
+HEARTBEAT_SECONDS = 15.0
+
+
+def _sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _resume_point(feed: ChangeFeed, last_event_id: Optional[str], since: Optional[int]) -> Optional[int]:
+    """Sequence number to resume after, or None if the client can't resume.
+
+    Event ids have the form "<epoch>-<seq>"; ids from another server process
+    can't be resumed from.
+    """
+    if last_event_id:
+        epoch, _, seq = last_event_id.rpartition("-")
+        if epoch != feed.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+    return since
+
+
+async def change_stream(feed: ChangeFeed, after: Optional[int], resuming: bool, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+    """Server-sent events for every change after `after`.
+
+    A fresh connection starts with a "ready" event carrying the current
+    position: clients should (re)load whatever they display after it and
+    apply the following "change" events on top. A resume that can't be
+    honoured gets a "reset" event with the same payload instead, meaning
+    the client has missed changes and must reload.
+    """
+    yield "retry: 3000\n\n"
+    if after is None or feed.since(after) is None:
+        after = feed.last_seq
+        yield _sse("reset" if resuming else "ready", {"epoch": feed.epoch, "seq": after}, f"{feed.epoch}-{after}")
+    while True:
+        events = feed.since(after)
+        if events is None:
+            after = feed.last_seq
+            yield _sse("reset", {"epoch": feed.epoch, "seq": after}, f"{feed.epoch}-{after}")
+            continue
+        for event in events:
+            after = event["seq"]
+            yield _sse("change", event, f"{feed.epoch}-{after}")
+        if not await feed.wait(after, heartbeat):
+            yield ": keepalive\n\n"
+
+
+@changes_router.get("")
+async def stream_changes(
+    since: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    feed: ChangeFeed = Depends(get_change_feed),
+):
+    """Stream vault changes as Server-Sent Events.
+
+    Resume with the standard Last-Event-ID header (browsers' EventSource
+    sends it automatically on reconnect) or with ?since=<seq>.
+    """
+    resuming = bool(last_event_id) or since is not None
+    after = _resume_point(feed, last_event_id, since)
+    return StreamingResponse(
+        change_stream(feed, after, resuming),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
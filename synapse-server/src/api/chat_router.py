@@ -0,0 +1,47 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, ConfigDict
+
+from ..repositories.chat import ChatLog
+from ..dependencies import get_chat_log
+
+
+chat_router = APIRouter()
+
+DEFAULT_WINDOW = 50
+MAX_WINDOW = 1000
+
+class ChatMessageModel(BaseModel):
+    """A message to append. Fields besides role and content are kept as sent."""
+    model_config = ConfigDict(extra="allow")
+
+    role: str
+    content: str
+
+@chat_router.get("/messages/{path:path}")
+def get_messages(
+    path: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    last: Optional[int] = Query(None, ge=0, le=MAX_WINDOW),
+    chat: ChatLog = Depends(get_chat_log)
+):
+    """Read a window of a transcript: ?last=N, or ?start=&end= (Python slice
+    semantics, so negative indexes count from the end). Without either, the
+    last DEFAULT_WINDOW messages are returned. `total` lets clients page
+    further back with start/end."""
+    if start is None and end is None and last is None:
+        last = DEFAULT_WINDOW
+    if last is None:
+        return chat.read(path, start=start, end=end, limit=MAX_WINDOW)
+    return chat.read(path, last=last)
+
+@chat_router.post("/messages/{path:path}")
+def append_message(
+    path: str,
+    message: ChatMessageModel,
+    chat: ChatLog = Depends(get_chat_log)
+):
+    """Append a message to a transcript, creating it if needed."""
+    return chat.append(path, message.model_dump())
@@ -0,0 +1,220 @@
+import zlib
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Media types worth compressing; everything else (images, already-compressed
+# archives) is passed through
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Server-sent events are left alone so each event reaches the client at once
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+class _Encoder(Protocol):
+    """Streaming compressor: feed chunks, flush at chunk boundaries, finish once."""
+
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def flush(self) -> bytes:
+        ...
+
+    def finish(self) -> bytes:
+        ...
+
+
+class _GzipEncoder:
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int = 3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encoders() -> Dict[str, Callable[[], _Encoder]]:
+    """Supported encodings in server preference order."""
+    encoders: Dict[str, Callable[[], _Encoder]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+    encoders["gzip"] = _GzipEncoder
+    return encoders
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Pick the encoding the client weighs highest (server order breaks ties).
+
+    Returns None if the client accepts none of them.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best: Optional[Tuple[float, int, str]] = None
+    for rank, encoding in enumerate(encodings):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0 and (best is None or (q, -rank) > best[:2]):
+            best = (q, -rank, encoding)
+    return best[2] if best else None
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli/zstd compression for API responses.
+
+    Like Starlette's GZipMiddleware, but with brotli and zstd (each used only
+    if its package is installed) and aware of this API's validators: a
+    compressed representation gets a weak ETag, since it is no longer
+    byte-identical to the one the strong tag was minted for. Bodies that
+    fit in one message and are smaller than `minimum_size` are sent as is;
+    streamed bodies (NDJSON tree and batch responses) are compressed chunk
+    by chunk and flushed at every chunk boundary, so clients still receive
+    entries as soon as they are produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, encoders: Optional[Dict[str, Callable[[], _Encoder]]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = encoders if encoders is not None else available_encoders()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, list(self.encoders)) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.start_message = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    def _compressible(self, message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return False
+        content_type = ""
+        for name, value in message.get("headers", []):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(EXCLUDED_TYPES)
+
+    def _compressed_headers(self, length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = []
+        for name, value in self.start_message.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return headers
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            if not self._compressible(message):
+                self.passthrough = True
+                await self.send(message)
+            return
+        if message["type"] == "http.response.pathsend" and not self.passthrough:
+            # Zero-copy file body: the server sends it as is
+            self.passthrough = True
+            await self.send({**self.start_message, "headers": self._uncompressed_headers()})
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                await self.send({**self.start_message, "headers": self._uncompressed_headers()})
+                await self.send(message)
+                return
+            self.encoder = self.middleware.encoders[self.encoding]()
+            if not more_body:
+                data = self.encoder.compress(body) + self.encoder.finish()
+                await self.send({**self.start_message, "headers": self._compressed_headers(len(data))})
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            await self.send({**self.start_message, "headers": self._compressed_headers(None)})
+        data = self.encoder.compress(body)
+        data += self.encoder.flush() if more_body else self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _uncompressed_headers(self) -> List[Tuple[bytes, bytes]]:
+        return list(self.start_message.get("headers", [])) + [(b"vary", b"Accept-Encoding")]
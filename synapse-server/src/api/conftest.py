@@ -0,0 +1,23 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..settings import Settings, get_settings
+from ..repositories.vault import VaultError
+from .vault_router import vault_exception_handler
+
+@pytest.fixture
+def make_client(tmp_path):
+    """Fixture to build test clients for apps serving tmp_path as the vault.
+
+    Call it with (router, prefix) pairs to mount, and optionally Settings
+    fields to override.
+    """
+    def make(*routers, **settings):
+        app = FastAPI()
+        for router, prefix in routers:
+            app.include_router(router, prefix=prefix)
+        app.add_exception_handler(VaultError, vault_exception_handler)
+        app.dependency_overrides[get_settings] = lambda: Settings(vault_dir=tmp_path, **settings)
+        return TestClient(app)
+    return make
@@ -0,0 +1,79 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from ..repositories.history import HistoryStore
+from ..repositories.vault import PathNotFoundError, VaultManager
+from ..dependencies import get_history_store, get_vault
+
+
+history_router = APIRouter()
+
+# Longest a listing waits for queued saves to be recorded, in seconds
+FLUSH_TIMEOUT = 2.0
+
+@history_router.get("/versions/{path:path}")
+def list_versions(
+    path: str,
+    vault: VaultManager = Depends(get_vault),
+    history: HistoryStore = Depends(get_history_store)
+):
+    """Recorded versions of a document, newest first."""
+    key = vault.normalize_path(path)
+    # Include the saves still waiting to be recorded, unless the backlog
+    # is long: then they show up in a later listing
+    history.flush(timeout=FLUSH_TIMEOUT)
+    return {"path": key, "versions": history.versions(key)}
+
+@history_router.get("/content/{path:path}")
+def get_version(
+    path: str,
+    version: int,
+    vault: VaultManager = Depends(get_vault),
+    history: HistoryStore = Depends(get_history_store)
+):
+    key = vault.normalize_path(path)
+    return {"path": key, "version": version, "content": history.content(key, version)}
+
+@history_router.get("/diff/{path:path}")
+def diff_versions(
+    path: str,
+    from_version: int = Query(..., alias="from"),
+    to_version: Optional[int] = Query(None, alias="to"),
+    context: int = Query(3, ge=0, le=100),
+    vault: VaultManager = Depends(get_vault),
+    history: HistoryStore = Depends(get_history_store)
+):
+    """Unified diff between two versions, or a version and the current file."""
+    key = vault.normalize_path(path)
+    old = history.content(key, from_version)
+    if to_version is None:
+        new, new_label = vault.get_document(key)["content"], "current"
+    else:
+        new, new_label = history.content(key, to_version), str(to_version)
+    return {
+        "path": key,
+        "from": from_version,
+        "to": to_version,
+        "diff": history.diff(key, old, new, str(from_version), new_label, context=context),
+    }
+
+@history_router.post("/restore/{path:path}")
+def restore_version(
+    path: str,
+    version: int,
+    vault: VaultManager = Depends(get_vault),
+    history: HistoryStore = Depends(get_history_store)
+):
+    """Make an old version current again. The restore is itself a new version."""
+    key = vault.normalize_path(path)
+    content = history.content(key, version)
+    try:
+        return vault.update_file(key, content)
+    except PathNotFoundError:
+        return vault.create_file(key, content)
+
+@history_router.post("/gc")
+def collect_garbage(history: HistoryStore = Depends(get_history_store)):
+    """Apply the retention policy now and delete unreferenced blobs."""
+    return history.gc()
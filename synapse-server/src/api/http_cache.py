@@ -0,0 +1,62 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+
+from ..repositories.metadata_index import EntryMeta
+
+
+def document_etag(meta: EntryMeta, representation: str = "") -> str:
+    """Strong validator for a document: changes whenever mtime or size does.
+
+    Representations of a document other than its JSON form (raw bytes, a
+    window of lines) are different bodies, so they get their own tag with
+    the representation appended ("version+raw"); see version_from_etag.
+    """
+    if representation:
+        return f'"{meta.version}+{representation}"'
+    return f'"{meta.version}"'
+
+def directory_etag(fingerprint: str) -> str:
+    """Weak validator for a listing: equal listings are equivalent, not byte-identical."""
+    return f'W/"{fingerprint}"'
+
+def validator_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        # Let clients keep a copy but always revalidate (editors need fresh data)
+        "Cache-Control": "no-cache",
+    }
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def version_from_etag(etag: str) -> str:
+    """Recover the repository version token from a (possibly weak) ETag of
+    any of the document's representations."""
+    return _strip_weak(etag).strip('"').partition("+")[0]
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since the way RFC 9110 does for GET.
+
+    If-None-Match uses weak comparison and, when present, takes precedence
+    over If-Modified-Since.
+    """
+    if_none_match: Optional[str] = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {_strip_weak(tag) for tag in if_none_match.split(",")}
+        return _strip_weak(etag) in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(last_modified) <= since
+    return False
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..repositories.links import LinkGraph
+from ..repositories.vault import VaultManager
+from ..dependencies import get_link_graph, get_vault
+
+
+links_router = APIRouter()
+
+MAX_DEPTH = 3
+
+@links_router.get("/backlinks/{path:path}")
+def get_backlinks(
+    path: str,
+    vault: VaultManager = Depends(get_vault),
+    graph: LinkGraph = Depends(get_link_graph)
+):
+    """Notes that link to this one."""
+    key = vault.normalize_path(path)
+    return {"path": key, "backlinks": graph.backlinks(key)}
+
+@links_router.get("/outlinks/{path:path}")
+def get_outlinks(
+    path: str,
+    vault: VaultManager = Depends(get_vault),
+    graph: LinkGraph = Depends(get_link_graph)
+):
+    """Links and tags in this note; `path` is null for links to missing notes."""
+    return graph.links(vault.normalize_path(path))
+
+@links_router.get("/neighbourhood/{path:path}")
+def get_neighbourhood(
+    path: str,
+    depth: int = Query(1, ge=1, le=MAX_DEPTH),
+    max_nodes: int = Query(500, ge=1, le=5000),
+    vault: VaultManager = Depends(get_vault),
+    graph: LinkGraph = Depends(get_link_graph)
+):
+    """Notes within `depth` links of this one, following links both ways,
+    and the links among them (for a local graph view)."""
+    return graph.neighbourhood(vault.normalize_path(path), depth=depth, max_nodes=max_nodes)
+
+@links_router.get("/orphans")
+def get_orphans(graph: LinkGraph = Depends(get_link_graph)):
+    """Notes that neither link to nor are linked from another note."""
+    return {"orphans": graph.orphans()}
+
+@links_router.get("/tags")
+def get_tags(graph: LinkGraph = Depends(get_link_graph)):
+    """Every tag with its number of notes."""
+    return {"tags": graph.tags()}
+
+@links_router.get("/tags/{tag:path}")
+def get_tagged(tag: str, graph: LinkGraph = Depends(get_link_graph)):
+    """Notes carrying a tag."""
+    return {"tag": tag, "paths": graph.tagged(tag)}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Request, Response
+
+from ..repositories.markdown_cache import MarkdownCache, NOTE_SUFFIX
+from ..repositories.vault import VaultManager, PathNotFoundError, UnsupportedFileTypeError
+from ..dependencies import get_markdown_cache, get_vault
+from .http_cache import document_etag, validator_headers, is_not_modified
+from .responses import FastJSONResponse
+
+
+markdown_router = APIRouter()
+
+@markdown_router.get("/{path:path}")
+def get_summary(
+    path: str,
+    request: Request,
+    html: bool = True,
+    vault: VaultManager = Depends(get_vault),
+    cache: MarkdownCache = Depends(get_markdown_cache)
+):
+    """A note's structure without its content: title, front matter,
+    headings, tasks and (unless html=false) an HTML preview.
+
+    Carries the document's ETag, so a client that has the summary for the
+    current version gets a 304.
+    """
+    key = vault.normalize_path(path)
+    entry = vault.get_entry(key)
+    if entry.type != "file":
+        raise PathNotFoundError(f"File {path} not found")
+    if not key.endswith(NOTE_SUFFIX):
+        raise UnsupportedFileTypeError(f"{path} is not a markdown note")
+    headers = validator_headers(document_etag(entry), entry.modified_at)
+    if is_not_modified(request, headers["ETag"], entry.modified_at):
+        return Response(status_code=304, headers=headers)
+    try:
+        summary = cache.summary(key)
+    except FileNotFoundError:
+        raise PathNotFoundError(f"File {path} not found")
+    if not html:
+        summary = {name: value for name, value in summary.items() if name not in ("html", "truncated")}
+    return FastJSONResponse(summary, headers=headers)
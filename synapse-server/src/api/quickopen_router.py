@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..repositories.quickopen import PathIndex
+from ..dependencies import get_quick_open
+
+
+quickopen_router = APIRouter()
+
+@quickopen_router.get("")
+def quick_open(
+    q: str = "",
+    limit: int = Query(20, ge=1, le=100),
+    index: PathIndex = Depends(get_quick_open)
+):
+    """Fuzzy-match .md/.chat paths for the quick-open palette, best first.
+
+    `positions` are the matched character offsets in each path, for
+    highlighting; an empty query lists the most recently modified files.
+    """
+    return {"query": q, "results": index.search(q, limit=limit)}
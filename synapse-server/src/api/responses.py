@@ -0,0 +1,30 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON as compact UTF-8 bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that skips FastAPI's jsonable_encoder pass and encodes
+    with orjson when available.
+
+    Vault payloads (FileInfo, DirectoryInfo, listing pages) are plain dicts,
+    lists, strings and numbers, which both encoders handle directly; for a
+    deep DirectoryInfo tree most of the default response time goes into
+    walking it once to make it JSON-compatible and again to encode it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
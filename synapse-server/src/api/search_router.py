@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..repositories.search import SearchIndex
+from ..dependencies import get_search_index
+
+
+search_router = APIRouter()
+
+@search_router.get("")
+def search(
+    q: str,
+    limit: int = Query(20, ge=1, le=100),
+    index: SearchIndex = Depends(get_search_index)
+):
+    """Full-text search over .md and .chat documents.
+
+    Snippets are raw document text with matches wrapped in <mark> tags.
+    """
+    return {"query": q, "results": index.search(q, limit=limit)}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..repositories.embeddings import EmbeddingIndex, IndexTooLargeError
+from ..repositories.vault import VaultManager, PathNotFoundError
+from ..dependencies import get_embedding_index, get_vault
+
+
+semantic_router = APIRouter()
+
+@semantic_router.get("/related/{path:path}")
+def get_related(
+    path: str,
+    limit: int = Query(10, ge=1, le=100),
+    vault: VaultManager = Depends(get_vault),
+    embeddings: EmbeddingIndex = Depends(get_embedding_index)
+):
+    """Notes whose content is most similar to this one's."""
+    key = vault.normalize_path(path)
+    if vault.get_entry(key).type != "file":
+        raise PathNotFoundError(f"File {path} not found")
+    try:
+        return {"path": key, "related": embeddings.related(key, limit=limit)}
+    except IndexTooLargeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+@semantic_router.get("/search")
+def semantic_search(
+    q: str,
+    limit: int = Query(10, ge=1, le=100),
+    embeddings: EmbeddingIndex = Depends(get_embedding_index)
+):
+    """Notes most similar to free text, by meaning rather than exact terms."""
+    try:
+        return {"query": q, "results": embeddings.search(q, limit=limit)}
+    except IndexTooLargeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+@semantic_router.get("/status")
+def get_status(embeddings: EmbeddingIndex = Depends(get_embedding_index)):
+    """The embedding model, how many documents are embedded and how many wait."""
+    return {"model": embeddings.embedder.name, "documents": len(embeddings), "pending": embeddings.pending}
@@ -0,0 +1,36 @@
+import io
+import tarfile
+import pytest
+
+from .archive_router import archive_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and archive routers"""
+    return make_client((vault_router, "/d"), (archive_router, "/archive"))
+
+def test_export_and_import(client):
+    """Test exporting a folder as tar.gz and importing the upload elsewhere"""
+    client.post("/d/files/notes/a.md", content="alpha", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/notes/sub/b.md", content="beta", headers={"Content-Type":"text/plain"})
+
+    response = client.get("/archive/export/notes?format=tar.gz")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == "attachment; filename*=UTF-8''notes.tar.gz"
+    with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as tar:
+        assert tar.getnames() == ["a.md", "sub", "sub/b.md"]
+
+    def chunks(data):
+        for start in range(0, len(data), 100):
+            yield data[start:start + 100]
+
+    response = client.post("/archive/import/copy", content=chunks(response.content))
+    assert response.status_code == 200
+    assert response.json()["files"] == 2
+    assert client.get("/d/copy/sub/b.md").json()["content"] == "beta"
+
+    assert client.get("/archive/export/missing").status_code == 404
+    assert client.get("/archive/export?format=zip").status_code == 422
+    assert client.post("/archive/import", content=b"not a tar").status_code == 400
@@ -0,0 +1,21 @@
+import pytest
+
+from .catalog_router import catalog_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and catalog routers"""
+    return make_client((vault_router, "/d"), (catalog_router, "/catalog"))
+
+def test_catalog_queries(client):
+    """Test filtered catalog queries and the recent files shortcut"""
+    client.post("/d/files/notes/small.md", content="hi", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/notes/big.md", content="x" * 5000, headers={"Content-Type":"text/plain"})
+
+    response = client.get("/catalog/entries?path=notes&min_size=1000")
+    assert response.status_code == 200
+    assert [entry["path"] for entry in response.json()["entries"]] == ["notes/big.md"]
+    assert {entry["path"] for entry in client.get("/catalog/recent").json()} == {"notes/small.md", "notes/big.md"}
+    assert client.get("/catalog/entries?sort=name").status_code == 422
+    assert client.get("/catalog/entries?cursor=bogus").status_code == 400
@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import pytest
+from .changes_router import change_stream, _resume_point
+from ..repositories.changes import ChangeFeed
+from ..repositories.metadata_index import MetadataIndex
+from ..repositories.vault import VaultManager
+
+@pytest.fixture
+def feed(tmp_path):
+    """Fixture to provide a change feed over a temporary vault"""
+    index = MetadataIndex(tmp_path)
+    index.build()
+    return ChangeFeed(index)
+
+def _collect(feed, after, resuming, count):
+    async def run():
+        stream = change_stream(feed, after, resuming, heartbeat=0.01)
+        messages = [await stream.__anext__() for _ in range(count)]
+        await stream.aclose()
+        return messages
+    return asyncio.run(run())
+
+def _parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines() if not line.startswith(":"))
+    return fields.get("event"), json.loads(fields["data"]) if "data" in fields else None, fields.get("id")
+
+def test_fresh_stream_starts_with_ready(feed, tmp_path):
+    """Test that a new client gets its position and then only new changes"""
+    VaultManager(tmp_path, index=feed.index).create_file("old.md", "old")
+    retry, ready, keepalive = _collect(feed, None, False, 3)
+    assert retry.startswith("retry:")
+    assert _parse(ready) == ("ready", {"epoch": feed.epoch, "seq": 1}, f"{feed.epoch}-1")
+    assert keepalive.startswith(":")
+
+def test_resume_replays_missed_changes(feed, tmp_path):
+    """Test that resuming with a Last-Event-ID replays only later changes"""
+    manager = VaultManager(tmp_path, index=feed.index)
+    manager.create_file("a.md", "a")
+    manager.create_file("b.md", "b")
+    after = _resume_point(feed, f"{feed.epoch}-1", None)
+    _, change = _collect(feed, after, True, 2)
+    event, data, event_id = _parse(change)
+    assert (event, data["path"], data["type"], event_id) == ("change", "b.md", "created", f"{feed.epoch}-2")
+
+def test_resume_from_other_epoch_resets(feed):
+    """Test that ids from another server process force a resync"""
+    after = _resume_point(feed, "0123456789ab-5", None)
+    _, reset = _collect(feed, after, True, 2)
+    assert _parse(reset)[0] == "reset"
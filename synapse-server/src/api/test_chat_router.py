@@ -0,0 +1,24 @@
+import pytest
+
+from .chat_router import chat_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the chat router"""
+    return make_client((chat_router, "/chat"))
+
+def test_append_and_fetch_window(client):
+    """Test appending messages and reading the latest ones back"""
+    for i in range(3):
+        response = client.post("/chat/messages/talks/a.chat", json={"role": "user", "content": f"m{i}", "model": "x"})
+        assert response.status_code == 200
+    window = client.get("/chat/messages/talks/a.chat?last=2").json()
+    assert window["total"] == 3 and window["start"] == 1
+    assert [m["content"] for m in window["messages"]] == ["m1", "m2"]
+    assert window["messages"][0]["model"] == "x"
+    assert len(client.get("/chat/messages/talks/a.chat").json()["messages"]) == 3
+
+def test_errors(client):
+    """Test that missing transcripts are 404 and invalid messages 422"""
+    assert client.get("/chat/messages/missing.chat").status_code == 404
+    assert client.post("/chat/messages/a.chat", json={"content": "no role"}).status_code == 422
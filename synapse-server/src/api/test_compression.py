@@ -0,0 +1,81 @@
+import gzip
+
+import anyio
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from .compression import CompressionMiddleware, negotiate
+from .responses import FastJSONResponse
+
+@pytest.fixture
+def client():
+    """Fixture to provide a client for an app behind the compression middleware"""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return FastJSONResponse({"text": "x" * 1000}, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small():
+        return FastJSONResponse({"text": "x"})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b'{"n": %d}\n' % i for i in range(3)), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: x" * 100 + b"\n\n"]), media_type="text/event-stream")
+
+    return TestClient(app)
+
+def test_negotiate_prefers_client_weights():
+    """Test that q-values win over server preference, which breaks ties"""
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", ["zstd", "br", "gzip"]) == "gzip"
+    assert negotiate("*", ["zstd", "gzip"]) == "zstd"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("gzip;q=0", ["gzip"]) is None
+
+def test_large_response_is_compressed(client):
+    """Test that large bodies are compressed and strong ETags weakened"""
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == {"text": "x" * 1000}
+    assert int(response.headers["content-length"]) < 100
+
+def test_small_and_unnegotiated_responses_pass_through(client):
+    """Test that small bodies and clients without Accept-Encoding get identity"""
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+def test_streams_are_compressed_per_chunk(client):
+    """Test that streamed NDJSON is compressed and event streams are not"""
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).splitlines() == [b'{"n": 0}', b'{"n": 1}', b'{"n": 2}']
+    assert "content-encoding" not in client.get("/events", headers={"Accept-Encoding": "gzip"}).headers
+
+def test_pathsend_bodies_pass_through():
+    """Test that a zero-copy file body is sent uncompressed, after its headers"""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/markdown")]})
+        await send({"type": "http.response.pathsend", "path": "/vault/a.md"})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = CompressionMiddleware(app)
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    anyio.run(middleware, scope, None, send)
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.pathsend"]
+    assert (b"content-encoding", b"gzip") not in sent[0]["headers"]
@@ -0,0 +1,45 @@
+import pytest
+
+from .history_router import history_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and history routers"""
+    return make_client((vault_router, "/d"), (history_router, "/history"))
+
+def _save(client, content, create=False):
+    method = client.post if create else client.put
+    return method("/d/files/notes/a.md", content=content, headers={"Content-Type": "text/plain"})
+
+def test_list_diff_and_restore(client):
+    """Test that versions can be listed, diffed and restored"""
+    _save(client, "first\n", create=True)
+    _save(client, "second\n")
+    versions = client.get("/history/versions/notes/a.md").json()["versions"]
+    assert len(versions) == 2
+    oldest = versions[-1]["id"]
+
+    diff = client.get(f"/history/diff/notes/a.md?from={oldest}").json()["diff"]
+    assert "-first" in diff and "+second" in diff
+
+    restored = client.post(f"/history/restore/notes/a.md?version={oldest}")
+    assert restored.json()["content"] == "first\n"
+    assert len(client.get("/history/versions/notes/a.md").json()["versions"]) == 3
+
+def test_unknown_version_is_404(client):
+    """Test that asking for a version that doesn't exist returns 404"""
+    _save(client, "x", create=True)
+    assert client.get("/history/content/notes/a.md?version=999").status_code == 404
+
+def test_gc_endpoint(client):
+    """Test that GC can be triggered over the API"""
+    _save(client, "x", create=True)
+    assert client.post("/history/gc").json()["versions_removed"] == 0
+
+def test_disabled_history_is_404(make_client, tmp_path):
+    """Test that with history disabled the routes 404 without creating a store"""
+    client = make_client((history_router, "/history"), history_enabled=False)
+    assert client.get("/history/versions/notes/a.md").status_code == 404
+    assert client.post("/history/gc").status_code == 404
+    assert not (tmp_path / ".synapse" / "history").exists()
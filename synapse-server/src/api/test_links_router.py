@@ -0,0 +1,27 @@
+import pytest
+
+from .links_router import links_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and links routers"""
+    return make_client((vault_router, "/d"), (links_router, "/links"))
+
+def test_link_queries(client):
+    """Test backlinks, outlinks, orphans and tags through the API"""
+    client.post("/d/files/a.md", content="[[b]] #idea", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/b.md", content="", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/lonely.md", content="", headers={"Content-Type":"text/plain"})
+
+    assert client.get("/links/backlinks/b.md").json() == {"path": "b.md", "backlinks": ["a.md"]}
+    assert client.get("/links/outlinks/a.md").json()["links"] == [{"target": "b", "path": "b.md"}]
+    assert client.get("/links/orphans").json() == {"orphans": ["lonely.md"]}
+    assert client.get("/links/tags").json() == {"tags": {"idea": 1}}
+    assert client.get("/links/tags/idea").json()["paths"] == ["a.md"]
+    assert len(client.get("/links/neighbourhood/b.md").json()["nodes"]) == 2
+
+def test_unknown_note(client):
+    """Test that queries for a missing note are 404s"""
+    assert client.get("/links/backlinks/nope.md").status_code == 404
+    assert client.get("/links/neighbourhood/nope.md?depth=9").status_code == 422
@@ -0,0 +1,30 @@
+import pytest
+
+from .markdown_router import markdown_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and markdown routers"""
+    return make_client((vault_router, "/d"), (markdown_router, "/markdown"))
+
+def test_summary_follows_updates(client):
+    """Test that summaries are served with validators and reflect updates"""
+    client.post("/d/files/notes/plan.md", content="# Plan\n\n- [ ] start", headers={"Content-Type":"text/plain"})
+    response = client.get("/markdown/notes/plan.md")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Plan"
+    assert response.json()["tasks"] == [{"line": 2, "checked": False, "text": "start"}]
+    etag = response.headers["etag"]
+    assert client.get("/markdown/notes/plan.md", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put("/d/files/notes/plan.md", content="# Plan\n\n- [x] start", headers={"Content-Type":"text/plain"})
+    updated = client.get("/markdown/notes/plan.md?html=false", headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.json()["tasks"][0]["checked"] is True
+    assert "html" not in updated.json()
+
+    client.post("/d/files/talk.chat", content="", headers={"Content-Type":"text/plain"})
+    assert client.get("/markdown/talk.chat").status_code == 400
+    assert client.get("/markdown/missing.md").status_code == 404
+    assert client.get("/markdown/notes").status_code == 404
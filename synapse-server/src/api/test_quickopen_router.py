@@ -0,0 +1,23 @@
+import pytest
+
+from .quickopen_router import quickopen_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and quick-open routers"""
+    return make_client((vault_router, "/d"), (quickopen_router, "/quickopen"))
+
+def test_quick_open(client):
+    """Test fuzzy path matching with highlight positions, and new files showing up"""
+    client.post("/d/files/projects/roadmap.md", content="x", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/notes/random.chat", content="x", headers={"Content-Type":"text/plain"})
+
+    response = client.get("/quickopen?q=rdmp")
+    assert response.status_code == 200
+    assert response.json()["results"][0]["path"] == "projects/roadmap.md"
+    assert response.json()["results"][0]["positions"] == [9, 12, 13, 15]
+
+    client.post("/d/files/projects/rdmp.md", content="x", headers={"Content-Type":"text/plain"})
+    assert [hit["path"] for hit in client.get("/quickopen?q=rdmp&limit=1").json()["results"]] == ["projects/rdmp.md"]
+    assert client.get("/quickopen?q=rdmp&limit=0").status_code == 422
@@ -0,0 +1,28 @@
+import pytest
+
+from .search_router import search_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and search routers"""
+    return make_client((vault_router, "/d"), (search_router, "/search"))
+
+def test_search_after_create(client):
+    """Test that created files show up in search results"""
+    client.post("/d/files/ideas.md", content="Quantum gardening", headers={"Content-Type":"text/plain"})
+    response = client.get("/search?q=quant")
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [hit["path"] for hit in results] == ["ideas.md"]
+    assert results[0]["title"] == "ideas"
+
+def test_search_requires_query(client):
+    """Test that a missing query is rejected"""
+    assert client.get("/search").status_code == 422
+
+def test_search_limit(client):
+    """Test that limit caps the number of results"""
+    for i in range(3):
+        client.post(f"/d/files/n{i}.md", content="common term", headers={"Content-Type":"text/plain"})
+    assert len(client.get("/search?q=common&limit=2").json()["results"]) == 2
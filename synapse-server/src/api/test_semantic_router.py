@@ -0,0 +1,31 @@
+import pytest
+from ..dependencies import embedding_index_for
+
+from .semantic_router import semantic_router
+from .vault_router import vault_router
+
+@pytest.fixture
+def client(make_client):
+    """Fixture to provide a test client with the vault and semantic routers"""
+    return make_client((vault_router, "/d"), (semantic_router, "/semantic"), embedding_model="hashed-tfidf")
+
+def test_related_notes(client, tmp_path):
+    """Test related notes and semantic search over documents written through the API"""
+    client.post("/d/files/garden.md", content="tomatoes basil compost garden", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/soil.md", content="compost mulch garden soil", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/money.md", content="budget revenue expenses", headers={"Content-Type":"text/plain"})
+    assert client.post("/d/directories/empty").status_code == 200
+    embedding_index_for(tmp_path, "hashed-tfidf").flush()
+
+    response = client.get("/semantic/related/garden.md?limit=1")
+    assert response.status_code == 200
+    assert response.json() == {"path": "garden.md", "related": [{"path": "soil.md", "score": response.json()["related"][0]["score"]}]}
+    assert client.get("/semantic/search?q=expenses").json()["results"][0]["path"] == "money.md"
+    assert client.get("/semantic/status").json()["documents"] == 3
+    assert client.get("/semantic/related/missing.md").status_code == 404
+    assert client.get("/semantic/related/empty").status_code == 404
+
+def test_disabled_by_default(make_client):
+    """Test that without an embedding model the semantic routes are unavailable"""
+    client = make_client((semantic_router, "/semantic"))
+    assert client.get("/semantic/status").status_code == 404
@@ -0,0 +1,48 @@
+import json
+import pytest
+
+from .tree_router import tree_router
+
+@pytest.fixture
+def client(make_client, tmp_path):
+    """Fixture to provide a test client for an app with only tree_router"""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.md").write_text("1")
+    (tmp_path / "a" / "two.md").write_text("22")
+    (tmp_path / "b.md").write_text("b")
+    return make_client((tree_router, "/tree"))
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_stream_root(client):
+    """Test streaming the whole tree as NDJSON"""
+    response = client.get("/tree")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [e["path"] for e in read_lines(response)] == ["a", "a/one.md", "a/two.md", "b.md"]
+
+def test_stream_with_max_depth(client):
+    """Test that max_depth limits the streamed entries"""
+    response = client.get("/tree?max_depth=1")
+    assert [e["path"] for e in read_lines(response)] == ["a", "b.md"]
+
+def test_stream_resumes_after_cursor(client):
+    """Test resuming a stream from a cursor"""
+    response = client.get("/tree?cursor=a/one.md")
+    assert [e["path"] for e in read_lines(response)] == ["a/two.md", "b.md"]
+
+    response = client.get("/tree?cursor=a")
+    assert [e["path"] for e in read_lines(response)] == ["a/one.md", "a/two.md", "b.md"]
+
+def test_stream_subpath(client):
+    """Test streaming a subdirectory"""
+    response = client.get("/tree/a")
+    entries = read_lines(response)
+    assert [e["path"] for e in entries] == ["a/one.md", "a/two.md"]
+    assert entries[1]["size"] == 2
+
+def test_stream_missing_directory(client):
+    """Test streaming a missing directory returns 404"""
+    response = client.get("/tree/missing")
+    assert response.status_code == 404
@@ -1,3 +1,4 @@
+import json
 import pytest
 from ..settings import Settings, get_settings
 # from ..main import app  # Import your FastAPI app
@@ -127,5 +128,155 @@ def test_unsupported_file_type_raises_error(client):
     assert response.status_code == 400
     assert response.json()["detail"] == "Unsupported file type"
 
+def test_document_conditional_get(client):
+    """Test that documents carry a strong ETag and honour If-None-Match"""
+    client.post("/d/files/test.md", content="Hello!", headers={"Content-Type":"text/plain"})
+    response = client.get("/d/test.md")
+    etag = response.headers["etag"]
+    assert not etag.startswith("W/")
+    assert "last-modified" in response.headers
+
+    response = client.get("/d/test.md", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put("/d/files/test.md", content="Changed!!", headers={"Content-Type":"text/plain"})
+    response = client.get("/d/test.md", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["content"] == "Changed!!"
+
+def test_listing_conditional_get(client):
+    """Test that listings carry a weak ETag that changes with the subtree"""
+    client.post("/d/directories/parent")
+    response = client.get("/d")
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+    assert client.get("/d", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/d/files/parent/file.md", content="Hello!", headers={"Content-Type":"text/plain"})
+    assert client.get("/d", headers={"If-None-Match": etag}).status_code == 200
+    # The change is below max_depth, so the shallow listing is unchanged
+    shallow = client.get("/d/parent?max_depth=0").headers["etag"]
+    assert client.get("/d/parent?max_depth=0", headers={"If-None-Match": shallow}).status_code == 304
+
+def test_if_modified_since(client):
+    """Test that If-Modified-Since is honoured without an ETag"""
+    client.post("/d/files/test.md", content="Hello!", headers={"Content-Type":"text/plain"})
+    last_modified = client.get("/d/test.md").headers["last-modified"]
+    response = client.get("/d/test.md", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+def test_patch_file(client):
+    """Test patching a document against its ETag"""
+    client.post("/d/files/log.chat", content="hello", headers={"Content-Type":"text/plain"})
+    etag = client.get("/d/log.chat").headers["etag"]
+
+    response = client.patch("/d/files/log.chat", json={"splices": [{"offset": 5, "text": " world"}]}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert client.get("/d/log.chat").json()["content"] == "hello world"
+
+    response = client.patch("/d/files/log.chat", json={"base": response.headers["etag"], "splices": [{"offset": 0, "length": 5, "text": "HELLO"}]})
+    assert response.status_code == 200
+    assert client.get("/d/log.chat").json()["content"] == "HELLO world"
+
+def test_patch_stale_base_conflicts(client):
+    """Test that a stale base version returns 409"""
+    client.post("/d/files/test.md", content="one", headers={"Content-Type":"text/plain"})
+    etag = client.get("/d/test.md").headers["etag"]
+    client.put("/d/files/test.md", content="three", headers={"Content-Type":"text/plain"})
+    response = client.patch("/d/files/test.md", json={"splices": []}, headers={"If-Match": etag})
+    assert response.status_code == 409
+
+def test_patch_requires_base(client):
+    """Test that patches without a base version are refused"""
+    client.post("/d/files/test.md", content="one", headers={"Content-Type":"text/plain"})
+    response = client.patch("/d/files/test.md", json={"splices": []})
+    assert response.status_code == 428
+
+def test_batch_get_documents(client):
+    """Test fetching several documents with per-item errors"""
+    client.post("/d/files/a.md", content="A", headers={"Content-Type":"text/plain"})
+    client.post("/d/files/b.chat", content="B", headers={"Content-Type":"text/plain"})
+    response = client.post("/d/batch", json={"paths": ["a.md", "b.chat", "missing.md", "../x.md", "a.md"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    results = {item["path"]: item for item in map(json.loads, response.text.splitlines())}
+    assert len(results) == 4
+    assert results["a.md"]["document"]["content"] == "A"
+    assert results["b.chat"]["status"] == 200
+    assert results["missing.md"] == {"path": "missing.md", "status": 404, "detail": "File not found"}
+    assert results["../x.md"]["status"] == 403
+
+def test_batch_rejects_too_many_paths(client):
+    """Test that oversized batches are rejected"""
+    response = client.post("/d/batch", json={"paths": [f"{i}.md" for i in range(1000)]})
+    assert response.status_code == 422
+
+def test_paginated_listing(client):
+    """Test that limit switches listings to pages with opaque cursors"""
+    for i in range(3):
+        client.post(f"/d/files/notes/{i}.md", content="x", headers={"Content-Type":"text/plain"})
+    first = client.get("/d/notes?limit=2").json()
+    assert [c["path"] for c in first["children"]] == ["notes/0.md", "notes/1.md"]
+    rest = client.get("/d/notes", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [c["path"] for c in rest["children"]] == ["notes/2.md"]
+    assert rest["next_cursor"] is None
+
+    root = client.get("/d?limit=10").json()
+    assert root["children"][0]["has_children"] is True
+
+def test_paginated_listing_validation(client):
+    """Test that bad page sizes, sorts and cursors are rejected"""
+    assert client.get("/d?limit=0").status_code == 422
+    assert client.get("/d?limit=5&sort=color").status_code == 422
+    assert client.get("/d?cursor=garbage").status_code == 400
+
+def test_get_document_raw(client):
+    """Test that format=raw returns the document bytes with metadata headers"""
+    client.post("/d/files/raw.md", content="# Título", headers={"Content-Type":"text/plain"})
+    response = client.get("/d/raw.md?format=raw")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/markdown; charset=utf-8"
+    assert response.content == "# Título".encode()
+    assert response.headers["x-document-path"] == "raw.md"
+    json_etag = client.get("/d/raw.md").headers["etag"]
+    assert response.headers["etag"] == json_etag[:-1] + '+raw"'
+
+    negotiated = client.get("/d/raw.md", headers={"Accept": "text/markdown"})
+    assert negotiated.text == "# Título"
+    assert negotiated.headers["etag"] == response.headers["etag"]
+    # Validators don't cross-match between representations
+    assert client.get("/d/raw.md", headers={"If-None-Match": json_etag, "Accept": "text/markdown"}).status_code == 200
+    assert client.get("/d/raw.md", headers={"If-None-Match": response.headers["etag"]}).status_code == 200
+    patched = client.patch("/d/files/raw.md", json={"splices": [{"offset": 0, "text": "!"}]}, headers={"If-Match": response.headers["etag"]})
+    assert patched.status_code == 200
+
+def test_get_document_raw_ranges(client):
+    """Test that raw documents honour byte ranges and If-Range"""
+    client.post("/d/files/big.md", content="0123456789" * 1000, headers={"Content-Type":"text/plain"})
+    etag = client.get("/d/big.md?format=raw").headers["etag"]
+
+    response = client.get("/d/big.md?format=raw", headers={"Range": "bytes=10-14"})
+    assert response.status_code == 206
+    assert response.content == b"01234"
+    assert response.headers["content-range"] == "bytes 10-14/10000"
+    assert response.headers["etag"] == etag
+
+    assert client.get("/d/big.md?format=raw", headers={"Range": "bytes=-3", "If-Range": etag}).content == b"789"
+    stale = client.get("/d/big.md?format=raw", headers={"Range": "bytes=-3", "If-Range": '"stale"'})
+    assert stale.status_code == 200 and len(stale.content) == 10000
+    assert client.get("/d/big.md?format=raw", headers={"Range": "bytes=20000-"}).status_code == 416
+
+def test_get_document_lines(client):
+    """Test that format=lines pages through a document's lines"""
+    client.post("/d/files/log.chat", content="".join(f"line {i}\n" for i in range(1000)), headers={"Content-Type":"text/plain"})
+    response = client.get("/d/log.chat?format=lines&start=998&count=5")
+    assert response.status_code == 200
+    assert response.json() == {"path": "log.chat", "start": 998, "total": 1000, "lines": ["line 998", "line 999"]}
+    assert response.headers["etag"] == client.get("/d/log.chat").headers["etag"][:-1] + '+lines"'
+    assert client.get("/d/log.chat?format=lines&count=0").status_code == 422
+
 if __name__ == "__main__":
-    pytest.main()
\ No newline at end of file
+    pytest.main()
@@ -0,0 +1,63 @@
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from ..repositories.vault import VaultManager
+from ..dependencies import get_vault
+from .responses import dumps
+
+
+tree_router = APIRouter()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+FLUSH_BYTES = 16 * 1024
+
+
+def _ndjson(entries: Iterator[dict]) -> Iterator[bytes]:
+    """Encode entries as JSON lines, flushing in small chunks.
+
+    The first entry goes out on its own so the client can start rendering
+    immediately; after that lines are grouped to avoid one send per entry.
+    """
+    buffer = []
+    size = 0
+    first = True
+    for entry in entries:
+        line = dumps(entry) + b"\n"
+        if first:
+            first = False
+            yield line
+            continue
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _stream(path: str, max_depth: Optional[int], cursor: Optional[str], vault: VaultManager) -> StreamingResponse:
+    # Resolve and validate eagerly so errors become proper status codes
+    # before the streaming response has started
+    entries = vault.iter_directory(path, max_depth=max_depth, cursor=cursor)
+    return StreamingResponse(_ndjson(entries), media_type=NDJSON_MEDIA_TYPE)
+
+
+@tree_router.get("")
+def stream_root(
+    max_depth: Optional[int] = None,
+    cursor: Optional[str] = None,
+    vault: VaultManager = Depends(get_vault)
+):
+    return _stream("", max_depth, cursor, vault)
+
+@tree_router.get("/{path:path}")
+def stream_path(
+    path: str,
+    max_depth: Optional[int] = None,
+    cursor: Optional[str] = None,
+    vault: VaultManager = Depends(get_vault)
+):
+    return _stream(path, max_depth, cursor, vault)
@@ -1,13 +1,27 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Body, Depends
-from fastapi.responses import FileResponse, HTMLResponse
-from typing import Union, Dict, Optional
+from fastapi import FastAPI, APIRouter, HTTPException, Body, Depends, Header, Query
+from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+import asyncio
+from typing import AsyncIterator, Union, Dict, List, Optional, Tuple
 from pathlib import Path
 
-from ..repositories.vault import VaultError, PathNotFoundError, InvalidPathError, UnsupportedFileTypeError, FileExistsError, VaultManager
+from ..repositories.vault import VaultError, PathNotFoundError, InvalidPathError, UnsupportedFileTypeError, FileExistsError, VersionConflictError, VaultManager
+from ..repositories.async_vault import AsyncVaultManager
+from ..repositories.metadata_index import EntryMeta
 from ..settings import Settings, get_settings
+from ..dependencies import get_async_vault
+from .http_cache import document_etag, directory_etag, validator_headers, is_not_modified, version_from_etag
+from .responses import FastJSONResponse, dumps
 
 
 vault_router = APIRouter()
+
+# Paginated listings (?limit=/?cursor=)
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# Line windows (?format=lines)
+DEFAULT_LINE_COUNT = 200
+MAX_LINE_COUNT = 5000
 # First define all exception handlers
 # def handle_vault_error(func):
 #     async def wrapper(*args, **kwargs):
@@ -25,11 +39,11 @@ vault_router = APIRouter()
 #             raise HTTPException(status_code=400, detail=str(e))
 #     return wrapper
 
-from fastapi import Request, HTTPException
+from fastapi import Request, Response, HTTPException
 from fastapi.responses import JSONResponse
 
-async def vault_exception_handler(request: Request, exc: Exception):
-    """Handles Vault-related exceptions and returns appropriate HTTP responses."""
+def vault_error_status(exc: Exception) -> Tuple[int, str]:
+    """Maps a Vault-related exception to an HTTP status code and detail."""
     if isinstance(exc, PathNotFoundError):
         status_code, detail = 404, "File not found"
     elif isinstance(exc, UnsupportedFileTypeError):
@@ -38,63 +52,211 @@ async def vault_exception_handler(request: Request, exc: Exception):
         status_code, detail = 403, "Invalid path"
     elif isinstance(exc, FileExistsError):
         status_code, detail = 409, str(exc)
+    elif isinstance(exc, VersionConflictError):
+        status_code, detail = 409, str(exc)
     elif isinstance(exc, VaultError):
         status_code, detail = 400, str(exc)
     else:
         status_code, detail = 500, "Internal Server Error"
+    return status_code, detail
+
+async def vault_exception_handler(request: Request, exc: Exception):
+    """Handles Vault-related exceptions and returns appropriate HTTP responses."""
+    status_code, detail = vault_error_status(exc)
 
     return JSONResponse(status_code=status_code, content={"detail": detail})
 
 
+class ListingParams:
+    """Pagination query parameters; a listing is paginated once limit or cursor is given."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        sort: str = Query("name", pattern="^-?(name|modified|size)$"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+async def _list_directory(request: Request, vault: AsyncVaultManager, path: str, max_depth: Optional[int], page: ListingParams) -> Response:
+    if page.paginated:
+        return FastJSONResponse(await vault.list_page(path, limit=page.limit or DEFAULT_PAGE_SIZE, cursor=page.cursor, sort=page.sort))
+    return await _list_directory_conditional(request, vault, path, max_depth)
+
+async def _list_directory_conditional(request: Request, vault: AsyncVaultManager, path: str, max_depth: Optional[int]) -> Response:
+    fingerprint, newest = await vault.directory_fingerprint(path, max_depth=max_depth)
+    headers = validator_headers(directory_etag(fingerprint), newest)
+    if is_not_modified(request, headers["ETag"], newest):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(await vault.list_directory(path, max_depth=max_depth), headers=headers)
+
+RAW_MEDIA_TYPES = {".md": "text/markdown; charset=utf-8", ".chat": "text/plain; charset=utf-8"}
+
+def _wants_raw(request: Request, format: Optional[str]) -> bool:
+    if format is not None:
+        return format == "raw"
+    accept = request.headers.get("accept", "")
+    return accept.startswith(("text/markdown", "text/plain"))
+
+def _raw_document(location: Path, key: str, entry: EntryMeta, headers: Dict[str, str]) -> Response:
+    """The document's bytes as the body, with its metadata in headers.
+
+    Streamed from disk (zero-copy where the server supports pathsend)
+    rather than read into memory, with single and multiple byte ranges
+    (206 Partial Content) and If-Range against the document's ETag.
+    """
+    return FileResponse(
+        location,
+        media_type=RAW_MEDIA_TYPES.get(location.suffix, "text/plain; charset=utf-8"),
+        headers={
+            **headers,
+            "X-Document-Path": key,
+            "X-Created-At": repr(entry.created_at),
+            "X-Modified-At": repr(entry.modified_at),
+        },
+    )
+
+
 # Then our routes become much cleaner
 # @handle_vault_error
 @vault_router.get("")
-def get_root(
+async def get_root(
+    request: Request,
     max_depth: Optional[int] = None,
-    settings: Settings = Depends(get_settings)
+    page: ListingParams = Depends(),
+    vault: AsyncVaultManager = Depends(get_async_vault)
 ):
-    vault = VaultManager(settings.vault_dir)
-    return vault.list_directory("", max_depth=max_depth)
+    return await _list_directory(request, vault, "", max_depth, page)
 
 # @handle_vault_error
 @vault_router.get("/{path:path}")
-def get_path(
+async def get_path(
     path: str,
+    request: Request,
     max_depth: Optional[int] = None,
-    settings: Settings = Depends(get_settings)
+    format: Optional[str] = Query(None, pattern="^(json|raw|lines)$"),
+    start: int = Query(0, ge=0),
+    count: int = Query(DEFAULT_LINE_COUNT, ge=1, le=MAX_LINE_COUNT),
+    page: ListingParams = Depends(),
+    vault: AsyncVaultManager = Depends(get_async_vault)
 ):
-    vault = VaultManager(settings.vault_dir)
-    print("GETTING PATH")
+    """Get a document or list a directory.
+
+    Documents are JSON by default; with ?format=raw (or an Accept header
+    preferring text/markdown or text/plain) the body is the document itself,
+    streamed with Range support, and its metadata moves to headers. With
+    ?format=lines&start=&count= only that window of lines is returned,
+    with the document's total line count, for paging through huge files.
+    """
+    # Validators come from metadata alone, so a matching client gets its 304
+    # without the document being read or the tree being serialized
     try:
-        return vault.get_document(path)
+        entry = await vault.get_entry(path)
     except PathNotFoundError:
-        return vault.list_directory(path, max_depth=max_depth)
+        entry = None
+
+    if entry is not None and entry.type == "file":
+        representation = "lines" if format == "lines" else "raw" if _wants_raw(request, format) else ""
+        headers = validator_headers(document_etag(entry, representation), entry.modified_at)
+        headers["Vary"] = "Accept"
+        if is_not_modified(request, headers["ETag"], entry.modified_at):
+            return Response(status_code=304, headers=headers)
+        if representation == "lines":
+            return FastJSONResponse(await vault.read_lines(path, start=start, count=count), headers=headers)
+        if representation == "raw":
+            location = await vault.document_location(path)
+            return _raw_document(location, str(location.relative_to(vault.vault.vault_dir)), entry, headers)
+        return FastJSONResponse(await vault.get_document(path), headers=headers)
+
+    if entry is None:
+        raise PathNotFoundError(f"File {path} not found")
+    return await _list_directory(request, vault, path, max_depth, page)
 
 # @handle_vault_error
 @vault_router.post("/files/{file_path:path}")
-def create_file(
+async def create_file(
     file_path: str,
     content: str = Body("", media_type="text/plain"),
-    settings: Settings = Depends(get_settings)
+    vault: AsyncVaultManager = Depends(get_async_vault)
 ):
-    vault = VaultManager(settings.vault_dir)
-    return vault.create_file(file_path, content)
+    return await vault.create_file(file_path, content)
 
 # @handle_vault_error
 @vault_router.post("/directories/{dir_path:path}")
-def create_directory(
+async def create_directory(
     dir_path: str,
-    settings: Settings = Depends(get_settings)
+    vault: AsyncVaultManager = Depends(get_async_vault)
 ):
-    vault = VaultManager(settings.vault_dir)
-    return vault.create_directory(dir_path)
+    return await vault.create_directory(dir_path)
 
 # @handle_vault_error
 @vault_router.put("/files/{file_path:path}")
-def update_file(
+async def update_file(
     file_path: str,
     content: str = Body("", media_type="text/plain"),
-    settings: Settings = Depends(get_settings)
+    vault: AsyncVaultManager = Depends(get_async_vault)
+):
+    return await vault.update_file(file_path, content)
+
+class SpliceModel(BaseModel):
+    offset: int = Field(ge=0, description="UTF-8 byte offset into the base document")
+    length: int = Field(0, ge=0, description="Number of bytes to replace")
+    text: str = ""
+
+class PatchRequest(BaseModel):
+    base: Optional[str] = Field(None, description="ETag of the document the splices were made against")
+    splices: List[SpliceModel]
+
+# @handle_vault_error
+@vault_router.patch("/files/{file_path:path}")
+async def patch_file(
+    file_path: str,
+    patch: PatchRequest,
+    if_match: Optional[str] = Header(None),
+    vault: AsyncVaultManager = Depends(get_async_vault)
 ):
-    vault = VaultManager(settings.vault_dir)
-    return vault.update_file(file_path, content)
\ No newline at end of file
+    """Apply splices to a document. The base version comes from If-Match or
+    the body's `base`; a stale base is rejected with 409."""
+    base = if_match or patch.base
+    if base is None:
+        raise HTTPException(status_code=428, detail="A base version is required (If-Match or base)")
+    splices = [splice.model_dump() for splice in patch.splices]
+    info = await vault.patch_file(file_path, splices, version_from_etag(base))
+    entry = await vault.get_entry(file_path)
+    return FastJSONResponse(info, headers={"ETag": document_etag(entry)})
+
+MAX_BATCH_PATHS = 256
+
+class BatchRequest(BaseModel):
+    paths: List[str] = Field(max_length=MAX_BATCH_PATHS)
+
+async def _batch_results(vault: AsyncVaultManager, paths: List[str]) -> AsyncIterator[bytes]:
+    async def fetch(path: str) -> dict:
+        try:
+            return {"path": path, "status": 200, "document": await vault.get_document(path)}
+        except Exception as exc:
+            status_code, detail = vault_error_status(exc)
+            return {"path": path, "status": status_code, "detail": detail}
+
+    for result in asyncio.as_completed([fetch(path) for path in dict.fromkeys(paths)]):
+        yield dumps(await result) + b"\n"
+
+# @handle_vault_error
+@vault_router.post("/batch")
+async def get_documents(
+    batch: BatchRequest,
+    vault: AsyncVaultManager = Depends(get_async_vault)
+):
+    """Fetch many documents in one round trip.
+
+    Reads run concurrently and each result is streamed as a JSON line as
+    soon as it's ready, in completion order. Every line carries the path
+    and a per-item status; failures have a detail instead of a document.
+    """
+    return StreamingResponse(_batch_results(vault, batch.paths), media_type="application/x-ndjson")
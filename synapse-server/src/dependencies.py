@@ -0,0 +1,207 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from fastapi import Depends, HTTPException
+
+from .settings import Settings, get_settings
+from .llm import load_embedder
+from .repositories.metadata_index import MetadataIndex
+from .repositories.search import SearchIndex
+from .repositories.vault import VaultManager, WritePipeline
+from .repositories.content_cache import ContentCache
+from .repositories.async_vault import AsyncVaultManager
+from .repositories.changes import ChangeFeed
+from .repositories.history import HistoryStore
+from .repositories.chat import ChatLog
+from .repositories.links import LinkGraph
+from .repositories.coherence import WorkerCoordinator
+from .repositories.catalog import Catalog
+from .repositories.quickopen import PathIndex
+from .repositories.embeddings import EmbeddingIndex
+from .repositories.markdown_cache import MarkdownCache
+
+
+@lru_cache
+def metadata_index_for(vault_dir: Path) -> MetadataIndex:
+    """One shared MetadataIndex per vault directory for the whole process."""
+    return MetadataIndex(vault_dir)
+
+@lru_cache
+def search_index_for(vault_dir: Path) -> SearchIndex:
+    """One shared SearchIndex per vault, fed by the metadata index's invalidations."""
+    index = SearchIndex(vault_dir)
+    metadata_index_for(vault_dir).subscribe(index.mark_dirty)
+    return index
+
+@lru_cache
+def catalog_for(vault_dir: Path) -> Catalog:
+    """One shared persistent catalog per vault, following the metadata index's changes."""
+    catalog = Catalog(vault_dir)
+    metadata_index_for(vault_dir).on_change(catalog.apply_change)
+    return catalog
+
+@lru_cache
+def worker_coordinator_for(vault_dir: Path) -> WorkerCoordinator:
+    """This worker's link to the other workers serving the vault.
+
+    Only the leader writes the shared catalog; it learns about the other
+    workers' writes through their invalidations.
+    """
+    catalog = catalog_for(vault_dir)
+    catalog.read_only = True
+
+    def lead() -> None:
+        catalog.read_only = False
+        seed_index_from_catalog(vault_dir)
+
+    return WorkerCoordinator(metadata_index_for(vault_dir), build=lead)
+
+@lru_cache
+def link_graph_for(vault_dir: Path) -> LinkGraph:
+    """One shared link graph per vault, fed by the metadata index's invalidations."""
+    graph = LinkGraph(vault_dir)
+    metadata_index_for(vault_dir).subscribe(graph.mark_dirty)
+    return graph
+
+@lru_cache
+def quick_open_for(vault_dir: Path) -> PathIndex:
+    """One shared quick-open path index per vault, fed by the metadata index's changes."""
+    return PathIndex(metadata_index_for(vault_dir))
+
+@lru_cache
+def embedding_index_for(vault_dir: Path, model: str) -> EmbeddingIndex:
+    """One shared embedding index per vault and model, fed by the metadata
+    index's invalidations and hashed with the catalog."""
+    embeddings = EmbeddingIndex(vault_dir, load_embedder(model), hash_of=catalog_for(vault_dir).content_hash)
+    metadata_index_for(vault_dir).subscribe(embeddings.mark_dirty)
+    return embeddings
+
+@lru_cache
+def markdown_cache_for(vault_dir: Path) -> MarkdownCache:
+    """One shared markdown summary cache per vault, fed by the metadata index's invalidations."""
+    cache = MarkdownCache(vault_dir)
+    metadata_index_for(vault_dir).subscribe(cache.invalidate)
+    return cache
+
+@lru_cache
+def change_feed_for(vault_dir: Path) -> ChangeFeed:
+    """One shared change feed per vault, fed by the metadata index."""
+    return ChangeFeed(metadata_index_for(vault_dir))
+
+@lru_cache
+def history_store_for(vault_dir: Path) -> HistoryStore:
+    """One shared version history per vault."""
+    return HistoryStore(vault_dir)
+
+@lru_cache
+def write_pipeline_for(vault_dir: Path, group_commit_ms: float = 0) -> WritePipeline:
+    """One shared WritePipeline per vault, so concurrent writes can coalesce."""
+    return WritePipeline(vault_dir, group_commit_window=group_commit_ms / 1000 or None)
+
+@lru_cache
+def content_cache_for(vault_dir: Path, max_bytes: int) -> ContentCache:
+    """One shared document content cache per vault."""
+    return ContentCache(max_bytes)
+
+@lru_cache
+def io_executor_for(workers: int) -> ThreadPoolExecutor:
+    """Shared executor for blocking vault I/O, separate from Starlette's threadpool."""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vault-io")
+
+async def get_metadata_index(settings: Settings = Depends(get_settings)) -> MetadataIndex:
+    return metadata_index_for(settings.vault_dir)
+
+async def get_search_index(settings: Settings = Depends(get_settings)) -> SearchIndex:
+    return search_index_for(settings.vault_dir)
+
+def seed_index_from_catalog(vault_dir: Path) -> None:
+    """Load the metadata index from the reconciled catalog instead of walking the vault.
+
+    Directories reconcile confirmed unchanged are served as they are, so
+    only the ones it had to list are scanned again. Files all start out
+    stale and are stat'ed once on first lookup: one edited in place while
+    the server was down doesn't change its directory's mtime, and its
+    cached size and mtime would otherwise back stale ETags.
+    """
+    catalog = catalog_for(vault_dir)
+    catalog.reconcile()
+    entries = list(catalog.entries())
+    stale = catalog.listed_directories()
+    stale.update(key for key, meta in entries if meta.type == "file")
+    metadata_index_for(vault_dir).load(entries, stale=stale)
+
+async def get_catalog(settings: Settings = Depends(get_settings)) -> Catalog:
+    return catalog_for(settings.vault_dir)
+
+async def get_link_graph(settings: Settings = Depends(get_settings)) -> LinkGraph:
+    return link_graph_for(settings.vault_dir)
+
+async def get_quick_open(settings: Settings = Depends(get_settings)) -> PathIndex:
+    return quick_open_for(settings.vault_dir)
+
+async def get_embedding_index(settings: Settings = Depends(get_settings)) -> EmbeddingIndex:
+    if not settings.embedding_model:
+        raise HTTPException(status_code=404, detail="Embeddings are disabled")
+    return embedding_index_for(settings.vault_dir, settings.embedding_model)
+
+async def get_markdown_cache(settings: Settings = Depends(get_settings)) -> MarkdownCache:
+    return markdown_cache_for(settings.vault_dir)
+
+async def get_change_feed(settings: Settings = Depends(get_settings)) -> ChangeFeed:
+    return change_feed_for(settings.vault_dir)
+
+async def get_history_store(settings: Settings = Depends(get_settings)) -> HistoryStore:
+    if not settings.history_enabled:
+        raise HTTPException(status_code=404, detail="History is disabled")
+    return history_store_for(settings.vault_dir)
+
+@lru_cache
+def vault_manager_for(vault_dir: Path, group_commit_ms: float, content_cache_bytes: int, path_cache_size: int, history: bool, embedding_model: str, process_locks: bool = False) -> VaultManager:
+    """One long-lived VaultManager per vault and configuration."""
+    listeners = [
+        search_index_for(vault_dir).document_written,
+        link_graph_for(vault_dir).document_written,
+        catalog_for(vault_dir).document_written,
+        markdown_cache_for(vault_dir).document_written,
+    ]
+    rewrite_listeners = []
+    if history:
+        listeners.append(history_store_for(vault_dir).document_written)
+        rewrite_listeners.append(history_store_for(vault_dir).preserve)
+    if embedding_model:
+        listeners.append(embedding_index_for(vault_dir, embedding_model).document_written)
+    return VaultManager(
+        vault_dir,
+        index=metadata_index_for(vault_dir),
+        listeners=listeners,
+        writer=write_pipeline_for(vault_dir, group_commit_ms),
+        cache=content_cache_for(vault_dir, content_cache_bytes) if content_cache_bytes else None,
+        path_cache_size=path_cache_size,
+        rewrite_listeners=rewrite_listeners,
+        process_locks=process_locks,
+    )
+
+def vault_for(settings: Settings) -> VaultManager:
+    """The VaultManager wired to the vault's shared index, caches and writer."""
+    return vault_manager_for(
+        settings.vault_dir,
+        settings.group_commit_ms,
+        settings.content_cache_bytes,
+        settings.path_cache_size,
+        settings.history_enabled,
+        settings.embedding_model,
+        settings.worker_coherence,
+    )
+
+async def get_vault(settings: Settings = Depends(get_settings)) -> VaultManager:
+    return vault_for(settings)
+
+async def get_chat_log(vault: VaultManager = Depends(get_vault)) -> ChatLog:
+    return ChatLog(vault)
+
+async def get_async_vault(
+    settings: Settings = Depends(get_settings),
+    vault: VaultManager = Depends(get_vault),
+) -> AsyncVaultManager:
+    return AsyncVaultManager(vault, io_executor_for(settings.io_workers))
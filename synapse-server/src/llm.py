@@ -0,0 +1,89 @@
+import hashlib
+import importlib
+import math
+import re
+from array import array
+from typing import Callable, Dict, List, Protocol, Sequence
+
+class Embedder(Protocol):
+    """A local text embedding model.
+
+    `name` identifies the model and its parameters: stored vectors made by a
+    different name are discarded. Vectors are L2-normalized (or all zero for
+    text with no features) and `dim` long.
+    """
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> List[array]:
+        ...
+
+TOKEN_RE = re.compile(r"[^\W_]{2,}")
+
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being below between both but by
+can did do does doing down during each few for from further had has have having he her here hers him his how
+if in into is it its itself just me more most my no nor not now of off on once only or other our ours out over
+own same she should so some such than that the their theirs them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with you your yours
+""".split())
+
+class HashedTfidfEmbedder:
+    """Deterministic, offline bag-of-words embedding (the "hashing trick").
+
+    Unigrams and bigrams are hashed (with a stable hash, so every process
+    agrees) into `dim` signed buckets, weighted by sublinear term frequency
+    (1 + log tf). Inverse document frequency depends on the whole vault, so
+    it isn't baked into document vectors - they would all go stale with
+    every write - but applied to queries by the index, from per-bucket
+    document counts.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashed-tfidf-{dim}"
+        self._buckets: Dict[str, int] = {}
+
+    def _bucket(self, feature: str) -> int:
+        """Signed bucket: index + 1, negated for half of the features."""
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            bucket = (value >> 1) % self.dim + 1
+            bucket = -bucket if value & 1 else bucket
+            if len(self._buckets) < 1 << 18:
+                self._buckets[feature] = bucket
+        return bucket
+
+    def _vector(self, text: str) -> array:
+        tokens = [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+        counts: Dict[str, int] = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector = [0.0] * self.dim
+        for feature, count in counts.items():
+            bucket = self._bucket(feature)
+            weight = 1.0 + math.log(count)
+            if bucket > 0:
+                vector[bucket - 1] += weight
+            else:
+                vector[-bucket - 1] -= weight
+        norm = math.sqrt(sum(value * value for value in vector))
+        return array("f", [value / norm for value in vector] if norm else vector)
+
+    def embed(self, texts: Sequence[str]) -> List[array]:
+        return [self._vector(text) for text in texts]
+
+EMBEDDERS: Dict[str, Callable[[], Embedder]] = {
+    "hashed-tfidf": HashedTfidfEmbedder,
+}
+
+def load_embedder(spec: str) -> Embedder:
+    """An embedder by registered name, or "package.module:factory" for any
+    other local model (called without arguments)."""
+    if spec in EMBEDDERS:
+        return EMBEDDERS[spec]()
+    module, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown embedding model {spec!r}")
+    return getattr(importlib.import_module(module), attribute)()
@@ -1,21 +1,97 @@
 import os
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Union, Dict, Optional
 from pathlib import Path
 
+import anyio.to_thread
 from fastapi import FastAPI, APIRouter, HTTPException, Body, Depends
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.staticfiles import StaticFiles
 
-from .settings import get_settings
+from .settings import Settings, get_settings
+from .dependencies import catalog_for, seed_index_from_catalog, metadata_index_for, search_index_for, link_graph_for, quick_open_for, embedding_index_for, worker_coordinator_for, change_feed_for, history_store_for, io_executor_for, write_pipeline_for, content_cache_for
+from .metrics import REGISTRY, Gauge, MetricsMiddleware, SlowRequestProfiler
+from .api.compression import CompressionMiddleware
+from .api.responses import FastJSONResponse
+from .repositories.metadata_index import VaultWatcher, META_DIR
 
 from .api.vault_router import vault_router, VaultError, vault_exception_handler
+from .api.tree_router import tree_router
+from .api.search_router import search_router
+from .api.changes_router import changes_router
+from .api.history_router import history_router
+from .api.chat_router import chat_router
+from .api.links_router import links_router
+from .api.catalog_router import catalog_router
+from .api.quickopen_router import quickopen_router
+from .api.semantic_router import semantic_router
+from .api.archive_router import archive_router
+from .api.markdown_router import markdown_router
 
-app = FastAPI(docs_url=None)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the vault metadata index once and keep it current from disk events
+    settings = get_settings()
+    write_pipeline_for(settings.vault_dir, settings.group_commit_ms).cleanup()
+    index = metadata_index_for(settings.vault_dir)
+    change_feed_for(settings.vault_dir)
+    catalog_for(settings.vault_dir)
+    coordinator = None
+    if settings.worker_coherence:
+        # One of several workers: share the leader's index, follow its watcher
+        coordinator = worker_coordinator_for(settings.vault_dir)
+        coordinator.start()
+    else:
+        # Cold start from the persistent catalog: only changed directories are listed
+        seed_index_from_catalog(settings.vault_dir)
+    watcher = None
+    if coordinator is None or coordinator.is_leader:
+        watcher = VaultWatcher(index, poll_interval=settings.watch_poll_interval)
+        watcher.start()
+        # Catch the search index up with edits made while the server was down
+        threading.Thread(target=search_index_for(settings.vault_dir).reconcile, daemon=True).start()
+        if settings.history_enabled:
+            # Keep history bounded: apply the retention policy once per start
+            threading.Thread(target=history_store_for(settings.vault_dir).gc, daemon=True).start()
+        if settings.embedding_model:
+            # Embed documents that are new or changed since the last run
+            threading.Thread(target=embedding_index_for(settings.vault_dir, settings.embedding_model).reconcile, daemon=True).start()
+    else:
+        search_index_for(settings.vault_dir).assume_reconciled()
+    threading.Thread(target=link_graph_for(settings.vault_dir).reconcile, daemon=True).start()
+    threading.Thread(target=quick_open_for(settings.vault_dir).warm, daemon=True).start()
+    if settings.profile_slow_ms:
+        app.state.profiler = SlowRequestProfiler(settings.profile_slow_ms / 1000, settings.vault_dir / META_DIR / "profiles")
+    yield
+    if watcher is not None:
+        watcher.stop()
+    if coordinator is not None:
+        coordinator.stop()
+    if getattr(app.state, "profiler", None) is not None:
+        app.state.profiler.stop()
+        app.state.profiler = None
+    io_executor_for(settings.io_workers).shutdown()
+
+app = FastAPI(docs_url=None, lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+app.add_middleware(MetricsMiddleware)
 
 app.mount("/static", StaticFiles(directory="public"), name="static")
 app.include_router(vault_router, prefix="/api/v1/d", dependencies=[Depends(get_settings)])
+app.include_router(tree_router, prefix="/api/v1/tree", dependencies=[Depends(get_settings)])
+app.include_router(search_router, prefix="/api/v1/search", dependencies=[Depends(get_settings)])
+app.include_router(changes_router, prefix="/api/v1/changes", dependencies=[Depends(get_settings)])
+app.include_router(history_router, prefix="/api/v1/history", dependencies=[Depends(get_settings)])
+app.include_router(chat_router, prefix="/api/v1/chat", dependencies=[Depends(get_settings)])
+app.include_router(links_router, prefix="/api/v1/links", dependencies=[Depends(get_settings)])
+app.include_router(catalog_router, prefix="/api/v1/catalog", dependencies=[Depends(get_settings)])
+app.include_router(quickopen_router, prefix="/api/v1/quickopen", dependencies=[Depends(get_settings)])
+app.include_router(semantic_router, prefix="/api/v1/semantic", dependencies=[Depends(get_settings)])
+app.include_router(archive_router, prefix="/api/v1/archive", dependencies=[Depends(get_settings)])
+app.include_router(markdown_router, prefix="/api/v1/markdown", dependencies=[Depends(get_settings)])
 app.add_exception_handler(VaultError, vault_exception_handler)
 
 @app.get("/")
@@ -30,6 +106,47 @@ async def health_check() -> Dict[str, str]:
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(settings: Settings = Depends(get_settings)) -> PlainTextResponse:
+    """Prometheus text exposition of request, vault I/O and pool metrics."""
+    executor = io_executor_for(settings.io_workers)
+    limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+    pipeline = write_pipeline_for(settings.vault_dir, settings.group_commit_ms)
+    gauges = [
+        Gauge("synapse_io_queue_depth", "Vault I/O jobs waiting for an executor thread", executor._work_queue.qsize),
+        Gauge("synapse_io_threads", "Vault I/O executor threads started", lambda: len(executor._threads)),
+        Gauge("synapse_threadpool_borrowed", "Starlette threadpool tokens in use", lambda: limiter.borrowed_tokens),
+        Gauge("synapse_threadpool_waiting", "Tasks waiting for a Starlette threadpool token", lambda: limiter.tasks_waiting),
+        Gauge("synapse_writes_durable", "Whole-file writes made durable", lambda: pipeline.writes),
+        Gauge("synapse_writes_coalesced", "Writes superseded by a newer pending write", lambda: pipeline.coalesced),
+    ]
+    if settings.content_cache_bytes:
+        cache = content_cache_for(settings.vault_dir, settings.content_cache_bytes)
+        gauges += [
+            Gauge("synapse_content_cache_hits", "Content cache hits", lambda: cache.hits),
+            Gauge("synapse_content_cache_misses", "Content cache misses", lambda: cache.misses),
+            Gauge("synapse_content_cache_bytes", "Bytes of decoded content held", lambda: cache.current_bytes),
+            Gauge("synapse_content_cache_evictions", "Content cache entries evicted to stay under the byte limit", lambda: cache.evictions),
+        ]
+    if settings.history_enabled:
+        history = history_store_for(settings.vault_dir)
+        gauges.append(Gauge("synapse_history_pending", "Saves waiting to be recorded in the version history", lambda: history.pending))
+    if settings.embedding_model:
+        embeddings = embedding_index_for(settings.vault_dir, settings.embedding_model)
+        gauges += [
+            Gauge("synapse_embeddings_pending", "Documents waiting to be (re-)embedded", lambda: embeddings.pending),
+            Gauge("synapse_embeddings_computed", "Documents embedded by the model", lambda: embeddings.embedded),
+            Gauge("synapse_embeddings_reused", "Documents given the stored vector of identical content", lambda: embeddings.reused),
+        ]
+    if settings.worker_coherence:
+        bus = worker_coordinator_for(settings.vault_dir).bus
+        gauges += [
+            Gauge("synapse_invalidations_sent", "Invalidation datagrams sent to other workers", lambda: bus.sent),
+            Gauge("synapse_invalidations_received", "Invalidation datagrams received from other workers", lambda: bus.received),
+        ]
+    body = REGISTRY.render() + "".join(line + "\n" for gauge in gauges for line in gauge.render())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 # Override Swagger UI
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui():
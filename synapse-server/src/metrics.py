@@ -0,0 +1,290 @@
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, optionally labelled."""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self.buckets = buckets
+        # per label set: [count per bucket (+Inf last)], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "synapse_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"),
+))
+VAULT_OPERATION_LATENCY = REGISTRY.register(Histogram(
+    "synapse_vault_operation_duration_seconds", "VaultManager operation latency", ("operation",),
+))
+VAULT_BYTES_READ = REGISTRY.register(Counter("synapse_vault_bytes_read_total", "Document bytes read from disk"))
+VAULT_BYTES_WRITTEN = REGISTRY.register(Counter("synapse_vault_bytes_written_total", "Document bytes written to disk"))
+ARCHIVE_BYTES_EXPORTED = REGISTRY.register(Counter("synapse_archive_bytes_exported_total", "Document bytes streamed into exported archives"))
+ARCHIVE_BYTES_IMPORTED = REGISTRY.register(Counter("synapse_archive_bytes_imported_total", "Document bytes unpacked from imported archives"))
+
+
+def timed(operation: str):
+    """Time a vault operation (stat, read, write, tree_walk, ...)."""
+    return VAULT_OPERATION_LATENCY.time(operation)
+
+
+class SlowRequestProfiler:
+    """Opt-in sampling profiler that keeps stacks only for slow requests.
+
+    While requests are in flight, a background thread samples every
+    thread's stack at `interval`. When a request finishes slower than
+    `threshold`, the samples taken during it are written to `output_dir`
+    in collapsed-stack format ("frame;frame;frame count"), which
+    flamegraph.pl, speedscope and inferno read directly. Streams (server-
+    sent events) are long by design: request_streaming() stops counting
+    them once their response starts.
+    """
+
+    def __init__(self, threshold: float, output_dir: Path, interval: float = 0.005, max_samples: int = 20000):
+        self.threshold = threshold
+        self.output_dir = output_dir
+        self.interval = interval
+        self._samples: List[Tuple[float, Tuple[str, ...]]] = []
+        self._max_samples = max_samples
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _stack(frame) -> Tuple[str, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            if self._stopped:
+                return
+            now = time.perf_counter()
+            stacks = [self._stack(frame) for ident, frame in sys._current_frames().items() if ident != me]
+            with self._lock:
+                self._samples.extend((now, stack) for stack in stacks)
+                if len(self._samples) > self._max_samples:
+                    del self._samples[: len(self._samples) - self._max_samples]
+            time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._active += 1
+            self._wake.set()
+
+    def _release(self) -> None:
+        self._active -= 1
+        if self._active == 0:
+            self._wake.clear()
+
+    def request_streaming(self) -> None:
+        """Stop sampling for a started request whose response is a stream; don't finish it."""
+        with self._lock:
+            self._release()
+
+    def request_finished(self, label: str, start: float, end: float) -> Optional[Path]:
+        """Account for a finished request and dump its stacks if it was slow.
+
+        Writes a file for slow requests, so call it off the event loop then.
+        """
+        with self._lock:
+            self._release()
+            if end - start < self.threshold:
+                if self._active == 0:
+                    self._samples.clear()
+                return None
+            window = [stack for at, stack in self._samples if start <= at <= end]
+        if not window:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_")
+        path = self.output_dir / f"{int(time.time() * 1000)}-{safe_label}-{int((end - start) * 1000)}ms.folded"
+        tally = _Tally(";".join(stack) for stack in window)
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in tally.most_common()))
+        logger.warning("Slow request %s took %.0f ms; stacks written to %s", label, (end - start) * 1000, path)
+        return path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency.
+
+    Requests are labelled with the matched route template rather than the
+    raw path, so /api/v1/d/{path:path} is one series however many
+    documents are fetched. If the app has a SlowRequestProfiler in
+    app.state.profiler, requests are reported to it as well.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+        profiler = getattr(scope["app"].state, "profiler", None) if "app" in scope else None
+
+        async def send_wrapper(message):
+            nonlocal profiler
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                content_type = dict(message.get("headers", ())).get(b"content-type", b"")
+                if profiler is not None and content_type.startswith(b"text/event-stream"):
+                    # A change feed stays open for as long as the client
+                    # listens; it isn't a slow request
+                    profiler.request_streaming()
+                    profiler = None
+            await send(message)
+
+        if profiler is not None:
+            profiler.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(end - start, scope["method"], route_path, str(status["code"]))
+            if profiler is not None:
+                label = f"{scope['method']} {scope['path']}"
+                if end - start < profiler.threshold:
+                    profiler.request_finished(label, start, end)
+                else:
+                    # Dumping the stacks writes a file
+                    await anyio.to_thread.run_sync(profiler.request_finished, label, start, end)
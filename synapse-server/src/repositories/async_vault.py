@@ -0,0 +1,68 @@
+# async_vault.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Tuple, TypeVar, Union
+
+from .vault import VaultManager, FileInfo, DirectoryInfo, LineWindow, ListingPage, Splice
+from .metadata_index import EntryMeta
+
+T = TypeVar("T")
+
+class AsyncVaultManager:
+    """Async twin of VaultManager.
+
+    Every blocking filesystem call runs on a dedicated, bounded executor
+    instead of Starlette's shared threadpool, so slow disk I/O under
+    autosave bursts can't starve unrelated requests. Only max_workers
+    operations touch the disk at once; the rest wait on the event loop
+    without holding a thread.
+    """
+
+    def __init__(self, vault: VaultManager, executor: ThreadPoolExecutor):
+        """Initialize the AsyncVaultManager.
+
+        Args:
+            vault: Synchronous manager doing the actual work
+            executor: Bounded executor the blocking calls run on
+        """
+        self.vault = vault
+        self.executor = executor
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get_document(self, document_path: str) -> FileInfo:
+        return await self._run(self.vault.get_document, document_path)
+
+    async def document_location(self, document_path: str) -> Path:
+        return await self._run(self.vault.document_location, document_path)
+
+    async def read_lines(self, document_path: str, start: int = 0, count: int = 100) -> LineWindow:
+        return await self._run(self.vault.read_lines, document_path, start=start, count=count)
+
+    async def list_directory(self, dir_path: str = "", max_depth: Optional[int] = None) -> DirectoryInfo:
+        return await self._run(self.vault.list_directory, dir_path, max_depth=max_depth)
+
+    async def list_page(self, dir_path: str = "", limit: int = 100, cursor: Optional[str] = None, sort: str = "name") -> ListingPage:
+        return await self._run(self.vault.list_page, dir_path, limit=limit, cursor=cursor, sort=sort)
+
+    async def get_entry(self, relative_path: str) -> EntryMeta:
+        return await self._run(self.vault.get_entry, relative_path)
+
+    async def directory_fingerprint(self, dir_path: str = "", max_depth: Optional[int] = None) -> Tuple[str, float]:
+        return await self._run(self.vault.directory_fingerprint, dir_path, max_depth=max_depth)
+
+    async def create_file(self, file_path: str, content: str) -> FileInfo:
+        return await self._run(self.vault.create_file, file_path, content)
+
+    async def create_directory(self, dir_path: str) -> DirectoryInfo:
+        return await self._run(self.vault.create_directory, dir_path)
+
+    async def update_file(self, file_path: str, content: str) -> FileInfo:
+        return await self._run(self.vault.update_file, file_path, content)
+
+    async def patch_file(self, file_path: str, splices: Sequence[Splice], base_version: str) -> FileInfo:
+        return await self._run(self.vault.patch_file, file_path, splices, base_version)
@@ -0,0 +1,406 @@
+# catalog.py
+import base64
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, TypedDict, Union
+
+from .metadata_index import META_DIR, ROOT_KEY, EntryMeta, IndexChange, _join, _parent, meta_from_stat
+from .vault import InvalidCursorError, VaultError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    modified_at REAL NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT,  -- sha256 of a file's content, NULL until known
+    scanned_ns INTEGER  -- directories: mtime_ns when reconcile last listed it
+);
+CREATE INDEX IF NOT EXISTS entries_by_parent ON entries(parent, path);
+CREATE INDEX IF NOT EXISTS entries_by_modified ON entries(modified_at, path);
+CREATE INDEX IF NOT EXISTS entries_by_size ON entries(size, path);
+"""
+
+CATALOG_SORTS = {"path": "path", "modified": "modified_at", "size": "size"}
+
+# Index changes applied per transaction by the background writer
+CHANGE_BATCH_SIZE = 512
+
+class CatalogEntry(TypedDict):
+    path: str
+    type: str
+    size: int
+    created_at: float
+    modified_at: float
+    hash: Optional[str]
+
+class CatalogPage(TypedDict):
+    entries: List[CatalogEntry]
+    next_cursor: Optional[str]
+
+class ReconcileStats(TypedDict):
+    directories_listed: int
+    directories_skipped: int
+    entries_updated: int
+    entries_deleted: int
+
+def _subtree_bounds(key: str) -> Tuple[str, str]:
+    # "a/" <= path < "a0" covers exactly the paths below "a" ("0" follows "/")
+    return key + "/", key + "0"
+
+class Catalog:
+    """Persistent SQLite catalog of vault entries (path, type, size, times, content hash).
+
+    Kept in sync with the MetadataIndex's change notifications, which cover
+    VaultManager writes and filesystem events; they are queued and written
+    in batches by a background thread, so the index lock is never held
+    across SQLite writes. Write listener calls add the content hash of what
+    was written. Because it survives restarts, startup only has to
+    reconcile() it with disk and can seed the in-memory index from it, and
+    listings by recency or size become indexed queries.
+
+    reconcile() trusts a directory whose mtime hasn't changed since it was
+    last listed: its children are not listed or stat'ed again (only its
+    subdirectories are visited). Directory mtimes change when entries are
+    added, removed or renamed, which covers every VaultManager write but
+    not a file edited in place while the server was down, so an index
+    seeded from the catalog must still re-stat files before trusting them.
+
+    With several workers sharing the catalog, only one should write it: the
+    others set read_only, which drops their changes and stored hashes and
+    leaves reconcile() to the writer.
+    """
+
+    def __init__(self, vault_dir: Path, db_path: Optional[Path] = None):
+        self.vault_dir = vault_dir
+        self.db_path = db_path or vault_dir / META_DIR / "catalog.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._reconciled = False
+        self.read_only = False
+        # Directories the last reconcile() had to list: the only ones whose
+        # entries may have moved on since (see listed_directories)
+        self._listed: Set[str] = set()
+        self._changes: "queue.Queue[Union[IndexChange, threading.Event]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection, so queries don't serialize on writes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _abs(self, key: str) -> Path:
+        return self.vault_dir if key == ROOT_KEY else self.vault_dir / key
+
+    def _upsert(self, key: str, meta: EntryMeta, scanned_ns: Optional[int] = None) -> None:
+        # A file's hash survives only if the file is unchanged
+        self._conn.execute(
+            """
+            INSERT INTO entries(path, parent, type, size, created_at, modified_at, mtime_ns, hash, scanned_ns)
+            VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                type = excluded.type, size = excluded.size, created_at = excluded.created_at,
+                modified_at = excluded.modified_at, mtime_ns = excluded.mtime_ns,
+                hash = CASE WHEN entries.mtime_ns = excluded.mtime_ns AND entries.size = excluded.size
+                            AND entries.type = excluded.type THEN entries.hash END,
+                scanned_ns = COALESCE(excluded.scanned_ns, CASE WHEN entries.type = excluded.type THEN entries.scanned_ns END)
+            """,
+            (key, "" if key == ROOT_KEY else _parent(key), meta.type, meta.size, meta.created_at, meta.modified_at, meta.mtime_ns, scanned_ns),
+        )
+
+    def _delete_subtree(self, key: str) -> int:
+        low, high = _subtree_bounds(key)
+        return self._conn.execute(
+            "DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)", (key, low, high)
+        ).rowcount
+
+    # Index changes
+
+    def _enqueue(self, item: Union[IndexChange, threading.Event]) -> None:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="catalog-writer", daemon=True)
+                self._worker.start()
+        self._changes.put(item)
+
+    def apply_change(self, change: IndexChange) -> None:
+        """MetadataIndex change listener: queue the change to be mirrored into the catalog."""
+        if not self.read_only:
+            self._enqueue(change)
+
+    def flush(self) -> None:
+        """Wait until the changes queued so far are written."""
+        done = threading.Event()
+        self._enqueue(done)
+        done.wait()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._changes.get()]
+            while len(batch) < CHANGE_BATCH_SIZE:
+                try:
+                    batch.append(self._changes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply_changes([item for item in batch if isinstance(item, IndexChange)])
+            except Exception:
+                logger.exception("Cataloging index changes failed")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _apply_changes(self, changes: List[IndexChange]) -> None:
+        renamed_directories = []
+        with self._write_lock, self._conn:
+            for change in changes:
+                if change.previous_key is not None:
+                    self._delete_subtree(change.previous_key)
+                if change.meta is None:
+                    self._delete_subtree(change.key)
+                    continue
+                self._upsert(change.key, change.meta)
+                if change.previous_key is not None and change.meta.type == "directory":
+                    renamed_directories.append(change.key)
+        for key in renamed_directories:
+            # Renamed directories are reported as one change; pick up their contents
+            self._reconcile_from(key)
+
+    def document_written(self, relative_path: str, content: Optional[str]) -> None:
+        """VaultManager write listener: record the hash of the written content."""
+        if content is None or self.read_only:
+            return
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        try:
+            stat = self._abs(relative_path).stat()
+        except OSError:
+            return
+        with self._write_lock, self._conn:
+            self._upsert(relative_path, meta_from_stat(False, stat))
+            self._conn.execute("UPDATE entries SET hash = ? WHERE path = ?", (digest, relative_path))
+
+    def content_hash(self, relative_path: str) -> Optional[str]:
+        """SHA-256 of a file's current content, computed and stored if not known.
+
+        Returns None if the file doesn't exist.
+        """
+        path = self._abs(relative_path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        row = self._reader().execute(
+            "SELECT hash, mtime_ns, size FROM entries WHERE path = ?", (relative_path,)
+        ).fetchone()
+        if row is not None and row[0] is not None and (row[1], row[2]) == (stat.st_mtime_ns, stat.st_size):
+            return row[0]
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        if not self.read_only:
+            with self._write_lock, self._conn:
+                self._upsert(relative_path, meta_from_stat(False, stat))
+                self._conn.execute("UPDATE entries SET hash = ? WHERE path = ?", (digest.hexdigest(), relative_path))
+        return digest.hexdigest()
+
+    def _stored_children(self, key: str) -> Dict[str, Tuple[str, int, int]]:
+        rows = self._reader().execute("SELECT path, type, mtime_ns, size FROM entries WHERE parent = ?", (key,))
+        return {path: (type, mtime_ns, size) for path, type, mtime_ns, size in rows}
+
+    def _reconcile_from(self, start: str, stats: Optional[ReconcileStats] = None) -> ReconcileStats:
+        stats = stats or ReconcileStats(directories_listed=0, directories_skipped=0, entries_updated=0, entries_deleted=0)
+        # One query for the directory tree; children are only read for directories that changed
+        scanned, subdirectories = {}, {}
+        for path, parent, scanned_ns in self._reader().execute("SELECT path, parent, scanned_ns FROM entries WHERE type = 'directory'"):
+            scanned[path] = scanned_ns
+            subdirectories.setdefault(parent, []).append(path)
+        pending = [start]
+        while pending:
+            key = pending.pop()
+            try:
+                stat = self._abs(key).stat()
+            except OSError:
+                with self._write_lock, self._conn:
+                    stats["entries_deleted"] += self._delete_subtree(key)
+                continue
+            if scanned.get(key) == stat.st_mtime_ns:
+                stats["directories_skipped"] += 1
+                pending.extend(subdirectories.get(key, ()))
+                continue
+            stats["directories_listed"] += 1
+            self._listed.add(key)
+            stored = self._stored_children(key)
+            found = []
+            try:
+                with os.scandir(self._abs(key)) as it:
+                    for entry in it:
+                        if key == ROOT_KEY and entry.name == META_DIR:
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                            if not is_dir and not entry.is_file():
+                                continue
+                            found.append((_join(key, entry.name), meta_from_stat(is_dir, entry.stat())))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            with self._write_lock, self._conn:
+                for path in stored.keys() - {path for path, _ in found}:
+                    stats["entries_deleted"] += self._delete_subtree(path)
+                for path, meta in found:
+                    if stored.get(path) != (meta.type, meta.mtime_ns, meta.size):
+                        self._upsert(path, meta)
+                        stats["entries_updated"] += 1
+                # Recorded last: only a fully listed directory may be skipped next time
+                self._upsert(key, meta_from_stat(True, stat), scanned_ns=stat.st_mtime_ns)
+            pending.extend(path for path, meta in found if meta.type == "directory")
+        return stats
+
+    def reconcile(self) -> ReconcileStats:
+        """Bring the catalog in line with disk, listing only changed directories."""
+        self.flush()
+        self._listed = set()
+        stats = self._reconcile_from(ROOT_KEY)
+        self._reconciled = True
+        return stats
+
+    def listed_directories(self) -> Set[str]:
+        """Directories the last reconcile() found changed and listed.
+
+        The children of every other directory were confirmed unchanged, so
+        an index seeded right after reconcile() only needs to re-list these.
+        Files are another matter: an in-place edit doesn't touch their
+        directory's mtime.
+        """
+        return set(self._listed)
+
+    def entries(self) -> Iterator[Tuple[str, EntryMeta]]:
+        """Every cataloged entry, e.g. to seed a MetadataIndex."""
+        self.flush()
+        rows = self._reader().execute("SELECT path, type, size, created_at, modified_at, mtime_ns FROM entries")
+        make = EntryMeta._make
+        for row in rows:
+            yield row[0], make(row[1:])
+
+    def query(
+        self,
+        under: str = ROOT_KEY,
+        recursive: bool = True,
+        type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+        sort: str = "-modified",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> CatalogPage:
+        """Entries below a directory matching the filters, one page at a time.
+
+        Args:
+            under: Directory to search, relative to vault root
+            recursive: Include the whole subtree rather than direct children
+            type: "file" or "directory"
+            min_size, max_size: Size bounds in bytes (inclusive)
+            modified_after, modified_before: Modification time bounds (unix seconds, inclusive)
+            sort: "path", "modified" or "size", prefixed with "-" for descending
+            limit: Maximum entries per page
+            cursor: next_cursor of the previous page
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed or for another sort
+        """
+        if not self._reconciled and not self.read_only:
+            self.reconcile()
+        self.flush()
+        field = sort.lstrip("-")
+        if field not in CATALOG_SORTS:
+            raise VaultError(f"Unknown sort key {sort}")
+        column, descending = CATALOG_SORTS[field], sort.startswith("-")
+
+        clauses, params = [], []
+        if recursive:
+            if under == ROOT_KEY:
+                clauses.append("path != ?")
+                params.append(ROOT_KEY)
+            else:
+                clauses.append("path >= ? AND path < ?")
+                params.extend(_subtree_bounds(under))
+        else:
+            clauses.append("parent = ?")
+            params.append(under)
+        for clause, value in (
+            ("type = ?", type), ("size >= ?", min_size), ("size <= ?", max_size),
+            ("modified_at >= ?", modified_after), ("modified_at <= ?", modified_before),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if cursor is not None:
+            value, path = self._decode_cursor(cursor, sort)
+            clauses.append(f"({column}, path) {'<' if descending else '>'} (?, ?)")
+            params.extend([value, path])
+        order = "DESC" if descending else "ASC"
+        rows = self._reader().execute(
+            f"SELECT path, type, size, created_at, modified_at, hash FROM entries WHERE {' AND '.join(clauses)} "
+            f"ORDER BY {column} {order}, path {order} LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        entries = [
+            CatalogEntry(path=path, type=type, size=size, created_at=created_at, modified_at=modified_at, hash=hash)
+            for path, type, size, created_at, modified_at, hash in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = entries[-1]
+            next_cursor = self._encode_cursor(sort, {"path": last["path"], "modified_at": last["modified_at"], "size": last["size"]}[column], last["path"])
+        return CatalogPage(entries=entries, next_cursor=next_cursor)
+
+    @staticmethod
+    def _encode_cursor(sort: str, value, path: str) -> str:
+        raw = json.dumps([sort, value, path], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> tuple:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_sort, value, path = json.loads(raw)
+        except (ValueError, TypeError):
+            raise InvalidCursorError("Malformed cursor")
+        if cursor_sort != sort:
+            raise InvalidCursorError(f"Cursor was issued for sort={cursor_sort}")
+        return value, path
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._reader().execute("SELECT count(*) FROM entries").fetchone()[0]
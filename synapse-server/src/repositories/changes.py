@@ -0,0 +1,99 @@
+# changes.py
+import asyncio
+import itertools
+import threading
+import uuid
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple, TypedDict
+
+from .metadata_index import IndexChange, MetadataIndex
+
+class ChangeEvent(TypedDict, total=False):
+    seq: int
+    type: str  # "created", "modified", "deleted" or "renamed"
+    path: str
+    kind: str  # "file" or "directory"; absent for deletions
+    mtime: float
+    size: int
+    previous_path: str  # renames only
+
+class ChangeFeed:
+    """Ordered, resumable stream of vault changes.
+
+    Fed by MetadataIndex change notifications, which cover both VaultManager
+    writes (the index is refreshed after each one) and filesystem events
+    (the feed re-reads invalidated keys right away, so watcher events don't
+    wait for the next request to touch them). Writes that the watcher sees
+    again produce no duplicate events, since the index only reports entries
+    whose mtime/size actually changed.
+
+    Events get consecutive sequence numbers and the last `capacity` are
+    kept, so a reconnecting client can ask for everything after the last
+    sequence number it saw. Sequence numbers are only meaningful within
+    one `epoch` (one server process); a client resuming from another epoch,
+    or from further back than the buffer reaches, must resync instead.
+    """
+
+    def __init__(self, index: MetadataIndex, capacity: int = 10000):
+        self.index = index
+        self.epoch = uuid.uuid4().hex[:12]
+        self._events: Deque[ChangeEvent] = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        index.on_change(self._record)
+        index.subscribe(self._revalidate)
+
+    def _revalidate(self, key: str) -> None:
+        # get() re-reads stale entries, which reports their changes to _record
+        self.index.get(key)
+
+    def _record(self, change: IndexChange) -> None:
+        event = ChangeEvent(type=change.kind, path=change.key)
+        if change.meta is not None:
+            event["kind"] = change.meta.type
+            event["mtime"] = change.meta.modified_at
+            event["size"] = change.meta.size
+        if change.previous_key is not None:
+            event["previous_path"] = change.previous_key
+        with self._lock:
+            event["seq"] = self._last_seq = next(self._seq)
+            self._events.append(event)
+            waiters = list(self._waiters)
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def since(self, seq: int) -> Optional[List[ChangeEvent]]:
+        """Events after `seq`, or None if some of them were already dropped."""
+        with self._lock:
+            if seq >= self._last_seq:
+                return []
+            oldest = self._events[0]["seq"] if self._events else self._last_seq + 1
+            if seq < oldest - 1:
+                return None
+            return [event for event in itertools.islice(self._events, seq - oldest + 1, None)]
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until there are events after `seq`; False on timeout."""
+        ready = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), ready)
+        with self._lock:
+            if self._last_seq > seq:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
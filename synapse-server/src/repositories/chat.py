@@ -0,0 +1,245 @@
+# chat.py
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+from .metadata_index import META_DIR
+from .vault import VaultManager, PathNotFoundError, UnsupportedFileTypeError
+
+CHAT_SUFFIX = ".chat"
+
+# Sidecar header: magic, bytes of the transcript covered, CRC32 of the
+# covered tail (to tell appends from rewrites), then one uint64 line offset
+# per message
+_HEADER = struct.Struct("<4sQI")
+_MAGIC = b"SCI1"
+_TAIL_BYTES = 64
+
+class ChatMessage(TypedDict, total=False):
+    role: str
+    content: str
+    created_at: float
+
+class ChatWindow(TypedDict):
+    path: str
+    total: int  # messages in the transcript
+    start: int  # index of the first message returned
+    messages: List[ChatMessage]
+
+class _IndexView:
+    """Read-only offsets straight from a sidecar file, one seek per lookup,
+    for windows that only need a couple of entries."""
+
+    def __init__(self, index_path: Path, count: int):
+        self.index_path = index_path
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> int:
+        with open(self.index_path, "rb") as f:
+            f.seek(_HEADER.size + i * 8)
+            return struct.unpack("<Q", f.read(8))[0]
+
+class ChatLog:
+    """Message-level access to .chat transcripts.
+
+    A transcript is JSON Lines: one message object per line, appended to
+    and never rewritten. Next to each transcript, under META_DIR, a sidecar
+    index holds the byte offset of every line, so the last N messages (or
+    any range) are read with one seek instead of parsing the whole file,
+    and an append adds one line to the transcript and one entry to the
+    index.
+
+    The index is validated against the transcript before use: growth past
+    the covered size is indexed incrementally (the common case of appends
+    made by other tools), anything else triggers a rebuild.
+    """
+
+    def __init__(self, vault: VaultManager, index_dir: Optional[Path] = None):
+        self.vault = vault
+        self.index_dir = index_dir or vault.vault_dir / META_DIR / "chat"
+
+    def _paths(self, chat_path: str) -> Tuple[str, Path, Path]:
+        safe_path = self.vault._get_safe_path(chat_path)
+        if safe_path.suffix != CHAT_SUFFIX:
+            raise UnsupportedFileTypeError(f"{chat_path} is not a chat transcript")
+        key = self.vault._relative_key(safe_path)
+        index_path = self.index_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.idx"
+        return key, safe_path, index_path
+
+    @staticmethod
+    def _tail_crc(f, covered: int) -> int:
+        start = max(0, covered - _TAIL_BYTES)
+        f.seek(start)
+        return zlib.crc32(f.read(covered - start))
+
+    @staticmethod
+    def _scan(f, start: int, offsets: array) -> int:
+        """Index the lines from `start` to the last complete line; returns bytes covered."""
+        f.seek(start)
+        position = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partial line being written; index it next time
+            if line.strip():
+                offsets.append(position)
+            position += len(line)
+        return position
+
+    def _load_index(self, index_path: Path) -> Tuple[array, int, int]:
+        offsets = array("Q")
+        try:
+            with open(index_path, "rb") as f:
+                magic, covered, crc = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    raise ValueError
+                offsets.frombytes(f.read())
+        except (OSError, ValueError, struct.error):
+            return array("Q"), 0, 0
+        # Entries past `covered` come from an update cut short before the header was written
+        while offsets and offsets[-1] >= covered:
+            offsets.pop()
+        return offsets, covered, crc
+
+    def _save_index(self, index_path: Path, entries: array, covered: int, crc: int, at: Optional[int] = None) -> None:
+        """Write `entries` from position `at` (the whole index if None), then the header.
+
+        The header goes last, so an update cut short leaves entries past
+        `covered` that _load_index discards.
+        """
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        if at is not None and index_path.exists():
+            with open(index_path, "r+b") as f:
+                f.seek(_HEADER.size + at * entries.itemsize)
+                entries.tofile(f)
+                f.truncate()
+                f.seek(0)
+                f.write(_HEADER.pack(_MAGIC, covered, crc))
+            return
+        temp_path = index_path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, covered, crc))
+            entries.tofile(f)
+        os.replace(temp_path, index_path)
+
+    def _valid_view(self, f, size: int, index_path: Path) -> Optional[_IndexView]:
+        """A view of the sidecar if it covers the transcript exactly, else None."""
+        try:
+            with open(index_path, "rb") as index:
+                magic, covered, crc = _HEADER.unpack(index.read(_HEADER.size))
+                count = (os.fstat(index.fileno()).st_size - _HEADER.size) // 8
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or covered != size or not covered or self._tail_crc(f, covered) != crc:
+            return None
+        return _IndexView(index_path, count)
+
+    def _current_index(self, safe_path: Path, index_path: Path) -> Tuple[Sequence[int], int]:
+        """Offsets of all complete lines and the bytes they cover, updating the sidecar."""
+        try:
+            size = safe_path.stat().st_size
+        except OSError:
+            raise PathNotFoundError(f"File {safe_path.name} not found")
+        with open(safe_path, "rb") as f:
+            view = self._valid_view(f, size, index_path)
+            if view is not None:
+                return view, size
+            offsets, covered, crc = self._load_index(index_path)
+            appended_from: Optional[int] = len(offsets)
+            if not (0 < covered <= size and self._tail_crc(f, covered) == crc):
+                offsets, covered, appended_from = array("Q"), 0, None
+            new_covered = self._scan(f, covered, offsets)
+            new_crc = self._tail_crc(f, new_covered)
+        if appended_from is None:
+            self._save_index(index_path, offsets, new_covered, new_crc)
+        elif new_covered != covered:
+            self._save_index(index_path, offsets[appended_from:], new_covered, new_crc, at=appended_from)
+        return offsets, new_covered
+
+    @staticmethod
+    def _parse(line: bytes) -> ChatMessage:
+        text = line.decode("utf-8", errors="replace").rstrip("\n")
+        try:
+            message = json.loads(text)
+        except ValueError:
+            message = None
+        # Hand-written lines are shown as-is rather than dropped
+        return message if isinstance(message, dict) else ChatMessage(content=text)
+
+    def read(self, chat_path: str, start: Optional[int] = None, end: Optional[int] = None, last: Optional[int] = None, limit: Optional[int] = None) -> ChatWindow:
+        """Read a window of messages.
+
+        Args:
+            chat_path: Transcript path relative to vault root
+            start: Index of the first message (negative counts from the end)
+            end: Index after the last message (None for the end)
+            last: Read the last `last` messages instead of start/end
+            limit: Return at most this many messages from the start of the window
+
+        Returns:
+            The messages with their position in the transcript
+
+        Raises:
+            PathNotFoundError: If the transcript doesn't exist
+            UnsupportedFileTypeError: If the path isn't a .chat file
+        """
+        key, safe_path, index_path = self._paths(chat_path)
+        with self.vault.write_lock(safe_path):
+            offsets, covered = self._current_index(safe_path, index_path)
+            total = len(offsets)
+            if last is not None:
+                first, stop = max(0, total - last), total
+            else:
+                first, stop, _ = slice(start, end).indices(total)
+                stop = max(first, stop)
+            if limit is not None:
+                stop = min(stop, first + limit)
+            messages = []
+            if first < stop:
+                with open(safe_path, "rb") as f:
+                    f.seek(offsets[first])
+                    data = f.read((offsets[stop] if stop < total else covered) - offsets[first])
+                messages = [self._parse(line) for line in data.split(b"\n") if line.strip()]
+        return ChatWindow(path=key, total=total, start=first, messages=messages)
+
+    def append(self, chat_path: str, message: Dict[str, Any]) -> ChatWindow:
+        """Append one message, creating the transcript if needed.
+
+        Returns:
+            A window holding just the appended message and its index
+        """
+        key, safe_path, index_path = self._paths(chat_path)
+        message = {**message, "created_at": message.get("created_at", time.time())}
+        # JSON escapes newlines inside strings, so a message is always one line
+        line = json.dumps(message, ensure_ascii=False) + "\n"
+        with self.vault.write_lock(safe_path):
+            count, covered = 0, 0
+            if safe_path.is_file():
+                offsets, covered = self._current_index(safe_path, index_path)
+                count = len(offsets)
+            new_entries = array("Q")
+            if safe_path.is_file() and safe_path.stat().st_size != covered:
+                # Unterminated last line (written by hand): close it so
+                # ours starts on a line of its own
+                with open(safe_path, "rb") as f:
+                    f.seek(covered)
+                    if f.read().strip():
+                        new_entries.append(covered)
+                line = "\n" + line
+            offset = self.vault.append_file(key, line, create=True)
+            new_covered = offset + len(line.encode("utf-8"))
+            new_entries.append(new_covered - len(line.lstrip("\n").encode("utf-8")))
+            with open(safe_path, "rb") as f:
+                crc = self._tail_crc(f, new_covered)
+            # Nothing indexed yet means nothing to keep: write the index whole
+            self._save_index(index_path, new_entries, new_covered, crc, at=count if covered else None)
+            total = count + len(new_entries)
+        return ChatWindow(path=key, total=total, start=total - 1, messages=[ChatMessage(**message)])
@@ -0,0 +1,308 @@
+# coherence.py
+import hashlib
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from .metadata_index import EntryMeta, IndexChange, MetadataIndex
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE entries (
+    key TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    modified_at REAL NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+# Keys are joined with NUL (which can't appear in a path) and sent in
+# datagrams of at most this many bytes
+_SEPARATOR = b"\0"
+_MAX_DATAGRAM = 16 * 1024
+_SEND_TIMEOUT = 2.0
+
+def channel_dir_for(vault_dir: Path) -> Path:
+    """Rendezvous directory for the workers serving one vault.
+
+    Lives in the temp dir rather than the vault because Unix socket paths
+    are limited to ~100 bytes.
+    """
+    digest = hashlib.sha1(str(vault_dir.resolve()).encode("utf-8")).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"synapse-{digest}"
+
+def save_snapshot(index: MetadataIndex, db_path: Path) -> int:
+    """Write every index entry to a SQLite file, replacing it atomically."""
+    entries = index.entries()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = db_path.with_name(f".{uuid.uuid4().hex}.tmp")
+    conn = sqlite3.connect(str(temp_path))
+    try:
+        conn.executescript(SNAPSHOT_SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                ((key, meta.type, meta.size, meta.created_at, meta.modified_at, meta.mtime_ns) for key, meta in entries),
+            )
+    finally:
+        conn.close()
+    os.replace(temp_path, db_path)
+    return len(entries)
+
+def load_snapshot(index: MetadataIndex, db_path: Path) -> bool:
+    """Seed the index from a snapshot; False if there is no usable one."""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return False
+    try:
+        rows = conn.execute("SELECT key, type, size, created_at, modified_at, mtime_ns FROM entries").fetchall()
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+    index.load((key, EntryMeta(type, size, created_at, modified_at, mtime_ns)) for key, type, size, created_at, modified_at, mtime_ns in rows)
+    return True
+
+class InvalidationBus:
+    """Broadcast of changed vault keys between the worker processes of one host.
+
+    Each worker binds a Unix datagram socket in a shared channel directory;
+    publishing sends the keys to every other socket found there. Sends
+    happen on a background thread so publishers (which may hold the index
+    lock) never wait on a slow peer. Sockets left behind by dead workers
+    refuse connections and are removed on the next send.
+    """
+
+    def __init__(self, channel_dir: Path):
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("Multi-worker mode needs Unix domain sockets")
+        self.channel_dir = channel_dir
+        self.channel_dir.mkdir(parents=True, exist_ok=True)
+        self.address = channel_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        self._sock: Optional[socket.socket] = None
+        self._subscribers: List[Callable[[str], None]] = []
+        self._outbox: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.sent = 0
+        self.received = 0
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Register a callback invoked (on the receiver thread) with each key
+        another worker published."""
+        self._subscribers.append(callback)
+
+    def start(self) -> None:
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self.address))
+        self._sock.settimeout(0.5)
+        self._threads = [
+            threading.Thread(target=self._receive, name="invalidation-receiver", daemon=True),
+            threading.Thread(target=self._send, name="invalidation-sender", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._outbox.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._sock is not None:
+            self._sock.close()
+        try:
+            self.address.unlink()
+        except OSError:
+            pass
+
+    def on_receiver_thread(self) -> bool:
+        return bool(self._threads) and threading.current_thread() is self._threads[0]
+
+    def publish(self, key: str) -> None:
+        self._outbox.put(key)
+
+    def _peers(self) -> List[str]:
+        try:
+            return [entry.path for entry in os.scandir(self.channel_dir)
+                    if entry.name.endswith(".sock") and entry.path != str(self.address)]
+        except OSError:
+            return []
+
+    def _datagrams(self, keys: List[str]) -> List[bytes]:
+        datagrams, current = [], b""
+        for key in dict.fromkeys(keys):
+            encoded = key.encode("utf-8")
+            if current and len(current) + len(encoded) + 1 > _MAX_DATAGRAM:
+                datagrams.append(current)
+                current = b""
+            current = current + _SEPARATOR + encoded if current else encoded
+        if current:
+            datagrams.append(current)
+        return datagrams
+
+    def _send(self) -> None:
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.settimeout(_SEND_TIMEOUT)
+        while True:
+            key = self._outbox.get()
+            keys = [key]
+            # Everything published meanwhile goes out in the same datagrams
+            while True:
+                try:
+                    keys.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            if None in keys:
+                break
+            datagrams = self._datagrams(keys)
+            for peer in self._peers():
+                for datagram in datagrams:
+                    try:
+                        sender.sendto(datagram, peer)
+                    except (ConnectionRefusedError, FileNotFoundError):
+                        try:
+                            os.unlink(peer)
+                        except OSError:
+                            pass
+                        break
+                    except OSError as e:
+                        logger.warning("Dropped invalidations for %s: %s", peer, e)
+                        break
+                    self.sent += 1
+        sender.close()
+
+    def _receive(self) -> None:
+        while not self._stop.is_set():
+            try:
+                datagram = self._sock.recv(_MAX_DATAGRAM + 1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.received += 1
+            for encoded in datagram.split(_SEPARATOR):
+                key = encoded.decode("utf-8", errors="replace")
+                for callback in self._subscribers:
+                    try:
+                        callback(key)
+                    except Exception:
+                        logger.exception("Invalidation of %r failed", key)
+
+class WorkerCoordinator:
+    """Keeps the per-process vault state of several workers coherent.
+
+    One worker (whichever takes the leader lock first; the lock dies with
+    its process) builds the index - with `build`, a full walk by default -
+    and writes it to a snapshot that the others load instead of building
+    it again. Workers decide who leads under a startup lock, which a new
+    leader keeps until it has replaced the previous run's snapshot, so
+    followers never load a stale one. The leader is also the only one
+    running the filesystem watcher and the startup reconciliation of the
+    shared search/history databases.
+
+    Every change a worker's index observes - its own writes, or the
+    leader's watcher events - is published on the InvalidationBus; the
+    other workers invalidate those keys, which re-reads them and fans out
+    to their path caches, change feeds and link graphs. Content caches are
+    already validated against a fresh stat on every read.
+    """
+
+    def __init__(
+        self,
+        index: MetadataIndex,
+        channel_dir: Optional[Path] = None,
+        snapshot_path: Optional[Path] = None,
+        snapshot_timeout: float = 60.0,
+        build: Optional[Callable[[], None]] = None,
+    ):
+        self.index = index
+        self.build = build or index.build
+        self.channel_dir = channel_dir or channel_dir_for(index.vault_dir)
+        self.snapshot_path = snapshot_path or self.channel_dir / "metadata.db"
+        self.snapshot_timeout = snapshot_timeout
+        self.bus = InvalidationBus(self.channel_dir)
+        self.is_leader = False
+        self._lock_file = None
+
+    def _try_lead(self) -> bool:
+        if fcntl is None:
+            raise RuntimeError("Multi-worker mode needs fcntl file locks")
+        self._lock_file = open(self.channel_dir / "leader.lock", "a+")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    @contextmanager
+    def _startup_lock(self) -> Iterator[bool]:
+        """Hold the startup lock; yields False if it wasn't free within snapshot_timeout."""
+        if fcntl is None:
+            raise RuntimeError("Multi-worker mode needs fcntl file locks")
+        with open(self.channel_dir / "startup.lock", "a+") as lock_file:
+            deadline = time.monotonic() + self.snapshot_timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(0.05)
+            yield True
+
+    def _changed(self, change: IndexChange) -> None:
+        # Re-reads caused by another worker's message are that worker's news
+        if self.bus.on_receiver_thread():
+            return
+        self.bus.publish(change.key)
+        if change.previous_key is not None:
+            self.bus.publish(change.previous_key)
+
+    def start(self) -> None:
+        """Join the other workers: subscribe before loading, so no change
+        published while this worker loads its index is missed."""
+        self.bus.subscribe(self.index.invalidate)
+        self.bus.start()
+        self.index.on_change(self._changed)
+        with self._startup_lock() as started:
+            self.is_leader = started and self._try_lead()
+            if self.is_leader:
+                try:
+                    self.snapshot_path.unlink()
+                except FileNotFoundError:
+                    pass
+                self.build()
+                count = save_snapshot(self.index, self.snapshot_path)
+                logger.info("Leader worker %d indexed %d entries", os.getpid(), count)
+                return
+        # Once a follower has the startup lock, the leader's snapshot is written
+        if not (started and load_snapshot(self.index, self.snapshot_path)):
+            self.index.build()
+
+    def stop(self) -> None:
+        self.bus.stop()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
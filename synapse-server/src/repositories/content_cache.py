@@ -0,0 +1,74 @@
+# content_cache.py
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+class _CachedContent(NamedTuple):
+    mtime_ns: int
+    size: int
+    content: str
+
+class ContentCache:
+    """Byte-bounded LRU cache of decoded document contents.
+
+    Entries are stored per path together with the (mtime_ns, size) they
+    were read at; a lookup only hits when the caller's fresh stat matches,
+    so edits made outside the API are never served stale. The vault's own
+    writes invalidate their entry rather than writing through, since a
+    newer write may land before the cached stat could be taken.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CachedContent]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.mtime_ns != mtime_ns or entry.size != size:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry.content
+
+    def put(self, path: str, mtime_ns: int, size: int, content: str) -> None:
+        # Cost is the on-disk size; decoded str overhead is close for text
+        if size > self.max_bytes:
+            self.invalidate(path)
+            return
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+            self._entries[path] = _CachedContent(mtime_ns, size, content)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
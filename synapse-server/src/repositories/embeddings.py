@@ -0,0 +1,429 @@
+# embeddings.py
+import hashlib
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import queue
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypedDict
+
+from ..llm import Embedder
+from .metadata_index import META_DIR, ROOT_KEY
+from .vault import SUPPORTED_SUFFIXES
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    path TEXT PRIMARY KEY,
+    row INTEGER UNIQUE NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vectors_hash ON vectors(hash);
+CREATE TABLE IF NOT EXISTS free_rows (
+    row INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS document_frequency (
+    bucket INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+# Documents embedded and committed together by the background worker
+BATCH_SIZE = 64
+# Rows scored per matrix product, bounding the temporary score arrays
+BLOCK_ROWS = 16384
+INITIAL_ROWS = 1024
+# Without NumPy, scoring costs about 0.1 us per row and query dimension in
+# pure Python: only the strongest query dimensions are used, and indexes
+# larger than this are refused rather than tying up a request thread
+PURE_PYTHON_QUERY_DIMS = 32
+PURE_PYTHON_MAX_ROWS = 10000
+
+class IndexTooLargeError(Exception):
+    """The index is too large to query without NumPy."""
+
+class RelatedNote(TypedDict):
+    path: str
+    score: float
+
+def document_text(relative_path: str, content: str) -> str:
+    """The text worth embedding: message contents for transcripts."""
+    if not relative_path.endswith(".chat"):
+        return content
+    parts = []
+    for line in content.splitlines():
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message = None
+        if isinstance(message, dict):
+            if isinstance(message.get("content"), str):
+                parts.append(message["content"])
+        elif line.strip():
+            parts.append(line)
+    return "\n".join(parts)
+
+class VectorMatrix:
+    """A row-major float32 matrix in a file, memory-mapped (shared, so
+    every process sees every write) and grown by doubling."""
+
+    def __init__(self, path: Path, dim: int):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._map: Optional[mmap.mmap] = None
+        self.capacity = 0
+        self._remap(INITIAL_ROWS)
+
+    def _remap(self, rows: int) -> None:
+        size = os.fstat(self._fd).st_size
+        if size < rows * self.row_bytes:
+            os.ftruncate(self._fd, rows * self.row_bytes)
+            size = rows * self.row_bytes
+        # The previous map is left to the garbage collector: readers may
+        # still be scoring over it
+        self._map = mmap.mmap(self._fd, size)
+        self.capacity = size // self.row_bytes
+
+    def view(self, rows: int) -> mmap.mmap:
+        """A map covering at least `rows` rows (another process may have grown the file)."""
+        if rows > self.capacity:
+            self._remap(max(rows, self.capacity * 2))
+        return self._map
+
+    def read(self, row: int) -> array:
+        start = row * self.row_bytes
+        vector = array("f")
+        vector.frombytes(self.view(row + 1)[start:start + self.row_bytes])
+        return vector
+
+    def write(self, row: int, vector: array) -> None:
+        start = row * self.row_bytes
+        self.view(row + 1)[start:start + self.row_bytes] = vector.tobytes()
+
+    def reset(self) -> None:
+        os.ftruncate(self._fd, 0)
+        self.capacity = 0
+        self._remap(INITIAL_ROWS)
+
+    def top(self, query: array, rows: int, limit: int) -> List[Tuple[float, int]]:
+        """The `limit` best (dot product, row) pairs over the first `rows` rows.
+
+        Raises:
+            IndexTooLargeError: Without NumPy, if rows exceeds PURE_PYTHON_MAX_ROWS
+        """
+        if rows == 0:
+            return []
+        view = self.view(rows)
+        if numpy is not None:
+            matrix = numpy.frombuffer(view, dtype=numpy.float32, count=rows * self.dim).reshape(rows, self.dim)
+            vector = numpy.frombuffer(query, dtype=numpy.float32)
+            best = []
+            for start in range(0, rows, BLOCK_ROWS):
+                scores = matrix[start:start + BLOCK_ROWS] @ vector
+                take = min(limit, len(scores))
+                for i in numpy.argpartition(-scores, take - 1)[:take]:
+                    best.append((float(scores[i]), start + int(i)))
+            return heapq.nlargest(limit, best)
+        # Pure Python: one strided column per query dimension, for the
+        # strongest ones only (an approximation for dense queries)
+        if rows > PURE_PYTHON_MAX_ROWS:
+            raise IndexTooLargeError(f"Querying more than {PURE_PYTHON_MAX_ROWS} documents needs NumPy")
+        floats = memoryview(view).cast("f")
+        scores = [0.0] * rows
+        dimensions = [(j, weight) for j, weight in enumerate(query) if weight]
+        for j, weight in heapq.nlargest(PURE_PYTHON_QUERY_DIMS, dimensions, key=lambda item: abs(item[1])):
+            column = floats[j:rows * self.dim:self.dim].tolist()
+            scores = [score + weight * value for score, value in zip(scores, column)]
+        return heapq.nlargest(limit, zip(scores, range(rows)))
+
+class EmbeddingIndex:
+    """Local vector index for "related notes" and semantic search.
+
+    One vector per .md/.chat document, made by a pluggable Embedder, is kept
+    in a memory-mapped float32 matrix under .synapse/embeddings, with a
+    SQLite table mapping paths to rows and content hashes. Queries score
+    every row in batched matrix products (NumPy if installed, otherwise a
+    slower, approximate pure-Python loop limited to PURE_PYTHON_MAX_ROWS
+    documents), weighting the query by inverse document
+    frequency from per-dimension document counts kept alongside.
+
+    Writes and invalidations are queued and embedded by a background
+    thread in batches; a document is only re-embedded when its content
+    hash changed, and a renamed or copied one reuses the stored vector.
+    """
+
+    def __init__(
+        self,
+        vault_dir: Path,
+        embedder: Embedder,
+        data_dir: Optional[Path] = None,
+        hash_of: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.vault_dir = vault_dir
+        self.embedder = embedder
+        self.hash_of = hash_of
+        self.data_dir = data_dir or vault_dir / META_DIR / "embeddings"
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.matrix = VectorMatrix(self.data_dir / "vectors.f32", embedder.dim)
+        with self._write_lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'model'").fetchone()
+            if row is None or row[0] != embedder.name:
+                # Vectors of another model (or dimension) can't be compared
+                for table in ("vectors", "free_rows", "document_frequency"):
+                    self._conn.execute(f"DELETE FROM {table}")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('model', ?)", (embedder.name,))
+                self.matrix.reset()
+        self._queue: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.embedded = 0
+        self.reused = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.data_dir / "vectors.db"), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection, so queries don't serialize on writes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _abs(self, relative_path: str) -> Path:
+        return self.vault_dir if relative_path == ROOT_KEY else self.vault_dir / relative_path
+
+    # Queueing
+
+    def _enqueue(self, relative_path: str, content: Optional[str]) -> None:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-worker", daemon=True)
+                self._worker.start()
+        self._queue.put((relative_path, content))
+
+    def document_written(self, relative_path: str, content: Optional[str]) -> None:
+        """VaultManager write listener: (re-)embed in the background if the content changed."""
+        if relative_path.endswith(SUPPORTED_SUFFIXES):
+            self._enqueue(relative_path, content)
+
+    def mark_dirty(self, relative_path: str) -> None:
+        """MetadataIndex subscriber: re-check this path (or subtree) in the background."""
+        self._enqueue(relative_path, None)
+
+    def reconcile(self, relative_dir: str = ROOT_KEY) -> int:
+        """Queue the documents below a directory whose content hash differs
+        from the stored one, and those that are gone; returns how many."""
+        prefix = "" if relative_dir == ROOT_KEY else relative_dir + "/"
+        on_disk = []
+        for directory, dirs, files in os.walk(self._abs(relative_dir)):
+            if directory == str(self.vault_dir):
+                dirs[:] = [name for name in dirs if name != META_DIR]
+            relative = os.path.relpath(directory, self.vault_dir).replace(os.sep, "/")
+            on_disk += [name if relative == "." else f"{relative}/{name}" for name in files if name.endswith(SUPPORTED_SUFFIXES)]
+        if relative_dir == ROOT_KEY:
+            rows = self._reader().execute("SELECT path, hash FROM vectors")
+        else:
+            rows = self._reader().execute("SELECT path, hash FROM vectors WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+        stored = dict(rows.fetchall())
+        queued = 0
+        for path in on_disk:
+            # Without a hash source every file is read and hashed by the worker
+            digest = self.hash_of(path) if self.hash_of is not None else None
+            if digest is None or stored.get(path) != digest:
+                self._enqueue(path, None)
+                queued += 1
+        for path in stored.keys() - set(on_disk):
+            self._enqueue(path, None)
+            queued += 1
+        return queued
+
+    def flush(self) -> None:
+        """Wait until everything queued so far is embedded."""
+        self._queue.join()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    # Background worker
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except Exception:
+                logger.exception("Embedding batch failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _process(self, batch: List[Tuple[str, Optional[str]]]) -> None:
+        latest: Dict[str, Optional[str]] = {}
+        for relative_path, content in batch:
+            latest.pop(relative_path, None)
+            latest[relative_path] = content
+        reader = self._reader()
+        changed: Dict[str, Tuple[str, str]] = {}  # path -> (hash, text)
+        removed = []
+        for relative_path, content in latest.items():
+            if content is None:
+                path = self._abs(relative_path)
+                if path.is_dir():
+                    self.reconcile(relative_path)
+                    continue
+                try:
+                    data = path.read_bytes()
+                except OSError:
+                    removed.append(relative_path)
+                    continue
+                if not relative_path.endswith(SUPPORTED_SUFFIXES):
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                content = data.decode("utf-8", errors="replace")
+            else:
+                digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            row = reader.execute("SELECT hash FROM vectors WHERE path = ?", (relative_path,)).fetchone()
+            if row is None or row[0] != digest:
+                changed[relative_path] = (digest, content)
+        # Same content elsewhere (a rename or a copy): reuse its vector
+        vectors: Dict[str, array] = {}
+        for relative_path, (digest, _) in changed.items():
+            row = reader.execute("SELECT row FROM vectors WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+            if row is not None:
+                vectors[relative_path] = self.matrix.read(row[0])
+        self.reused += len(vectors)
+        to_embed = [path for path in changed if path not in vectors]
+        texts = [document_text(path, changed[path][1]) for path in to_embed]
+        vectors.update(zip(to_embed, self.embedder.embed(texts)))
+        self.embedded += len(to_embed)
+        if not changed and not removed:
+            return
+        with self._write_lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            frequency: Counter = Counter()
+            for relative_path in removed:
+                self._delete(relative_path, frequency)
+            for relative_path, (digest, _) in changed.items():
+                self._store(relative_path, digest, vectors[relative_path], frequency)
+            self._conn.executemany(
+                "INSERT INTO document_frequency VALUES (?, ?) ON CONFLICT(bucket) DO UPDATE SET count = count + excluded.count",
+                [(bucket, count) for bucket, count in frequency.items() if count],
+            )
+
+    @staticmethod
+    def _count(vector: array, frequency: Counter, sign: int) -> None:
+        for bucket, value in enumerate(vector):
+            if value:
+                frequency[bucket] += sign
+
+    def _store(self, relative_path: str, digest: str, vector: array, frequency: Counter) -> None:
+        row = self._conn.execute("SELECT row FROM vectors WHERE path = ?", (relative_path,)).fetchone()
+        if row is not None:
+            row = row[0]
+            self._count(self.matrix.read(row), frequency, -1)
+        else:
+            free = self._conn.execute("SELECT min(row) FROM free_rows").fetchone()[0]
+            if free is not None:
+                row = free
+                self._conn.execute("DELETE FROM free_rows WHERE row = ?", (row,))
+            else:
+                row = self._conn.execute("SELECT coalesce(max(row) + 1, 0) FROM vectors").fetchone()[0]
+        self._count(vector, frequency, 1)
+        self.matrix.write(row, vector)
+        self._conn.execute("INSERT OR REPLACE INTO vectors VALUES (?, ?, ?)", (relative_path, row, digest))
+
+    def _delete(self, relative_path: str, frequency: Counter) -> None:
+        # A missing path may have been a directory: drop its subtree too
+        prefix = relative_path + "/"
+        rows = self._conn.execute(
+            "SELECT row FROM vectors WHERE path = ? OR substr(path, 1, ?) = ?",
+            (relative_path, len(prefix), prefix),
+        ).fetchall()
+        zero = array("f", bytes(self.matrix.row_bytes))
+        for (row,) in rows:
+            self._count(self.matrix.read(row), frequency, -1)
+            self.matrix.write(row, zero)
+            self._conn.execute("INSERT INTO free_rows VALUES (?)", (row,))
+        self._conn.execute(
+            "DELETE FROM vectors WHERE path = ? OR substr(path, 1, ?) = ?",
+            (relative_path, len(prefix), prefix),
+        )
+
+    # Queries
+
+    def _nearest(self, vector: array, limit: int, exclude: Optional[str] = None) -> List[RelatedNote]:
+        reader = self._reader()
+        rows, documents = reader.execute("SELECT coalesce(max(row) + 1, 0), count(*) FROM vectors").fetchone()
+        frequency = dict(reader.execute("SELECT bucket, count FROM document_frequency").fetchall())
+        weighted = array("f", (
+            value * (math.log((1 + documents) / (1 + frequency.get(bucket, 0))) + 1) if value else 0.0
+            for bucket, value in enumerate(vector)
+        ))
+        norm = math.sqrt(sum(value * value for value in weighted))
+        if not norm:
+            return []
+        weighted = array("f", (value / norm for value in weighted))
+        best = [(score, row) for score, row in self.matrix.top(weighted, rows, limit + 1) if score > 0]
+        if not best:
+            return []
+        paths = dict(reader.execute(
+            f"SELECT row, path FROM vectors WHERE row IN ({','.join('?' * len(best))})",
+            [row for _, row in best],
+        ).fetchall())
+        hits = [RelatedNote(path=paths[row], score=round(score, 4)) for score, row in best
+                if row in paths and paths[row] != exclude]
+        return hits[:limit]
+
+    def related(self, relative_path: str, limit: int = 10) -> List[RelatedNote]:
+        """Documents most similar to this one. Not yet embedded ones are
+        embedded on the fly."""
+        row = self._reader().execute("SELECT row FROM vectors WHERE path = ?", (relative_path,)).fetchone()
+        if row is not None:
+            vector = self.matrix.read(row[0])
+        else:
+            try:
+                content = self._abs(relative_path).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                return []
+            vector = self.embedder.embed([document_text(relative_path, content)])[0]
+        return self._nearest(vector, limit, exclude=relative_path)
+
+    def search(self, query: str, limit: int = 10) -> List[RelatedNote]:
+        """Documents most similar to free text."""
+        return self._nearest(self.embedder.embed([query])[0], limit)
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT count(*) FROM vectors").fetchone()[0]
@@ -0,0 +1,308 @@
+# history.py
+import difflib
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional, TypedDict
+
+from .metadata_index import META_DIR
+from .vault import PathNotFoundError, SUPPORTED_SUFFIXES
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    saved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_by_path ON versions(path, id);
+"""
+
+class VersionInfo(TypedDict):
+    id: int
+    path: str
+    blob: str  # sha256 of the content
+    size: int
+    saved_at: float
+
+class GCStats(TypedDict):
+    versions_removed: int
+    blobs_removed: int
+    bytes_freed: int
+
+class RetentionPolicy(NamedTuple):
+    """How much history GC keeps per file.
+
+    Every version from the last `keep_all` seconds is kept, then the newest
+    version of each hour for `hourly` seconds, then the newest of each day
+    for `daily` seconds; older versions are dropped. The current version of
+    a file is always kept.
+    """
+    keep_all: float = 24 * 3600
+    hourly: float = 7 * 24 * 3600
+    daily: float = 90 * 24 * 3600
+
+class HistoryStore:
+    """Content-addressed version history for vault documents.
+
+    Blobs are stored once per distinct content under META_DIR/history/objects,
+    named by their SHA-256 and zlib-compressed. A SQLite log records which
+    blob each file had at each save, so an autosave that doesn't change the
+    content costs a hash and a lookup, and one that does costs one new blob
+    and one row. As a write listener, saves are recorded by a background
+    thread so requests don't wait for the compression and fsync.
+    """
+
+    def __init__(self, vault_dir: Path, root: Optional[Path] = None):
+        self.vault_dir = vault_dir
+        self.root = root or vault_dir / META_DIR / "history"
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.root / "history.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        # Held while writing blobs + rows and while collecting garbage, so GC
+        # never deletes a blob that a save is about to reference. Other
+        # processes sharing the store (workers) are kept out the same way
+        # with a file lock: shared to save, exclusive to collect
+        self._lock = threading.Lock()
+        self._gc_lock = open(self.root / "gc.lock", "a+") if fcntl is not None else None
+        self._queue: "queue.Queue[Callable[[], object]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        # Transcripts about to be rewritten: their next partial write is
+        # recorded. Only touched by whoever runs the queued jobs
+        self._rewritten = set()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _store_blob(self, digest: str, data: bytes) -> None:
+        path = self._blob_path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.parent / f".{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(zlib.compress(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    @contextmanager
+    def _across_processes(self, exclusive: bool) -> Iterator[None]:
+        # Only taken under self._lock: threads of this process share the lock
+        if self._gc_lock is None:
+            yield
+            return
+        fcntl.flock(self._gc_lock.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._gc_lock.fileno(), fcntl.LOCK_UN)
+
+    def _read_blob(self, digest: str) -> bytes:
+        try:
+            return zlib.decompress(self._blob_path(digest).read_bytes())
+        except OSError:
+            raise PathNotFoundError(f"Object {digest} is missing")
+
+    # Background recording
+
+    def _enqueue(self, job: Callable[[], object]) -> None:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="history-worker", daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                job()
+            except Exception:
+                logger.exception("Recording a version failed")
+
+    def document_written(self, relative_path: str, content: Optional[str]) -> None:
+        """VaultManager write listener: record the save in the background."""
+        if relative_path.endswith(SUPPORTED_SUFFIXES):
+            self._enqueue(lambda: self.record(relative_path, content))
+
+    def preserve(self, relative_path: str) -> None:
+        """VaultManager rewrite listener: keep a transcript's appended messages.
+
+        Appends to .chat files aren't recorded (see record), so before one
+        is rewritten its current content is queued as a version, and the
+        rewrite is recorded even if it's announced as a partial write.
+        """
+        if not relative_path.endswith(".chat"):
+            return
+        try:
+            data = (self.vault_dir / relative_path).read_bytes()
+        except OSError:
+            return
+        self._enqueue(lambda: self._record_before_rewrite(relative_path, data))
+
+    def _record_before_rewrite(self, relative_path: str, data: bytes) -> None:
+        # Flagged in queue order, so only the rewrite's own write sees it
+        self._record_data(relative_path, data)
+        self._rewritten.add(relative_path)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the saves queued so far are recorded; False on timeout."""
+        done = threading.Event()
+        self._enqueue(done.set)
+        return done.wait(timeout)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def record(self, relative_path: str, content: Optional[str]) -> Optional[int]:
+        """Append a version if the content changed.
+
+        Returns the new version id, or None if nothing was recorded.
+        """
+        if not relative_path.endswith(SUPPORTED_SUFFIXES):
+            return None
+        if content is None:
+            if relative_path.endswith(".chat"):
+                try:
+                    self._rewritten.remove(relative_path)
+                except KeyError:
+                    # A plain append: every earlier version is a prefix of
+                    # the current file, and recording each message would
+                    # store the whole transcript again per message
+                    return None
+            # Partial write (patch, append, import): the file on disk has the new content
+            try:
+                data = (self.vault_dir / relative_path).read_bytes()
+            except OSError:
+                return None
+        else:
+            self._rewritten.discard(relative_path)
+            data = content.encode("utf-8")
+        return self._record_data(relative_path, data)
+
+    def _record_data(self, relative_path: str, data: bytes) -> Optional[int]:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock, self._across_processes(exclusive=False):
+            latest = self._conn.execute(
+                "SELECT blob FROM versions WHERE path = ? ORDER BY id DESC LIMIT 1", (relative_path,)
+            ).fetchone()
+            if latest is not None and latest[0] == digest:
+                return None
+            self._store_blob(digest, data)
+            with self._conn:
+                return self._conn.execute(
+                    "INSERT INTO versions(path, blob, size, saved_at) VALUES (?, ?, ?, ?)",
+                    (relative_path, digest, len(data), time.time()),
+                ).lastrowid
+
+    def versions(self, relative_path: str) -> List[VersionInfo]:
+        """All recorded versions of a file, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, path, blob, size, saved_at FROM versions WHERE path = ? ORDER BY id DESC", (relative_path,)
+            ).fetchall()
+        return [VersionInfo(id=id, path=path, blob=blob, size=size, saved_at=saved_at) for id, path, blob, size, saved_at in rows]
+
+    def content(self, relative_path: str, version_id: int) -> str:
+        """The content of a file at a recorded version.
+
+        Raises:
+            PathNotFoundError: If the file has no such version
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blob FROM versions WHERE path = ? AND id = ?", (relative_path, version_id)
+            ).fetchone()
+        if row is None:
+            raise PathNotFoundError(f"Version {version_id} of {relative_path} not found")
+        return self._read_blob(row[0]).decode("utf-8")
+
+    def diff(self, relative_path: str, old: str, new: str, old_label: str, new_label: str, context: int = 3) -> str:
+        """Unified diff between two contents of a file."""
+        return "".join(difflib.unified_diff(
+            old.splitlines(keepends=True),
+            new.splitlines(keepends=True),
+            fromfile=f"{relative_path}@{old_label}",
+            tofile=f"{relative_path}@{new_label}",
+            n=context,
+        ))
+
+    def _expired(self, policy: RetentionPolicy, now: float) -> List[int]:
+        expired = []
+        current_path = None
+        seen_buckets = set()
+        rows = self._conn.execute("SELECT id, path, saved_at FROM versions ORDER BY path, id DESC")
+        for version_id, path, saved_at in rows:
+            if path != current_path:
+                # Newest version of each file is always kept
+                current_path, seen_buckets = path, set()
+                continue
+            age = now - saved_at
+            if age <= policy.keep_all:
+                continue
+            if age <= policy.hourly:
+                bucket = ("h", int(saved_at // 3600))
+            elif age <= policy.daily:
+                bucket = ("d", int(saved_at // 86400))
+            else:
+                expired.append(version_id)
+                continue
+            if bucket in seen_buckets:
+                expired.append(version_id)
+            else:
+                seen_buckets.add(bucket)
+        return expired
+
+    def gc(self, policy: RetentionPolicy = RetentionPolicy(), now: Optional[float] = None) -> GCStats:
+        """Drop versions outside the retention policy and unreferenced blobs."""
+        now = time.time() if now is None else now
+        stats = GCStats(versions_removed=0, blobs_removed=0, bytes_freed=0)
+        with self._lock, self._across_processes(exclusive=True):
+            expired = self._expired(policy, now)
+            with self._conn:
+                self._conn.executemany("DELETE FROM versions WHERE id = ?", ((version_id,) for version_id in expired))
+            stats["versions_removed"] = len(expired)
+            referenced = {blob for (blob,) in self._conn.execute("SELECT DISTINCT blob FROM versions")}
+            with os.scandir(self.objects_dir) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as it:
+                        for entry in it:
+                            # Temp files from a crash mid-store are garbage too
+                            if shard.name + entry.name in referenced:
+                                continue
+                            try:
+                                size = entry.stat().st_size
+                                os.unlink(entry.path)
+                            except OSError:
+                                continue
+                            stats["blobs_removed"] += 1
+                            stats["bytes_freed"] += size
+            if expired:
+                # Compact the log so history.db shrinks along with the objects
+                self._conn.execute("VACUUM")
+        return stats
@@ -0,0 +1,423 @@
+# links.py
+import os
+import posixpath
+import re
+import threading
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, TypedDict
+from urllib.parse import unquote
+
+from .metadata_index import META_DIR, ROOT_KEY
+from .vault import PathNotFoundError
+
+NOTE_SUFFIX = ".md"
+
+FENCE_RE = re.compile(r"^(```|~~~).*?(?:^\1[^\n]*$|\Z)", re.M | re.S)
+INLINE_CODE_RE = re.compile(r"`[^`\n]*`")
+FRONTMATTER_RE = re.compile(r"\A---\n(.*?)\n---[ \t]*(?:\n|\Z)", re.S)
+WIKILINK_RE = re.compile(r"!?\[\[([^\[\]\n]+?)\]\]")
+MDLINK_RE = re.compile(r"!?\[[^\]\n]*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"\n]*\")?\s*\)")
+SCHEME_RE = re.compile(r"^[A-Za-z][\w+.-]*:")
+# A tag needs a non-digit somewhere (so "#1" isn't one) and can't follow a
+# word character ("page#section") or another "#" (headings need a space anyway)
+TAG_RE = re.compile(r"(?<![\w#&/])#([\w/-]*[^\W\d][\w/-]*)")
+
+class LinkInfo(TypedDict):
+    target: str  # link target as written, normalized ("folder/note", "note")
+    path: Optional[str]  # the note it resolves to, None if there is none
+
+class DocumentLinks(TypedDict):
+    path: str
+    links: List[LinkInfo]
+    tags: List[str]
+
+class NeighbourNode(TypedDict):
+    path: str
+    distance: int
+
+class Neighbourhood(TypedDict):
+    path: str
+    nodes: List[NeighbourNode]
+    edges: List[Tuple[str, str]]  # (source, target) links between the nodes
+    truncated: bool
+
+def _strip_suffix(target: str) -> str:
+    return target[:-len(NOTE_SUFFIX)] if target.endswith(NOTE_SUFFIX) else target
+
+def _frontmatter_tags(frontmatter: str) -> List[str]:
+    """Tags from a `tags:` key, as an inline list or as "- item" lines."""
+    tags: List[str] = []
+    lines = frontmatter.split("\n")
+    for i, line in enumerate(lines):
+        key, _, value = line.partition(":")
+        if key.strip() not in ("tags", "tag") or line[:1].isspace():
+            continue
+        value = value.strip().strip("[]")
+        if value:
+            tags += [tag.strip().strip("'\"").lstrip("#") for tag in re.split(r"[,\s]+", value)]
+        else:
+            for item in lines[i + 1:]:
+                if not item.lstrip().startswith("- "):
+                    break
+                tags.append(item.lstrip()[2:].strip().strip("'\"").lstrip("#"))
+        break
+    return [tag for tag in tags if tag]
+
+def extract_links(source_path: str, text: str) -> Tuple[List[str], List[str]]:
+    """The link targets and tags of a note, each deduplicated in order of appearance.
+
+    Targets are normalized to vault-relative paths without the .md suffix:
+    wikilinks ([[note]], [[folder/note|alias]], [[note#heading]], embeds)
+    as written, markdown links ([text](../note.md)) resolved against the
+    source's directory. External URLs, in-page anchors and links that
+    leave the vault are skipped, as is anything inside code.
+    """
+    tags: List[str] = []
+    frontmatter = FRONTMATTER_RE.match(text)
+    if frontmatter:
+        tags += _frontmatter_tags(frontmatter.group(1))
+        text = text[frontmatter.end():]
+    text = INLINE_CODE_RE.sub(" ", FENCE_RE.sub(" ", text))
+
+    targets: List[str] = []
+    for match in WIKILINK_RE.finditer(text):
+        target = match.group(1).split("|", 1)[0].split("#", 1)[0].split("^", 1)[0].strip()
+        if target:
+            targets.append(_strip_suffix(posixpath.normpath(target).lstrip("/")))
+    source_dir = posixpath.dirname(source_path)
+    for match in MDLINK_RE.finditer(text):
+        url = match.group(1)
+        if url.startswith("#") or SCHEME_RE.match(url):
+            continue
+        url = unquote(url.split("#", 1)[0].split("?", 1)[0])
+        if not url:
+            continue
+        target = posixpath.normpath(url[1:] if url.startswith("/") else posixpath.join(source_dir, url))
+        if target == ".." or target.startswith("../") or target == ".":
+            continue
+        targets.append(_strip_suffix(target))
+
+    # Link text can look like a tag (#anchor in a URL); only look outside links
+    prose = MDLINK_RE.sub(" ", WIKILINK_RE.sub(" ", text))
+    tags += TAG_RE.findall(prose)
+    return list(dict.fromkeys(targets)), list(dict.fromkeys(tags))
+
+def _remove(arrays: Dict[int, array], key: int, value: int) -> bool:
+    """Remove one value; True if that left the key without any."""
+    values = arrays[key]
+    values.remove(value)
+    if not values:
+        del arrays[key]
+        return True
+    return False
+
+class LinkGraph:
+    """In-memory graph of the links and tags between .md notes.
+
+    Every path, link target and tag is interned to an integer id once, and
+    edges are kept as compact arrays of ids in both directions (note ->
+    targets, target -> notes), so backlinks are a dict lookup and a short
+    scan rather than a read of every note in the vault. An id is released
+    for reuse once it is neither a note nor linked to or tagged by one, so
+    half-typed link targets and deleted paths don't pile up.
+
+    Edges point at link targets as written, not at files: a target is
+    resolved to a note when queried (exact path first, then the shortest
+    path ending in it, like [[note]] matching "folder/note.md"). Creating,
+    moving or deleting a note therefore never requires rewriting other
+    notes' edges; only the changed note itself is re-parsed.
+
+    Notes are parsed on VaultManager writes and, like SearchIndex, re-read
+    lazily after the metadata index reports an outside change. Each note's
+    mtime/size is kept so reconcile() only re-parses what changed.
+    """
+
+    def __init__(self, vault_dir: Path):
+        self.vault_dir = vault_dir
+        self._ids: Dict[str, int] = {}
+        self._strings: List[Optional[str]] = []
+        self._free: List[int] = []  # released ids, reused by _intern
+        self._notes: Dict[int, Tuple[int, int]] = {}  # note id -> (mtime_ns, size)
+        self._by_stem: Dict[str, Set[int]] = {}  # file name without .md -> note ids
+        self._out: Dict[int, array] = {}  # note id -> target ids
+        self._in: Dict[int, array] = {}  # target id -> note ids
+        self._tags: Dict[int, array] = {}  # note id -> tag ids
+        self._tagged: Dict[int, array] = {}  # tag id -> note ids
+        self._lock = threading.RLock()
+        self._dirty: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._built = False
+
+    def _intern(self, string: str) -> int:
+        id = self._ids.get(string)
+        if id is None:
+            if self._free:
+                id = self._free.pop()
+                self._strings[id] = string
+            else:
+                id = len(self._strings)
+                self._strings.append(string)
+            self._ids[string] = id
+        return id
+
+    def _release(self, id: int) -> None:
+        """Forget an id's string if nothing refers to it any more."""
+        if id in self._notes or id in self._in or id in self._tagged:
+            return
+        del self._ids[self._strings[id]]
+        self._strings[id] = None
+        self._free.append(id)
+
+    def _unlink(self, note: int) -> None:
+        for target in self._out.pop(note, ()):
+            if _remove(self._in, target, note):
+                self._release(target)
+        for tag in self._tags.pop(note, ()):
+            if _remove(self._tagged, tag, note):
+                self._release(tag)
+
+    def _set_note(self, relative_path: str, text: str, stamp: Tuple[int, int]) -> None:
+        targets, tags = extract_links(relative_path, text)
+        note = self._intern(relative_path)
+        self._unlink(note)
+        if note not in self._notes:
+            stem = _strip_suffix(relative_path.rpartition("/")[2])
+            self._by_stem.setdefault(stem, set()).add(note)
+        self._notes[note] = stamp
+        if targets:
+            self._out[note] = array("I", (self._intern(target) for target in targets))
+            for target in self._out[note]:
+                self._in.setdefault(target, array("I")).append(note)
+        if tags:
+            self._tags[note] = array("I", (self._intern("#" + tag) for tag in tags))
+            for tag in self._tags[note]:
+                self._tagged.setdefault(tag, array("I")).append(note)
+
+    def _remove_note(self, note: int) -> None:
+        self._unlink(note)
+        if self._notes.pop(note, None) is not None:
+            stem = _strip_suffix(self._strings[note].rpartition("/")[2])
+            self._by_stem[stem].discard(note)
+            if not self._by_stem[stem]:
+                del self._by_stem[stem]
+            self._release(note)
+
+    def _read_note(self, relative_path: str) -> None:
+        path = self.vault_dir / relative_path
+        try:
+            stat = path.stat()
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return
+        with self._lock:
+            self._set_note(relative_path, text, (stat.st_mtime_ns, stat.st_size))
+
+    def document_written(self, relative_path: str, content: Optional[str]) -> None:
+        """VaultManager write listener: re-parse the note's links."""
+        if not relative_path.endswith(NOTE_SUFFIX):
+            return
+        if content is None:
+            self.mark_dirty(relative_path)
+            return
+        try:
+            stat = (self.vault_dir / relative_path).stat()
+        except OSError:
+            return
+        with self._lock:
+            self._set_note(relative_path, content, (stat.st_mtime_ns, stat.st_size))
+
+    def mark_dirty(self, relative_path: str) -> None:
+        """MetadataIndex subscriber: re-check this path before the next query."""
+        with self._dirty_lock:
+            self._dirty.add(relative_path)
+
+    def _scan(self, relative_dir: str) -> Dict[str, Tuple[int, int]]:
+        """Collect (mtime_ns, size) for notes below a directory."""
+        found = {}
+        base = self.vault_dir if relative_dir == ROOT_KEY else self.vault_dir / relative_dir
+        prefix = "" if relative_dir == ROOT_KEY else relative_dir + "/"
+        pending = [(base, prefix)]
+        while pending:
+            directory, rel_prefix = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if not rel_prefix and entry.name == META_DIR:
+                            continue
+                        try:
+                            if entry.is_dir():
+                                pending.append((entry.path, rel_prefix + entry.name + "/"))
+                            elif entry.is_file() and entry.name.endswith(NOTE_SUFFIX):
+                                stat = entry.stat()
+                                found[rel_prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def reconcile(self, relative_dir: str = ROOT_KEY) -> None:
+        """Bring the graph in line with disk for a subtree, comparing mtime/size."""
+        on_disk = self._scan(relative_dir)
+        prefix = "" if relative_dir == ROOT_KEY else relative_dir + "/"
+        with self._lock:
+            stored = {self._strings[note]: stamp for note, stamp in self._notes.items() if self._strings[note].startswith(prefix)}
+            for path in stored.keys() - on_disk.keys():
+                self._remove_note(self._ids[path])
+        for path, stamp in on_disk.items():
+            if stored.get(path) != stamp:
+                self._read_note(path)
+        self._built = True
+
+    def _apply_dirty(self) -> None:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            path = self.vault_dir if key == ROOT_KEY else self.vault_dir / key
+            if path.is_dir():
+                self.reconcile(key)
+            elif path.is_file():
+                if key.endswith(NOTE_SUFFIX):
+                    self._read_note(key)
+            else:
+                # Deleted: the key may have been a note or a whole directory
+                with self._lock:
+                    prefix = key + "/"
+                    for note in [note for note in self._notes if self._strings[note] == key or self._strings[note].startswith(prefix)]:
+                        self._remove_note(note)
+
+    def _current(self) -> None:
+        if not self._built:
+            self.reconcile()
+        self._apply_dirty()
+
+    def _resolve(self, target: int) -> Optional[int]:
+        """The note a link target points at, or None."""
+        name = self._strings[target]
+        exact = self._ids.get(name + NOTE_SUFFIX)
+        if exact is not None and exact in self._notes:
+            return exact
+        best, best_key = None, None
+        for note in self._by_stem.get(name.rpartition("/")[2], ()):
+            path = _strip_suffix(self._strings[note])
+            if path == name or path.endswith("/" + name):
+                key = (len(path), path)
+                if best_key is None or key < best_key:
+                    best, best_key = note, key
+        return best
+
+    def _note_id(self, relative_path: str) -> int:
+        note = self._ids.get(relative_path)
+        if note is None or note not in self._notes:
+            raise PathNotFoundError(f"Note {relative_path} not found")
+        return note
+
+    def _backlink_ids(self, note: int) -> Set[int]:
+        # Any path suffix of the note can be a link target that resolves to it
+        parts = _strip_suffix(self._strings[note]).split("/")
+        sources: Set[int] = set()
+        for i in range(len(parts)):
+            target = self._ids.get("/".join(parts[i:]))
+            if target in self._in and self._resolve(target) == note:
+                sources.update(self._in[target])
+        sources.discard(note)
+        return sources
+
+    def _outlink_ids(self, note: int) -> Set[int]:
+        resolved = {self._resolve(target) for target in self._out.get(note, ())}
+        resolved.discard(None)
+        resolved.discard(note)
+        return resolved
+
+    def backlinks(self, relative_path: str) -> List[str]:
+        """Notes linking to a note, sorted.
+
+        Raises:
+            PathNotFoundError: If the path isn't a note
+        """
+        with self._lock:
+            self._current()
+            return sorted(self._strings[source] for source in self._backlink_ids(self._note_id(relative_path)))
+
+    def links(self, relative_path: str) -> DocumentLinks:
+        """A note's outgoing links (resolved where possible) and tags.
+
+        Raises:
+            PathNotFoundError: If the path isn't a note
+        """
+        with self._lock:
+            self._current()
+            note = self._note_id(relative_path)
+            links = []
+            for target in self._out.get(note, ()):
+                resolved = self._resolve(target)
+                links.append(LinkInfo(target=self._strings[target], path=None if resolved is None else self._strings[resolved]))
+            tags = [self._strings[tag][1:] for tag in self._tags.get(note, ())]
+            return DocumentLinks(path=relative_path, links=links, tags=tags)
+
+    def orphans(self) -> List[str]:
+        """Notes with no links to or from another note, sorted."""
+        with self._lock:
+            self._current()
+            connected: Set[int] = set()
+            for target, sources in self._in.items():
+                resolved = self._resolve(target)
+                if resolved is None:
+                    continue
+                linked = [source for source in sources if source != resolved]
+                if linked:
+                    connected.add(resolved)
+                    connected.update(linked)
+            return sorted(self._strings[note] for note in self._notes if note not in connected)
+
+    def neighbourhood(self, relative_path: str, depth: int = 1, max_nodes: int = 500) -> Neighbourhood:
+        """Notes within `depth` links of a note (in either direction), with the
+        links among them. Stops adding nodes at `max_nodes`.
+
+        Raises:
+            PathNotFoundError: If the path isn't a note
+        """
+        with self._lock:
+            self._current()
+            start = self._note_id(relative_path)
+            distances = {start: 0}
+            outlinks: Dict[int, Set[int]] = {}
+            queue = deque([start])
+            truncated = False
+            while queue:
+                note = queue.popleft()
+                outlinks[note] = self._outlink_ids(note)
+                if distances[note] == depth:
+                    continue
+                for neighbour in sorted(outlinks[note] | self._backlink_ids(note)):
+                    if neighbour in distances:
+                        continue
+                    if len(distances) >= max_nodes:
+                        truncated = True
+                        break
+                    distances[neighbour] = distances[note] + 1
+                    queue.append(neighbour)
+            edges = sorted(
+                (self._strings[source], self._strings[target])
+                for source, targets in outlinks.items() for target in targets if target in distances
+            )
+            nodes = [NeighbourNode(path=self._strings[note], distance=distance) for note, distance in distances.items()]
+            return Neighbourhood(path=relative_path, nodes=nodes, edges=edges, truncated=truncated)
+
+    def tags(self) -> Dict[str, int]:
+        """Every tag with the number of notes using it."""
+        with self._lock:
+            self._current()
+            return {self._strings[tag][1:]: len(notes) for tag, notes in sorted(self._tagged.items(), key=lambda item: self._strings[item[0]])}
+
+    def tagged(self, tag: str) -> List[str]:
+        """Notes carrying a tag, sorted."""
+        with self._lock:
+            self._current()
+            tag_id = self._ids.get("#" + tag.lstrip("#"))
+            return sorted(self._strings[note] for note in self._tagged.get(tag_id, ()))
+
+    def __len__(self) -> int:
+        return len(self._notes)
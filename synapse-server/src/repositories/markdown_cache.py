@@ -0,0 +1,537 @@
+# markdown_cache.py
+import hashlib
+import html
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TypedDict, Union
+
+from .links import FRONTMATTER_RE, SCHEME_RE
+from .metadata_index import META_DIR, ROOT_KEY
+
+NOTE_SUFFIX = ".md"
+
+# Bump whenever parse_markdown's output changes: stored summaries made by
+# another version are discarded
+PARSER_VERSION = 1
+
+# The HTML preview covers the top-level blocks starting within this many
+# bytes of the document
+PREVIEW_BYTES = 16 << 10
+
+ATX_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+SETEXT_RE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})[ \t]*([^`\s]*)")
+HR_RE = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+LIST_RE = re.compile(r"^([ \t]*)([-*+]|\d{1,9}[.)])(?:[ \t]+(.*))?$")
+TASK_RE = re.compile(r"^\[([ xX])\](?:[ \t]+(.*))?$")
+QUOTE_RE = re.compile(r"^ {0,3}> ?(.*)$")
+TABLE_DELIMITER_RE = re.compile(r"^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+
+CODE_SPAN_RE = re.compile(r"(`+)(.+?)\1")
+IMAGE_RE = re.compile(r"!\[([^\]\n]*)\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"\n]*\")?\s*\)")
+LINK_RE = re.compile(r"\[([^\]\n]+)\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"\n]*\")?\s*\)")
+WIKILINK_RE = re.compile(r"!?\[\[([^\[\]|\n]+?)(?:\|([^\[\]\n]+?))?\]\]")
+AUTOLINK_RE = re.compile(r"<((?:https?|mailto):[^\s<>]+)>")
+STRONG_RE = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+EMPHASIS_RE = re.compile(r"\*(?=\S)(.+?)(?<=\S)\*|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)")
+STRIKE_RE = re.compile(r"~~(?=\S)(.+?)(?<=\S)~~")
+HARD_BREAK_RE = re.compile(r"(?: {2,}|\\)\n")
+PLACEHOLDER_RE = re.compile(r"\x00(\d+)\x00")
+SAFE_SCHEMES = ("http", "https", "mailto")
+
+FrontmatterValue = Union[str, List[str]]
+
+class Heading(TypedDict):
+    level: int
+    text: str
+    slug: str  # id of the heading in the HTML preview
+    line: int  # 0-based, as used by line windows
+
+class TaskItem(TypedDict):
+    line: int
+    checked: bool
+    text: str
+
+class ParsedMarkdown(TypedDict):
+    title: Optional[str]  # front-matter title or first level-1 heading
+    frontmatter: Dict[str, FrontmatterValue]
+    headings: List[Heading]
+    tasks: List[TaskItem]
+    word_count: int
+    html: str  # preview of the first PREVIEW_BYTES
+    truncated: bool  # whether the preview stops before the end
+
+class MarkdownSummary(ParsedMarkdown):
+    path: str
+    hash: str  # sha256 of the content summarized
+
+# Blocks: (kind, first line, ...) tuples
+Block = tuple
+
+def _indent(line: str) -> int:
+    expanded = line.expandtabs(4)
+    return len(expanded) - len(expanded.lstrip())
+
+def _starts_block(line: str) -> bool:
+    return bool(ATX_RE.match(line) or FENCE_RE.match(line) or HR_RE.match(line) or QUOTE_RE.match(line) or LIST_RE.match(line))
+
+def _split_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip() for cell in re.split(r"(?<!\\)\|", line)]
+
+def _parse_blocks(lines: List[str], base: int) -> List[Block]:
+    """Split lines into block tuples; `base` is the line number of lines[0]."""
+    blocks: List[Block] = []
+    paragraph: List[Tuple[int, str]] = []
+
+    def flush():
+        if paragraph:
+            blocks.append(("paragraph", paragraph[0][0], "\n".join(text for _, text in paragraph)))
+            paragraph.clear()
+
+    i = 0
+    while i < len(lines):
+        line, number = lines[i], base + i
+        if not line.strip():
+            flush()
+            i += 1
+            continue
+        if line.lstrip()[:1].isalpha():
+            # No block starts with a letter: plain paragraph text
+            paragraph.append((number, line.lstrip()))
+            i += 1
+            continue
+        fence = FENCE_RE.match(line)
+        if fence:
+            flush()
+            marker = fence.group(1)
+            closing = re.compile(rf"^ {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}[ \t]*$")
+            body = []
+            i += 1
+            while i < len(lines) and not closing.match(lines[i]):
+                body.append(lines[i])
+                i += 1
+            blocks.append(("code", number, fence.group(2), "\n".join(body)))
+            i += 1
+            continue
+        heading = ATX_RE.match(line)
+        if heading:
+            flush()
+            blocks.append(("heading", number, len(heading.group(1)), (heading.group(2) or "").strip()))
+            i += 1
+            continue
+        setext = SETEXT_RE.match(line)
+        if setext and paragraph:
+            blocks.append(("heading", paragraph[0][0], 1 if setext.group(1)[0] == "=" else 2, " ".join(text.strip() for _, text in paragraph)))
+            paragraph.clear()
+            i += 1
+            continue
+        if len(paragraph) == 1 and "|" in paragraph[0][1] and TABLE_DELIMITER_RE.match(line):
+            header_number, header = paragraph.pop()
+            rows = []
+            i += 1
+            while i < len(lines) and lines[i].strip() and "|" in lines[i]:
+                rows.append(_split_row(lines[i]))
+                i += 1
+            blocks.append(("table", header_number, _split_row(header), rows))
+            continue
+        if HR_RE.match(line):
+            flush()
+            blocks.append(("hr", number))
+            i += 1
+            continue
+        if QUOTE_RE.match(line):
+            flush()
+            inner = []
+            while i < len(lines) and QUOTE_RE.match(lines[i]):
+                inner.append(QUOTE_RE.match(lines[i]).group(1))
+                i += 1
+            blocks.append(("quote", number, _parse_blocks(inner, number)))
+            continue
+        item = LIST_RE.match(line)
+        if item and not (paragraph and item.group(3) is None):
+            flush()
+            ordered = item.group(2)[0].isdigit()
+            start = int(item.group(2)[:-1]) if ordered else 1
+            items = []
+            while item and item.group(2)[0].isdigit() == ordered:
+                number = base + i
+                content_indent = _indent(item.group(1)) + len(item.group(2)) + 1
+                item_lines = [item.group(3) or ""]
+                i += 1
+                while i < len(lines):
+                    following = lines[i]
+                    if not following.strip():
+                        rest = i + 1
+                        while rest < len(lines) and not lines[rest].strip():
+                            rest += 1
+                        if rest == len(lines) or _indent(lines[rest]) < content_indent:
+                            break
+                        item_lines.append("")
+                    elif _indent(following) >= content_indent:
+                        item_lines.append(following.expandtabs(4)[content_indent:])
+                    elif _starts_block(following):
+                        break
+                    else:
+                        item_lines.append(following.strip())  # lazy continuation
+                    i += 1
+                task = TASK_RE.match(item_lines[0])
+                checked = None
+                if task:
+                    checked = task.group(1) != " "
+                    item_lines[0] = task.group(2) or ""
+                if len(item_lines) == 1 and not _starts_block(item_lines[0]):
+                    children = [("paragraph", number, item_lines[0])] if item_lines[0].strip() else []
+                else:
+                    children = _parse_blocks(item_lines, number)
+                items.append((number, checked, children))
+                # Blank lines between items keep them in one (loose) list
+                following = i
+                while following < len(lines) and not lines[following].strip():
+                    following += 1
+                item = LIST_RE.match(lines[following]) if following < len(lines) else None
+                if item and item.group(2)[0].isdigit() == ordered:
+                    i = following
+            blocks.append(("list", items[0][0], ordered, start, items))
+            continue
+        paragraph.append((number, line.lstrip()))
+        i += 1
+    flush()
+    return blocks
+
+def _walk(blocks: List[Block]):
+    """Every block, depth first, in document order, with task items as ("task", line, checked, blocks)."""
+    for block in blocks:
+        yield block
+        if block[0] == "quote":
+            yield from _walk(block[2])
+        elif block[0] == "list":
+            for number, checked, children in block[4]:
+                if checked is not None:
+                    yield ("task", number, checked, children)
+                yield from _walk(children)
+
+def _plain(text: str) -> str:
+    """Inline markdown reduced to its visible text."""
+    text = CODE_SPAN_RE.sub(lambda m: m.group(2).strip(), text)
+    text = IMAGE_RE.sub(lambda m: m.group(1), text)
+    text = LINK_RE.sub(lambda m: m.group(1), text)
+    text = WIKILINK_RE.sub(lambda m: m.group(2) or m.group(1), text)
+    text = AUTOLINK_RE.sub(lambda m: m.group(1), text)
+    for pattern in (STRONG_RE, STRIKE_RE, EMPHASIS_RE):
+        text = pattern.sub(lambda m: m.group(1) or m.group(2), text)
+    return text.strip()
+
+def _slug(text: str, used: Dict[str, int]) -> str:
+    """GitHub-style anchor: lowercase words joined by "-", numbered if repeated."""
+    slug = re.sub(r"[^\w\- ]", "", text.lower()).strip().replace(" ", "-")
+    count = used.get(slug, 0)
+    used[slug] = count + 1
+    return f"{slug}-{count}" if count else slug
+
+def _safe_url(url: str) -> str:
+    """The URL itself if relative or http(s)/mailto, else a dead link."""
+    scheme = SCHEME_RE.match(re.sub(r"[\x00-\x20]", "", url))
+    if scheme and scheme.group(0)[:-1].lower() not in SAFE_SCHEMES:
+        return "#"
+    return url
+
+def _inline(text: str) -> str:
+    """Inline markdown as HTML. Raw HTML in the source is escaped, not passed through."""
+    tokens: List[str] = []
+
+    def protect(rendered: str) -> str:
+        tokens.append(rendered)
+        return f"\x00{len(tokens) - 1}\x00"
+
+    def spans(text: str) -> str:
+        text = IMAGE_RE.sub(lambda m: protect(
+            f'<img src="{html.escape(_safe_url(m.group(2)))}" alt="{html.escape(m.group(1))}">'), text)
+        text = WIKILINK_RE.sub(lambda m: protect(
+            f'<a class="wikilink" data-target="{html.escape(m.group(1).strip())}">{html.escape(m.group(2) or m.group(1))}</a>'), text)
+        text = LINK_RE.sub(lambda m: protect(f'<a href="{html.escape(_safe_url(m.group(2)))}">{spans(m.group(1))}</a>'), text)
+        text = AUTOLINK_RE.sub(lambda m: protect(f'<a href="{html.escape(m.group(1))}">{html.escape(m.group(1))}</a>'), text)
+        text = html.escape(text, quote=False)
+        text = STRONG_RE.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+        text = STRIKE_RE.sub(lambda m: f"<del>{m.group(1)}</del>", text)
+        return EMPHASIS_RE.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+
+    text = CODE_SPAN_RE.sub(lambda m: protect(f"<code>{html.escape(m.group(2).strip())}</code>"), text.replace("\x00", ""))
+    text = HARD_BREAK_RE.sub("<br>\n", spans(text))
+    # Protected spans can contain others (link text), so restore until none are left
+    while PLACEHOLDER_RE.search(text):
+        text = PLACEHOLDER_RE.sub(lambda m: tokens[int(m.group(1))], text)
+    return text
+
+def _render(blocks: List[Block], slugs: Dict[int, str]) -> str:
+    out = []
+    for block in blocks:
+        kind = block[0]
+        if kind == "paragraph":
+            out.append(f"<p>{_inline(block[2].rstrip())}</p>")
+        elif kind == "heading":
+            _, number, level, text = block
+            out.append(f'<h{level} id="{slugs[number]}">{_inline(text)}</h{level}>')
+        elif kind == "code":
+            language = f' class="language-{html.escape(block[2])}"' if block[2] else ""
+            out.append(f"<pre><code{language}>{html.escape(block[3])}</code></pre>")
+        elif kind == "hr":
+            out.append("<hr>")
+        elif kind == "quote":
+            out.append(f"<blockquote>\n{_render(block[2], slugs)}\n</blockquote>")
+        elif kind == "table":
+            _, _, header, rows = block
+            head = "".join(f"<th>{_inline(cell)}</th>" for cell in header)
+            body = "".join("<tr>" + "".join(f"<td>{_inline(cell)}</td>" for cell in row) + "</tr>" for row in rows)
+            out.append(f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>")
+        elif kind == "list":
+            _, _, ordered, start, items = block
+            tag = "ol" if ordered else "ul"
+            attributes = f' start="{start}"' if ordered and start != 1 else ""
+            rendered = []
+            for _, checked, children in items:
+                # Lists render tight: an item's paragraphs go without <p>
+                content = "\n".join(
+                    _inline(child[2].rstrip()) if child[0] == "paragraph" else _render([child], slugs)
+                    for child in children
+                )
+                if checked is None:
+                    rendered.append(f"<li>{content}</li>")
+                else:
+                    box = '<input type="checkbox" disabled checked>' if checked else '<input type="checkbox" disabled>'
+                    rendered.append(f'<li class="task">{box} {content}</li>')
+            out.append(f"<{tag}{attributes}>\n" + "\n".join(rendered) + f"\n</{tag}>")
+    return "\n".join(out)
+
+def _parse_frontmatter(raw: str) -> Dict[str, FrontmatterValue]:
+    """Top-level "key: value" pairs, inline [a, b] lists and "- item" lists;
+    nested mappings and block scalars are not interpreted."""
+    def unquote(value: str) -> str:
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            return value[1:-1]
+        return value
+
+    data: Dict[str, FrontmatterValue] = {}
+    lines = raw.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        key, separator, value = line.partition(":")
+        if not separator or not key.strip() or line[:1].isspace() or line.startswith("#"):
+            continue
+        value = value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            data[key.strip()] = [unquote(item) for item in value[1:-1].split(",") if item.strip()]
+        elif value:
+            data[key.strip()] = unquote(value)
+        else:
+            items = []
+            while i < len(lines) and lines[i].lstrip().startswith("- "):
+                items.append(unquote(lines[i].lstrip()[2:]))
+                i += 1
+            data[key.strip()] = items if items else ""
+    return data
+
+def parse_markdown(text: str) -> ParsedMarkdown:
+    """Structural summary of a markdown document.
+
+    Covers the subset notes use: front matter, ATX and setext headings,
+    fenced code, block quotes, nested and task lists, pipe tables, rules
+    and inline emphasis, code, links, images and wikilinks. The preview
+    escapes raw HTML and neutralizes non-http(s)/mailto URLs, so it can be
+    inserted as is.
+    """
+    frontmatter: Dict[str, FrontmatterValue] = {}
+    body, base = text, 0
+    match = FRONTMATTER_RE.match(text)
+    if match:
+        frontmatter = _parse_frontmatter(match.group(1))
+        body, base = text[match.end():], text.count("\n", 0, match.end())
+    lines = body.split("\n")
+    blocks = _parse_blocks(lines, base)
+
+    headings: List[Heading] = []
+    tasks: List[TaskItem] = []
+    used: Dict[str, int] = {}
+    slugs: Dict[int, str] = {}
+    for block in _walk(blocks):
+        if block[0] == "heading":
+            plain = _plain(block[3])
+            slugs[block[1]] = _slug(plain, used)
+            headings.append(Heading(level=block[2], text=plain, slug=slugs[block[1]], line=block[1]))
+        elif block[0] == "task":
+            children = block[3]
+            first = children[0][2] if children and children[0][0] == "paragraph" else ""
+            tasks.append(TaskItem(line=block[1], checked=block[2], text=_plain(first.split("\n")[0])))
+
+    # Top-level blocks starting within the first PREVIEW_BYTES
+    position, preview_end = 0, base + len(lines)
+    for i, line in enumerate(lines):
+        position += len(line.encode("utf-8")) + 1
+        if position > PREVIEW_BYTES:
+            preview_end = base + i + 1
+            break
+    preview = [block for block in blocks if block[1] < preview_end]
+
+    title = frontmatter.get("title")
+    if not isinstance(title, str) or not title:
+        title = next((heading["text"] for heading in headings if heading["level"] == 1), None)
+    return ParsedMarkdown(
+        title=title,
+        frontmatter=frontmatter,
+        headings=headings,
+        tasks=tasks,
+        word_count=len(re.findall(r"\w+", body)),
+        html=_render(preview, slugs),
+        truncated=len(preview) < len(blocks),
+    )
+
+class MarkdownCache:
+    """Persistent cache of parse_markdown results for the vault's notes.
+
+    Summaries are stored by content hash in a SQLite database under
+    META_DIR, so identical notes share one and a note that is renamed, or
+    changed and changed back, isn't parsed again; the most recent ones are
+    also kept in memory. A second table maps each path to its last known
+    hash and stat, so a request for an unchanged note costs a stat and a
+    lookup, without reading it. When a note is written or changes on disk,
+    its mapping is dropped, along with the summary if no other note has
+    the same content.
+    """
+
+    def __init__(self, vault_dir: Path, data_dir: Optional[Path] = None, memory_entries: int = 512):
+        self.vault_dir = vault_dir
+        self.data_dir = data_dir or vault_dir / META_DIR / "markdown"
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, ParsedMarkdown]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.data_dir / "summaries.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS summaries (hash TEXT PRIMARY KEY, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS paths (
+                path TEXT PRIMARY KEY, hash TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS paths_by_hash ON paths(hash);
+        """)
+        with self._conn:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+            if row is None or row[0] != str(PARSER_VERSION):
+                self._conn.execute("DELETE FROM summaries")
+                self._conn.execute("DELETE FROM paths")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('parser_version', ?)", (str(PARSER_VERSION),))
+        self.parsed = 0
+        self.hits = 0
+
+    def _remember(self, digest: str, parsed: ParsedMarkdown) -> None:
+        self._memory[digest] = parsed
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, digest: str) -> Optional[ParsedMarkdown]:
+        parsed = self._memory.get(digest)
+        if parsed is not None:
+            self._memory.move_to_end(digest)
+            return parsed
+        row = self._conn.execute("SELECT data FROM summaries WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        parsed = json.loads(row[0])
+        self._remember(digest, parsed)
+        return parsed
+
+    def _summary(self, relative_path: str, digest: str, parsed: ParsedMarkdown) -> MarkdownSummary:
+        summary = MarkdownSummary(path=relative_path, hash=digest, **parsed)
+        if summary["title"] is None:
+            summary["title"] = Path(relative_path).stem
+        return summary
+
+    def summary(self, relative_path: str) -> MarkdownSummary:
+        """The (cached) structural summary of a note.
+
+        Args:
+            relative_path: Normalized path of a .md file relative to vault root
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        path = self.vault_dir / relative_path
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM paths WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (relative_path, stat.st_mtime_ns, stat.st_size),
+            ).fetchone()
+            parsed = self._lookup(row[0]) if row is not None else None
+            if parsed is not None:
+                self.hits += 1
+                return self._summary(relative_path, row[0], parsed)
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            parsed = self._lookup(digest)
+        if parsed is None:
+            parsed = parse_markdown(data.decode("utf-8", errors="replace"))
+            self.parsed += 1
+        else:
+            self.hits += 1
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO summaries VALUES (?, ?)", (digest, json.dumps(parsed)))
+            # The stat from before the read: if the file changed in between,
+            # the next request sees a different stat and reads it again
+            previous = self._conn.execute("SELECT hash FROM paths WHERE path = ?", (relative_path,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)",
+                (relative_path, digest, stat.st_mtime_ns, stat.st_size),
+            )
+            if previous is not None and previous[0] != digest:
+                self._drop_unreferenced(previous[0])
+            self._remember(digest, parsed)
+        return self._summary(relative_path, digest, parsed)
+
+    def _drop_unreferenced(self, digest: str) -> None:
+        if self._conn.execute("SELECT 1 FROM paths WHERE hash = ? LIMIT 1", (digest,)).fetchone() is None:
+            self._conn.execute("DELETE FROM summaries WHERE hash = ?", (digest,))
+            self._memory.pop(digest, None)
+
+    def invalidate(self, relative_path: str) -> None:
+        """Forget the summaries of a path and everything below it.
+
+        Fed both by VaultManager writes and by the metadata index, so
+        changes made through the API and on disk are both covered.
+        """
+        with self._lock, self._conn:
+            if relative_path == ROOT_KEY:
+                rows = self._conn.execute("SELECT path, hash FROM paths").fetchall()
+            else:
+                pattern = relative_path.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "/%"
+                rows = self._conn.execute(
+                    "SELECT path, hash FROM paths WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                    (relative_path, pattern),
+                ).fetchall()
+            for path, digest in rows:
+                self._conn.execute("DELETE FROM paths WHERE path = ?", (path,))
+                self._drop_unreferenced(digest)
+
+    def document_written(self, relative_path: str, content: Optional[str]) -> None:
+        """VaultManager write listener."""
+        if relative_path.endswith(NOTE_SUFFIX):
+            self.invalidate(relative_path)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
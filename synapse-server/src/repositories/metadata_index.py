@@ -0,0 +1,483 @@
+# metadata_index.py
+import os
+import threading
+from stat import S_ISDIR
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+ROOT_KEY = "."
+# Reserved directory inside the vault for server-side data (indexes etc.)
+META_DIR = ".synapse"
+
+# Watchdog event types that can change the index; others (opened, closed,
+# closed_no_write) are reported for plain reads on some platforms
+WATCHED_EVENTS = frozenset({"created", "modified", "deleted", "moved"})
+
+class EntryMeta(NamedTuple):
+    """Cached stat data for a single vault entry."""
+    type: str  # "file" or "directory"
+    size: int
+    created_at: float
+    modified_at: float
+    mtime_ns: int
+
+    @property
+    def version(self) -> str:
+        """Opaque token that changes whenever the entry's content may have."""
+        return f"{self.mtime_ns:x}-{self.size:x}"
+
+class IndexChange(NamedTuple):
+    """A change to the index, as seen by change listeners.
+
+    kind is "created", "modified", "deleted" or "renamed"; for renames
+    previous_key holds the old key. meta is None for deletions.
+    """
+    kind: str
+    key: str
+    meta: Optional[EntryMeta]
+    previous_key: Optional[str] = None
+
+def _join(parent: str, name: str) -> str:
+    return name if parent == ROOT_KEY else f"{parent}/{name}"
+
+def _parent(key: str) -> str:
+    head, _, _ = key.rpartition("/")
+    return head or ROOT_KEY
+
+def is_meta_key(key: str) -> bool:
+    """Whether a key lies inside the reserved META_DIR."""
+    return key == META_DIR or key.startswith(META_DIR + "/")
+
+def meta_from_stat(is_dir: bool, stat: os.stat_result) -> EntryMeta:
+    return EntryMeta(
+        type="directory" if is_dir else "file",
+        size=stat.st_size,
+        created_at=stat.st_ctime,
+        modified_at=stat.st_mtime,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+class MetadataIndex:
+    """Process-wide, in-memory index of vault metadata.
+
+    Keeps path -> stat data and parent -> children mappings so listings can be
+    served without walking the vault. Entries are refreshed by VaultManager
+    writes and invalidated by a VaultWatcher; invalidated entries are re-read
+    from disk lazily on the next lookup.
+
+    Keys are paths relative to the vault root using "/" separators, with "."
+    for the root itself (matching the paths VaultManager reports).
+    """
+
+    def __init__(self, vault_dir: Path):
+        self.vault_dir = vault_dir
+        self._entries: Dict[str, EntryMeta] = {}
+        self._children: Dict[str, Set[str]] = {}
+        self._stale: Set[str] = set()
+        self._lock = threading.RLock()
+        self._built = False
+        self._subscribers: List[Callable[[str], None]] = []
+        self._change_listeners: List[Callable[[IndexChange], None]] = []
+        self._muted = False
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Register a callback invoked with each invalidated key."""
+        self._subscribers.append(callback)
+
+    def on_change(self, callback: Callable[[IndexChange], None]) -> None:
+        """Register a callback invoked (under the index lock) for each change
+        the index observes while refreshing entries.
+
+        Changes are only reported once an entry is re-read, so invalidated
+        keys produce changes on their next lookup. The initial build() reports
+        nothing; only files and created/deleted directories are reported, as
+        a directory's own mtime changes are implied by its children's.
+        """
+        self._change_listeners.append(callback)
+
+    def _emit(self, kind: str, key: str, meta: Optional[EntryMeta], previous_key: Optional[str] = None) -> None:
+        if self._muted:
+            return
+        change = IndexChange(kind, key, meta, previous_key)
+        for callback in self._change_listeners:
+            callback(change)
+
+    @staticmethod
+    def key_for(relative_path: str) -> str:
+        """Normalize a vault-relative path into an index key."""
+        key = relative_path.replace(os.sep, "/").strip("/")
+        return key if key and key != ROOT_KEY else ROOT_KEY
+
+    def _abs(self, key: str) -> Path:
+        return self.vault_dir if key == ROOT_KEY else self.vault_dir / key
+
+    def build(self) -> None:
+        """(Re)build the whole index with a single scandir walk."""
+        with self._lock:
+            self._entries.clear()
+            self._children.clear()
+            self._stale.clear()
+            try:
+                stat = self.vault_dir.stat()
+            except OSError:
+                self._built = True
+                return
+            self._entries[ROOT_KEY] = meta_from_stat(True, stat)
+            self._scan_tree(ROOT_KEY)
+            self._built = True
+
+    def entries(self) -> List[Tuple[str, EntryMeta]]:
+        """Every indexed entry, building the index first if needed."""
+        with self._lock:
+            self.ensure_built()
+            return list(self._entries.items())
+
+    def load(self, entries: Iterable[Tuple[str, EntryMeta]], stale: Optional[Iterable[str]] = None) -> None:
+        """Adopt entries indexed elsewhere (another worker, the catalog) instead of walking the vault.
+
+        Stale entries are re-read from disk - one stat, or one scandir for a
+        directory - the first time they are looked up: a snapshot that is
+        behind the disk costs extra reads, never wrong answers.
+
+        Args:
+            entries: (key, metadata) pairs covering the whole vault
+            stale: Keys that may be behind the disk; None marks every entry
+                stale, for a snapshot of unknown age
+        """
+        with self._lock:
+            self._entries.clear()
+            self._children.clear()
+            self._stale.clear()
+            for key, meta in entries:
+                self._entries[key] = meta
+                if meta.type == "directory":
+                    self._children.setdefault(key, set())
+                if key != ROOT_KEY:
+                    self._children.setdefault(_parent(key), set()).add(key.rpartition("/")[2])
+            self._stale.update(self._entries if stale is None else (key for key in stale if key in self._entries))
+            self._built = ROOT_KEY in self._entries
+            if not self._built:
+                self.build()
+
+    def ensure_built(self) -> None:
+        if not self._built:
+            self.build()
+
+    def _scan_tree(self, key: str, emit: bool = False) -> None:
+        """Populate children of a directory key, recursing into subdirectories."""
+        pending = [key]
+        while pending:
+            current = pending.pop()
+            names = set()
+            try:
+                with os.scandir(self._abs(current)) as it:
+                    for entry in it:
+                        if current == ROOT_KEY and entry.name == META_DIR:
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                            if not is_dir and not entry.is_file():
+                                continue
+                            meta = meta_from_stat(is_dir, entry.stat())
+                        except OSError:
+                            continue
+                        child = _join(current, entry.name)
+                        names.add(entry.name)
+                        self._entries[child] = meta
+                        if emit:
+                            self._emit("created", child, meta)
+                        if is_dir:
+                            pending.append(child)
+            except OSError:
+                pass
+            self._children[current] = names
+
+    def _drop(self, key: str) -> None:
+        """Remove a key and everything below it."""
+        pending = [key]
+        while pending:
+            current = pending.pop()
+            self._entries.pop(current, None)
+            self._stale.discard(current)
+            for name in self._children.pop(current, ()):
+                pending.append(_join(current, name))
+
+    def refresh(self, relative_path: str) -> Optional[EntryMeta]:
+        """Re-read a single entry (and its place in its parent) from disk.
+
+        Directories that are new to the index are scanned recursively; for
+        known directories the child name set is reconciled with disk.
+        """
+        key = self.key_for(relative_path)
+        if is_meta_key(key):
+            return None
+        with self._lock:
+            self.ensure_built()
+            self._stale.discard(key)
+            path = self._abs(key)
+            try:
+                stat = path.stat()
+                is_dir = path.is_dir()
+                if not is_dir and not path.is_file():
+                    raise FileNotFoundError(path)
+            except OSError:
+                previous = self._entries.get(key)
+                self._drop(key)
+                if previous is not None:
+                    self._emit("deleted", key, None)
+                if key != ROOT_KEY:
+                    self._children.get(_parent(key), set()).discard(key.rpartition("/")[2])
+                return None
+
+            previous = self._entries.get(key)
+            meta = meta_from_stat(is_dir, stat)
+            self._entries[key] = meta
+            if previous is not None and previous.type != meta.type:
+                for name in self._children.pop(key, ()):
+                    self._drop(_join(key, name))
+                self._emit("deleted", key, None)
+                previous = None
+            if previous is None:
+                self._emit("created", key, meta)
+            elif meta.type == "file" and (previous.mtime_ns, previous.size) != (meta.mtime_ns, meta.size):
+                self._emit("modified", key, meta)
+
+            if key != ROOT_KEY:
+                parent = _parent(key)
+                if parent not in self._entries:
+                    self.refresh(parent)
+                self._children.setdefault(parent, set()).add(key.rpartition("/")[2])
+
+            if is_dir:
+                if key not in self._children:
+                    self._scan_tree(key, emit=True)
+                else:
+                    self._reconcile_children(key)
+            return meta
+
+    def _reconcile_children(self, key: str) -> None:
+        try:
+            with os.scandir(self._abs(key)) as it:
+                on_disk = {
+                    entry.name for entry in it
+                    if (entry.is_dir() or entry.is_file()) and not (key == ROOT_KEY and entry.name == META_DIR)
+                }
+        except OSError:
+            on_disk = set()
+        known = self._children.setdefault(key, set())
+        for name in known - on_disk:
+            child = _join(key, name)
+            existed = child in self._entries
+            self._drop(child)
+            known.discard(name)
+            if existed:
+                self._emit("deleted", child, None)
+        for name in on_disk - known:
+            self.refresh(_join(key, name))
+
+    def invalidate(self, relative_path: str) -> None:
+        """Mark an entry and its parent as stale so they are re-read on next access."""
+        key = self.key_for(relative_path)
+        if is_meta_key(key):
+            return
+        with self._lock:
+            self._stale.add(key)
+            if key != ROOT_KEY:
+                self._stale.add(_parent(key))
+        for callback in self._subscribers:
+            callback(key)
+
+    def observed(self, relative_path: str) -> None:
+        """Invalidate a path reported by the file system, unless its indexed
+        stat is current, as after a write made through the vault.
+
+        A same-size external edit within the file system's timestamp
+        granularity of such a write goes unnoticed.
+        """
+        key = self.key_for(relative_path)
+        if is_meta_key(key):
+            return
+        with self._lock:
+            known = self._entries.get(key)
+            if known is not None and key not in self._stale:
+                try:
+                    stat = self._abs(key).stat()
+                except OSError:
+                    stat = None
+                if stat is not None and meta_from_stat(S_ISDIR(stat.st_mode), stat) == known:
+                    return
+        self.invalidate(key)
+
+    def moved(self, src_path: str, dest_path: str) -> None:
+        """Apply a rename reported by the filesystem as a single change."""
+        src, dest = self.key_for(src_path), self.key_for(dest_path)
+        if is_meta_key(src) or is_meta_key(dest):
+            self.invalidate(src_path)
+            self.invalidate(dest_path)
+            return
+        with self._lock:
+            self.ensure_built()
+            known = self._entries.get(src) is not None
+            self._muted = known
+            try:
+                self.refresh(src)
+                meta = self.refresh(dest)
+            finally:
+                self._muted = False
+            if known and meta is not None:
+                self._emit("renamed", dest, meta, previous_key=src)
+        for callback in self._subscribers:
+            callback(src)
+            callback(dest)
+
+    def _revalidate(self, key: str) -> None:
+        if key in self._stale:
+            self.refresh(key)
+        # A new entry may only be visible once its parent has been re-read
+        if key not in self._entries and key != ROOT_KEY:
+            parent = _parent(key)
+            if parent in self._stale:
+                self.refresh(parent)
+
+    def get(self, relative_path: str) -> Optional[EntryMeta]:
+        """Return cached metadata for a path, or None if it doesn't exist."""
+        key = self.key_for(relative_path)
+        with self._lock:
+            self.ensure_built()
+            self._revalidate(key)
+            return self._entries.get(key)
+
+    def children(self, relative_path: str) -> List[str]:
+        """Return the keys of a directory's direct children, sorted."""
+        key = self.key_for(relative_path)
+        with self._lock:
+            self.ensure_built()
+            self._revalidate(key)
+            for name in list(self._children.get(key, ())):
+                self._revalidate(_join(key, name))
+            return sorted(_join(key, name) for name in self._children.get(key, ()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _EventHandler:
+    """Watchdog event handler (observers only call dispatch) feeding a VaultWatcher."""
+
+    def __init__(self, watcher: "VaultWatcher"):
+        self.watcher = watcher
+
+    def dispatch(self, event) -> None:
+        self.watcher.on_event(event)
+
+class VaultWatcher:
+    """Feeds filesystem changes into a MetadataIndex.
+
+    Uses watchdog (inotify/FSEvents/ReadDirectoryChangesW) when it is
+    installed, otherwise falls back to a background thread that re-stats
+    the whole vault every poll_interval seconds (0 disables it) and
+    invalidates whatever changed. Changes the index already knows about,
+    such as the vault's own writes, are skipped.
+    """
+
+    def __init__(self, index: MetadataIndex, poll_interval: float = 5.0, observer_factory: Optional[Callable[[], object]] = None):
+        self.index = index
+        self.poll_interval = poll_interval
+        self.observer_factory = observer_factory
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._previous: Optional[Dict[str, tuple]] = None
+
+    def _relative(self, path: str) -> Optional[str]:
+        try:
+            return str(Path(path).relative_to(self.index.vault_dir))
+        except ValueError:
+            return None
+
+    def _on_path(self, path: str) -> None:
+        relative = self._relative(path)
+        if relative is not None:
+            self.index.observed(relative)
+
+    def _on_move(self, src_path: str, dest_path: str) -> None:
+        src, dest = self._relative(src_path), self._relative(dest_path)
+        if src is not None and is_meta_key(self.index.key_for(src)):
+            # A vault write renaming its temp file into place
+            self._on_path(dest_path)
+        elif src is not None and dest is not None:
+            self.index.moved(src, dest)
+        else:
+            self._on_path(src_path)
+            self._on_path(dest_path)
+
+    def on_event(self, event) -> None:
+        """Apply a watchdog event."""
+        if event.event_type not in WATCHED_EVENTS:
+            return
+        if event.event_type == "modified" and event.is_directory:
+            # Implied by the created/deleted/moved events of its children
+            return
+        if event.event_type == "moved":
+            self._on_move(event.src_path, event.dest_path)
+        else:
+            self._on_path(event.src_path)
+
+    def start(self) -> None:
+        factory = self.observer_factory
+        if factory is None:
+            try:
+                from watchdog.observers import Observer as factory
+            except ImportError:
+                if self.poll_interval > 0:
+                    self._thread = threading.Thread(target=self._poll, name="vault-watcher", daemon=True)
+                    self._thread.start()
+                return
+        self._observer = factory()
+        self._observer.schedule(_EventHandler(self), str(self.index.vault_dir), recursive=True)
+        self._observer.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        pending = [ROOT_KEY]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(self.index._abs(current)) as it:
+                    for entry in it:
+                        if current == ROOT_KEY and entry.name == META_DIR:
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        child = _join(current, entry.name)
+                        snapshot[child] = (is_dir, stat.st_mtime_ns, stat.st_size)
+                        if is_dir:
+                            pending.append(child)
+            except OSError:
+                continue
+        return snapshot
+
+    def poll_once(self) -> None:
+        """Diff the vault against the previous snapshot and invalidate changes."""
+        current = self._snapshot()
+        if self._previous is not None:
+            for key in self._previous.keys() | current.keys():
+                if self._previous.get(key) != current.get(key):
+                    self.index.observed(key)
+        self._previous = current
+
+    def _poll(self) -> None:
+        self.poll_once()
+        while not self._stop.wait(self.poll_interval):
+            self.poll_once()
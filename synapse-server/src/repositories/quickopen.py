@@ -0,0 +1,379 @@
+# quickopen.py
+import heapq
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from itertools import islice, repeat
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+
+from .metadata_index import IndexChange, MetadataIndex
+from .vault import SUPPORTED_SUFFIXES
+
+# fzf's (v1) scoring constants
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = 8
+BONUS_DELIMITER = 9  # right after "/"
+BONUS_CAMEL = 7
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+# Path-specific extras: a match inside the file name beats one spread over
+# directories, and recently modified files float up
+BONUS_FILENAME = 2 * SCORE_MATCH
+BONUS_RECENT = 2 * SCORE_MATCH
+RECENT_HALF_LIFE = 3 * 24 * 3600
+
+# Per query: at most this many matches are scored, out of at most this many
+# candidates checked per tier; see PathIndex
+MAX_SCORED = 200
+MAX_CHECKED = 2000
+
+class QuickOpenHit(TypedDict):
+    path: str
+    score: float
+    positions: List[int]  # matched character offsets in path, for highlighting
+
+def _bonus(previous: str, current: str) -> int:
+    if previous == "/":
+        return BONUS_DELIMITER
+    if previous in " _-.":
+        return BONUS_BOUNDARY
+    if (previous.islower() and current.isupper()) or (not previous.isdigit() and current.isdigit()):
+        return BONUS_CAMEL
+    return 0
+
+def _window(query: str, lower: str, start: int) -> Optional[Tuple[int, int]]:
+    """The shortest-ending match window of query in lower[start:] (fzf v1):
+    leftmost end found forwards, then the tightest start found backwards."""
+    position = start - 1
+    for char in query:
+        position = lower.find(char, position + 1)
+        if position < 0:
+            return None
+    end = position
+    position = end + 1
+    for char in reversed(query):
+        position = lower.rfind(char, start, position)
+    return position, end
+
+def score_path(query: str, path: str, lower: str, name_start: int) -> Optional[Tuple[int, List[int]]]:
+    """fzf v1 score of a lowercase query against a path, with matched positions.
+
+    The match is taken inside the file name when the whole query fits
+    there, and in the whole path otherwise.
+    """
+    window = _window(query, lower, name_start)
+    in_name = window is not None
+    if not in_name:
+        window = _window(query, lower, 0)
+        if window is None:
+            return None
+    start, end = window
+    score = BONUS_FILENAME if in_name else 0
+    positions = []
+    query_index = consecutive = first_bonus = 0
+    in_gap = False
+    for index in range(start, end + 1):
+        if query_index < len(query) and lower[index] == query[query_index]:
+            bonus = _bonus(path[index - 1] if index else "/", path[index])
+            if consecutive == 0:
+                first_bonus = bonus
+            else:
+                if bonus >= BONUS_BOUNDARY and bonus > first_bonus:
+                    first_bonus = bonus
+                bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+            score += SCORE_MATCH + (bonus * BONUS_FIRST_CHAR_MULTIPLIER if query_index == 0 else bonus)
+            positions.append(index)
+            query_index += 1
+            consecutive += 1
+            in_gap = False
+        else:
+            score += SCORE_GAP_EXTENSION if in_gap else SCORE_GAP_START
+            in_gap = True
+            consecutive = first_bonus = 0
+    return score, positions
+
+
+_ZERO_ONE = bytes.maketrans(b"\x00\x01", b"01")
+
+def _bitset(flags: bytes) -> int:
+    """An int with bit i set where flags[i] is 1."""
+    return int(flags.translate(_ZERO_ONE)[::-1], 2) if flags else 0
+
+def _fold(path: str) -> str:
+    # Lowercase, unless that changes the length (a few non-ASCII letters do)
+    # and with it every offset
+    lower = path.lower()
+    return lower if len(lower) == len(path) else path
+
+def _subsequence(query: str) -> "re.Pattern":
+    """A pattern matching text that contains query as a subsequence; the
+    possessive runs make it a single left-to-right scan."""
+    return re.compile("".join(f"[^{char}]*+{char}" for char in map(re.escape, query)))
+
+# Character bitset families: paths containing a character, file names
+# containing it, file names starting with it
+FAMILIES = ("path", "name", "first")
+
+def _family_texts(lower: str) -> Dict[str, str]:
+    name = lower[lower.rfind("/") + 1:]
+    return {"path": lower, "name": name, "first": name[:1]}
+
+def _compute_bitsets(lower: str, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """Bitsets for (family, character) pairs over the "\\n"-joined paths."""
+    paths = lower.split("\n")[1:-1]
+    names = list(map(itemgetter(2), map(str.rpartition, paths, repeat("/"))))
+    tests = {"path": (paths, str.__contains__), "name": (names, str.__contains__), "first": (names, str.startswith)}
+    bits = {}
+    for family, char in keys:
+        lines, test = tests[family]
+        bits[family, char] = _bitset(bytes(map(test, lines, repeat(char))))
+    return bits
+
+class PathIndex:
+    """Fuzzy "quick open" matching over every .md/.chat path in the vault.
+
+    Paths live in one "\\n"-joined string, in slots ordered by modification
+    time (oldest first), with their offsets and mtimes in arrays - 100k
+    paths cost a few MB and no per-path objects. Matches are scored
+    fzf-style (word boundaries, consecutive runs, gaps), plus a bonus for
+    matching within the file name and one that decays with the time since
+    the file was modified.
+
+    Scoring runs in Python, so only up to MAX_SCORED matches are scored.
+    Candidates come from bitsets (plain ints, one bit per slot) of the
+    paths containing each character, the file names containing it and the
+    file names starting with it: ANDed together for the query's
+    characters they give, strictest first, the file names starting like
+    the query and containing all of it, the file names containing it, and
+    the paths containing it. Each set is walked newest slot first and
+    checked for an in-order match until enough are found. Bitsets are
+    computed on first use, or up front by warm().
+
+    MetadataIndex changes, which include every VaultManager create and
+    update, are queued and applied on the next query: a new or modified
+    path moves to a fresh slot at the end and its old slot is tombstoned.
+    Everything is rebuilt from the index when tombstones pile up, or when a
+    directory is renamed or removed.
+    """
+
+    def __init__(self, index: MetadataIndex, clock: Callable[[], float] = time.time):
+        self.index = index
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._text = "\n"
+        self._lower = "\n"
+        self._starts = array("I")  # offset of each slot's path in the strings
+        self._names = array("I")  # offset of its file name
+        self._mtimes = array("d")  # -1 for removed paths
+        self._live = 0
+        self._removed = 0
+        self._bits: Dict[Tuple[str, str], int] = {}
+        self._queued: Dict[str, Optional[float]] = {}  # path -> new mtime, None to remove
+        self._stale = True
+        self._version = 0  # bumped by every change
+        self._generation = 0  # bumped by every rebuild
+        index.on_change(self.apply_change)
+
+    @staticmethod
+    def _wanted(key: str) -> bool:
+        return key.endswith(SUPPORTED_SUFFIXES)
+
+    def apply_change(self, change: IndexChange) -> None:
+        """MetadataIndex change listener; runs under the index lock, so it
+        only queues."""
+        with self._lock:
+            self._version += 1
+            if self._stale:
+                return  # the next query reads the whole index anyway
+            if change.meta is not None and change.meta.type == "directory":
+                # A directory renamed or moved in brings a whole subtree
+                self._stale = change.kind != "modified"
+            elif change.meta is None and not self._wanted(change.key):
+                # Most likely a directory, taking its subtree with it
+                self._stale = True
+            else:
+                if change.previous_key is not None:
+                    self._queued[change.previous_key] = None
+                if self._wanted(change.key):
+                    self._queued[change.key] = None if change.meta is None else change.meta.modified_at
+
+    def _refresh(self) -> None:
+        # The index is read without holding our lock (listeners take it
+        # under the index lock); a change landing meanwhile means reading
+        # it again
+        while True:
+            with self._lock:
+                if not self._stale:
+                    self._flush()
+                    return
+                version = self._version
+            entries = [(meta.modified_at, key) for key, meta in self.index.entries()
+                       if meta.type == "file" and self._wanted(key)]
+            with self._lock:
+                if self._version == version:
+                    self._rebuild(entries)
+
+    def _rebuild(self, entries: List[Tuple[float, str]]) -> None:
+        entries.sort()
+        self._text = "\n" + "".join(path + "\n" for _, path in entries)
+        self._lower = "\n" + "".join(_fold(path) + "\n" for _, path in entries)
+        self._starts = array("I")
+        self._names = array("I")
+        offset = 1
+        for _, path in entries:
+            self._starts.append(offset)
+            self._names.append(offset + path.rfind("/") + 1)
+            offset += len(path) + 1
+        self._mtimes = array("d", (mtime for mtime, _ in entries))
+        self._live = (1 << len(entries)) - 1
+        self._removed = 0
+        self._bits = {}
+        self._queued = {}
+        self._stale = False
+        self._generation += 1
+
+    def _path(self, slot: int) -> str:
+        start = self._starts[slot]
+        return self._text[start:self._text.index("\n", start)]
+
+    def _find(self, path: str) -> Optional[int]:
+        # The last occurrence: earlier ones are tombstones of the same path
+        position = self._text.rfind("\n" + path + "\n")
+        if position < 0:
+            return None
+        slot = bisect_right(self._starts, position + 1) - 1
+        return slot if self._mtimes[slot] >= 0 else None
+
+    def _flush(self) -> None:
+        """Apply queued changes; called with the lock held."""
+        if not self._queued:
+            return
+        queued, self._queued = self._queued, {}
+        if len(queued) > 16:
+            # One pass over all paths beats a scan of the text per path
+            lines = self._text.split("\n")
+            find = {lines[slot + 1]: slot for slot in self._slots(self._live)}.get
+        else:
+            find = self._find
+        added = []
+        for path, mtime in queued.items():
+            slot = find(path)
+            if slot is not None:
+                self._mtimes[slot] = -1
+                self._live &= ~(1 << slot)
+                self._removed += 1
+            if mtime is not None:
+                added.append((mtime, path))
+        if self._removed > len(self._starts) // 4:
+            self._rebuild([(self._mtimes[slot], self._path(slot)) for slot in self._slots(self._live)] + added)
+            return
+        added.sort()
+        offset = len(self._text)
+        for mtime, path in added:
+            slot = len(self._starts)
+            self._starts.append(offset)
+            self._names.append(offset + path.rfind("/") + 1)
+            self._mtimes.append(mtime)
+            offset += len(path) + 1
+            self._live |= 1 << slot
+            self._add_bits(slot, path, list(self._bits))
+        self._text += "".join(path + "\n" for _, path in added)
+        self._lower += "".join(_fold(path) + "\n" for _, path in added)
+
+    def _add_bits(self, slot: int, path: str, keys: List[Tuple[str, str]]) -> None:
+        texts = _family_texts(_fold(path))
+        for family, char in keys:
+            if char in texts[family]:
+                self._bits[family, char] |= 1 << slot
+
+    def _bitsets(self, keys: List[Tuple[str, str]]) -> List[int]:
+        """Bitsets for (family, character) pairs, computing missing ones;
+        called with the lock held."""
+        missing = [key for key in dict.fromkeys(keys) if key not in self._bits]
+        if missing:
+            self._bits.update(_compute_bitsets(self._lower, missing))
+        return [self._bits[key] for key in keys]
+
+    def warm(self) -> None:
+        """Compute the bitsets of every character in use, so that first
+        queries don't pay for them. Runs without holding the lock for long:
+        paths added meanwhile are caught up afterwards."""
+        self._refresh()
+        with self._lock:
+            lower, count, generation = self._lower, len(self._starts), self._generation
+            keys = [(family, char) for family in FAMILIES for char in sorted(set(lower) - {"\n"})
+                    if (family, char) not in self._bits]
+        bits = _compute_bitsets(lower, keys)
+        with self._lock:
+            if self._generation != generation:
+                return  # rebuilt meanwhile
+            keys = [key for key in keys if key not in self._bits]
+            self._bits.update((key, bits[key]) for key in keys)
+            for slot in range(count, len(self._starts)):
+                self._add_bits(slot, self._path(slot), keys)
+
+    @staticmethod
+    def _slots(bits: int) -> Iterator[int]:
+        """Set bits of an int, highest (most recently modified) first."""
+        digits = bin(bits)
+        top = len(digits) - 1
+        index = digits.find("1", 2)
+        while index > 0:
+            yield top - index
+            index = digits.find("1", index + 1)
+
+    def _candidates(self, query: str) -> List[int]:
+        chars = sorted(set(query))
+        path_bits = name_bits = self._live
+        for bitset in self._bitsets([("path", char) for char in chars]):
+            path_bits &= bitset
+        for bitset in self._bitsets([("name", char) for char in chars]):
+            name_bits &= bitset
+        first_bits = name_bits & self._bitsets([("first", query[0])])[0]
+        tiers = [(first_bits, True), (name_bits & ~first_bits, True), (path_bits & ~name_bits, False)]
+        match = _subsequence(query).match
+        text = self._lower
+        found = []
+        for bits, in_name in tiers:
+            starts = self._names if in_name else self._starts
+            checked = 0
+            for slot in self._slots(bits):
+                start = starts[slot]
+                if match(text, start, text.index("\n", start)):
+                    found.append(slot)
+                    if len(found) == MAX_SCORED:
+                        return found
+                checked += 1
+                if checked == MAX_CHECKED:
+                    break
+        return found
+
+    def search(self, query: str, limit: int = 20) -> List[QuickOpenHit]:
+        """Top `limit` paths for a query, best first; the most recently
+        modified ones for an empty query. Whitespace in the query is ignored."""
+        query = "".join(query.lower().split())
+        self._refresh()
+        with self._lock:
+            if not query:
+                return [QuickOpenHit(path=self._path(slot), score=0.0, positions=[])
+                        for slot in heapq.nlargest(limit, islice(self._slots(self._live), MAX_SCORED), key=self._mtimes.__getitem__)]
+            now = self.clock()
+            scored = []
+            for slot in self._candidates(query):
+                path = self._path(slot)
+                score, positions = score_path(query, path, _fold(path), path.rfind("/") + 1)
+                age = max(0.0, now - self._mtimes[slot])
+                scored.append((score + BONUS_RECENT * 0.5 ** (age / RECENT_HALF_LIFE), -len(path), path, positions))
+        best = heapq.nlargest(limit, scored, key=lambda item: item[:3])
+        return [QuickOpenHit(path=path, score=round(score, 2), positions=positions) for score, _, path, positions in best]
+
+    def __len__(self) -> int:
+        self._refresh()
+        with self._lock:
+            return self._live.bit_count()
@@ -0,0 +1,261 @@
+# search.py
+import html
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, TypedDict
+
+from .metadata_index import META_DIR, ROOT_KEY
+from .vault import SUPPORTED_SUFFIXES
+
+TOKEN_RE = re.compile(r"\w+")
+
+# snippet() brackets matches with these, swapped for <mark> after escaping
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+# Commit reindexing work in batches so readers aren't starved during a rebuild
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+class SearchHit(TypedDict):
+    path: str
+    title: str
+    score: float
+    snippet: str  # HTML: escaped document text, matches in <mark>
+
+def _highlight(snippet: str) -> str:
+    """Escape snippet text as HTML, then turn the match markers into <mark>."""
+    return html.escape(snippet, quote=False).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+def _title(relative_path: str) -> str:
+    return os.path.splitext(os.path.basename(relative_path))[0]
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression.
+
+    Every token is quoted (so user input can't inject FTS syntax) and
+    prefix-matched, and all tokens must match.
+    """
+    tokens = TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}" *' for token in tokens)
+
+class SearchIndex:
+    """Full-text index over .md and .chat documents, persisted with SQLite FTS5.
+
+    FTS5 provides the inverted index, unicode tokenization, BM25 ranking,
+    prefix matching and snippet extraction. The index stores each document's
+    mtime/size so that files changed outside the API are re-indexed lazily:
+    either because a watcher marked them dirty or during reconcile().
+    """
+
+    def __init__(self, vault_dir: Path, db_path: Optional[Path] = None):
+        self.vault_dir = vault_dir
+        self.db_path = db_path or vault_dir / META_DIR / "search.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        # Title matches weigh more than body matches; ORDER BY rank uses this
+        self._conn.execute("INSERT INTO documents_fts(documents_fts, rank) VALUES('rank', 'bm25(10.0, 1.0)')")
+        self._conn.commit()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._dirty: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._reconcile_started = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection, so queries don't serialize on writes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _upsert(self, relative_path: str, content: str, mtime_ns: int, size: int) -> None:
+        row = self._conn.execute("SELECT id FROM documents WHERE path = ?", (relative_path,)).fetchone()
+        if row is None:
+            doc_id = self._conn.execute(
+                "INSERT INTO documents(path, mtime_ns, size) VALUES (?, ?, ?)",
+                (relative_path, mtime_ns, size),
+            ).lastrowid
+        else:
+            doc_id = row[0]
+            self._conn.execute("UPDATE documents SET mtime_ns = ?, size = ? WHERE id = ?", (mtime_ns, size, doc_id))
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+        self._conn.execute(
+            "INSERT INTO documents_fts(rowid, title, body) VALUES (?, ?, ?)",
+            (doc_id, _title(relative_path), content),
+        )
+
+    def _delete(self, relative_path: str, recursive: bool = False) -> None:
+        if recursive:
+            prefix = relative_path.rstrip("/") + "/"
+            rows = self._conn.execute(
+                "SELECT id FROM documents WHERE path = ? OR substr(path, 1, ?) = ?",
+                (relative_path, len(prefix), prefix),
+            ).fetchall()
+        else:
+            rows = self._conn.execute("SELECT id FROM documents WHERE path = ?", (relative_path,)).fetchall()
+        for (doc_id,) in rows:
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def document_written(self, relative_path: str, content: Optional[str]) -> None:
+        """VaultManager write listener: index the new content immediately."""
+        if not relative_path.endswith(SUPPORTED_SUFFIXES):
+            return
+        if content is None:
+            # Partial write: re-read lazily before the next query
+            self.mark_dirty(relative_path)
+            return
+        try:
+            stat = (self.vault_dir / relative_path).stat()
+        except OSError:
+            return
+        with self._write_lock, self._conn:
+            self._upsert(relative_path, content, stat.st_mtime_ns, stat.st_size)
+
+    def mark_dirty(self, relative_path: str) -> None:
+        """MetadataIndex subscriber: re-check this path before the next query."""
+        with self._dirty_lock:
+            self._dirty.add(relative_path)
+
+    def _scan(self, relative_dir: str) -> Dict[str, Tuple[int, int]]:
+        """Collect (mtime_ns, size) for supported documents below a directory."""
+        found = {}
+        base = self.vault_dir if relative_dir == ROOT_KEY else self.vault_dir / relative_dir
+        prefix = "" if relative_dir == ROOT_KEY else relative_dir + "/"
+        pending = [(base, prefix)]
+        while pending:
+            directory, rel_prefix = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if not rel_prefix and entry.name == META_DIR:
+                            continue
+                        try:
+                            if entry.is_dir():
+                                pending.append((entry.path, rel_prefix + entry.name + "/"))
+                            elif entry.is_file() and entry.name.endswith(SUPPORTED_SUFFIXES):
+                                stat = entry.stat()
+                                found[rel_prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def _stored(self, relative_dir: str) -> Dict[str, Tuple[int, int]]:
+        conn = self._reader()
+        if relative_dir == ROOT_KEY:
+            rows = conn.execute("SELECT path, mtime_ns, size FROM documents")
+        else:
+            prefix = relative_dir + "/"
+            rows = conn.execute(
+                "SELECT path, mtime_ns, size FROM documents WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def _reindex(self, changed: List[str], removed: List[str]) -> None:
+        for start in range(0, len(removed), BATCH_SIZE):
+            with self._write_lock, self._conn:
+                for path in removed[start:start + BATCH_SIZE]:
+                    self._delete(path)
+        for start in range(0, len(changed), BATCH_SIZE):
+            batch = []
+            for path in changed[start:start + BATCH_SIZE]:
+                full_path = self.vault_dir / path
+                try:
+                    stat = full_path.stat()
+                    content = full_path.read_text(encoding="utf-8", errors="replace")
+                except OSError:
+                    continue
+                batch.append((path, content, stat.st_mtime_ns, stat.st_size))
+            with self._write_lock, self._conn:
+                for args in batch:
+                    self._upsert(*args)
+
+    def reconcile(self, relative_dir: str = ROOT_KEY) -> None:
+        """Bring the index in line with disk for a subtree, comparing mtime/size."""
+        self._reconcile_started = True
+        on_disk = self._scan(relative_dir)
+        stored = self._stored(relative_dir)
+        changed = [path for path, stamp in on_disk.items() if stored.get(path) != stamp]
+        removed = [path for path in stored if path not in on_disk]
+        self._reindex(changed, removed)
+
+    def _indexed_as_on_disk(self, key: str, path: Path) -> bool:
+        # Another process sharing the database may have indexed it already
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        row = self._reader().execute("SELECT mtime_ns, size FROM documents WHERE path = ?", (key,)).fetchone()
+        return row is not None and tuple(row) == (stat.st_mtime_ns, stat.st_size)
+
+    def assume_reconciled(self) -> None:
+        """Skip the reconcile the first search would run: another process
+        sharing the database keeps it in line with disk."""
+        self._reconcile_started = True
+
+    def _apply_dirty(self) -> None:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            path = self.vault_dir if key == ROOT_KEY else self.vault_dir / key
+            if path.is_dir():
+                self.reconcile(key)
+            elif path.is_file():
+                if key.endswith(SUPPORTED_SUFFIXES) and not self._indexed_as_on_disk(key, path):
+                    self._reindex([key], [])
+            else:
+                with self._write_lock, self._conn:
+                    self._delete(key, recursive=True)
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Rank documents matching all query terms (as prefixes) with BM25."""
+        if not self._reconcile_started:
+            self.reconcile()
+        self._apply_dirty()
+        match = build_match_query(query)
+        if match is None:
+            return []
+        rows = self._reader().execute(
+            """
+            SELECT d.path, documents_fts.title, -documents_fts.rank,
+                   snippet(documents_fts, 1, char(2), char(3), '…', 12)
+            FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+            ORDER BY documents_fts.rank
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+        return [SearchHit(path=path, title=title, score=score, snippet=_highlight(snippet)) for path, title, score, snippet in rows]
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT count(*) FROM documents").fetchone()[0]
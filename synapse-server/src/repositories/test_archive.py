@@ -0,0 +1,113 @@
+import io
+import tarfile
+import pytest
+from .archive import TarExport, import_tar, InvalidArchiveError, IMPORT_BATCH_FILES
+from .metadata_index import MetadataIndex
+from .vault import VaultManager, InvalidPathError
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to provide a VaultManager over a temporary vault"""
+    root = tmp_path / "vault"
+    root.mkdir()
+    return VaultManager(root)
+
+def _tar(members):
+    """An in-memory archive of (name, bytes) files; None content makes a directory."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+            if content is None:
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            else:
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+@pytest.mark.parametrize("format", ["tar", "tar.gz"])
+def test_export_round_trips(vault, tmp_path, format):
+    """Test that an exported subtree unpacks to the same documents and directories"""
+    vault.create_file("notes/a.md", "alpha")
+    vault.create_file("notes/deep/ü.md", "x" * 3_000_000)
+    vault.create_directory("notes/empty")
+    vault.create_file("other.md", "outside")
+    (vault.vault_dir / "notes" / "image.png").write_bytes(b"\x89PNG")
+
+    data = b"".join(TarExport(vault, "notes", format))
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+        assert tar.getnames() == ["a.md", "deep", "deep/ü.md", "empty"]
+        assert tar.extractfile("deep/ü.md").read() == b"x" * 3_000_000
+
+    restored = VaultManager(tmp_path / "restored")
+    (tmp_path / "restored").mkdir()
+    report = import_tar(restored, io.BytesIO(data), dest="copy")
+    assert (report["files"], report["directories"], report["skipped"]) == (2, 2, 0)
+    assert report["bytes"] == 3_000_005
+    assert restored.get_document("copy/a.md")["content"] == "alpha"
+    assert (tmp_path / "restored" / "copy" / "empty").is_dir()
+
+def test_import_skips_unsafe_members(vault):
+    """Test that escaping, reserved, unsupported, linked and binary members are reported, not written"""
+    archive = _tar([
+        ("../escape.md", b"no"),
+        ("/etc/absolute.md", b"no"),
+        (".synapse/tmp/x.md", b"no"),
+        ("image.png", b"no"),
+        ("binary.md", b"\xff\xfe"),
+        ("ok.md", b"fine"),
+    ])
+    report = import_tar(vault, archive)
+    assert report["files"] == 1
+    assert report["skipped"] == 5
+    assert [error["path"] for error in report["errors"]] == ["../escape.md", "/etc/absolute.md", ".synapse/tmp/x.md", "image.png", "binary.md"]
+    assert not (vault.vault_dir.parent / "escape.md").exists()
+    assert sorted(path.name for path in vault.vault_dir.iterdir()) == [".synapse", "ok.md"]
+    assert list(vault.writer.temp_dir.iterdir()) == []
+
+    with pytest.raises(InvalidPathError):
+        import_tar(vault, _tar([]), dest="../elsewhere")
+
+def test_import_batches_and_updates_index(vault):
+    """Test that batched imports reach the index and listeners, and honour overwrite"""
+    index = MetadataIndex(vault.vault_dir)
+    index.build()
+    seen = []
+    vault = VaultManager(vault.vault_dir, index=index, listeners=[lambda path, content: seen.append((path, content))])
+    vault.create_file("n0.md", "mine")
+    seen.clear()
+    count = IMPORT_BATCH_FILES + 10
+    archive = _tar([(f"n{i}.md", f"note {i}".encode()) for i in range(count)])
+
+    report = import_tar(vault, archive, overwrite=False)
+    assert (report["files"], report["skipped"]) == (count - 1, 1)
+    assert vault.get_document("n0.md")["content"] == "mine"
+    assert index.get(f"n{count - 1}.md").size == len(f"note {count - 1}")
+    assert len(seen) == count - 1 and seen[0] == ("n1.md", None)
+
+def test_truncated_archive_keeps_complete_members(vault):
+    """Test that a damaged archive raises after importing what preceded the damage"""
+    data = _tar([("a.md", b"first"), ("b.md", b"y" * 4096)]).getvalue()
+    with pytest.raises(InvalidArchiveError):
+        import_tar(vault, io.BytesIO(data[:1024 + 512]))
+    assert (vault.vault_dir / "a.md").read_text() == "first"
+    assert not (vault.vault_dir / "b.md").exists()
+    assert list(vault.writer.temp_dir.iterdir()) == []
+
+def test_import_writes_under_the_write_lock(vault, monkeypatch):
+    """Test that each imported document is published under the vault's write lock, rewrites announced inside it"""
+    vault.create_file("a.md", "old")
+    events = []
+    real_lock = vault.write_lock
+
+    def write_lock(path):
+        events.append(("lock", path.name))
+        return real_lock(path)
+
+    monkeypatch.setattr(vault, "write_lock", write_lock)
+    vault.rewrite_listeners = [lambda relative: events.append(("rewrite", relative))]
+    import_tar(vault, _tar([("a.md", b"new"), ("b.md", b"b")]))
+    assert events == [("lock", "a.md"), ("rewrite", "a.md"), ("lock", "b.md")]
+    assert vault.get_document("a.md")["content"] == "new"
@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from .async_vault import AsyncVaultManager
+from .vault import VaultManager, PathNotFoundError
+
+@pytest.fixture
+def async_vault(tmp_path):
+    """Fixture to create an async vault over a small executor"""
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield AsyncVaultManager(VaultManager(tmp_path), executor)
+    executor.shutdown()
+
+def test_async_roundtrip(async_vault):
+    """Test creating, updating and reading a file through the async API"""
+    async def scenario():
+        await async_vault.create_file("a.md", "one")
+        await async_vault.update_file("a.md", "two")
+        return await async_vault.get_document("a.md")
+
+    assert asyncio.run(scenario())["content"] == "two"
+
+def test_async_errors_propagate(async_vault):
+    """Test that vault errors surface from the executor unchanged"""
+    with pytest.raises(PathNotFoundError):
+        asyncio.run(async_vault.get_document("missing.md"))
+
+def test_async_concurrent_reads(async_vault):
+    """Test that many concurrent reads share the bounded executor"""
+    async def scenario():
+        await async_vault.create_directory("notes")
+        await asyncio.gather(*(async_vault.create_file(f"notes/{i}.md", str(i)) for i in range(20)))
+        docs = await asyncio.gather(*(async_vault.get_document(f"notes/{i}.md") for i in range(20)))
+        return [doc["content"] for doc in docs]
+
+    assert asyncio.run(scenario()) == [str(i) for i in range(20)]
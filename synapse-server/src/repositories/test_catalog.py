@@ -0,0 +1,97 @@
+import os
+import pytest
+from .catalog import Catalog
+from .metadata_index import MetadataIndex
+from .vault import VaultManager, InvalidCursorError
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create a vault whose index changes and writes feed a catalog"""
+    index = MetadataIndex(tmp_path)
+    catalog = Catalog(tmp_path)
+    index.on_change(catalog.apply_change)
+    return VaultManager(tmp_path, index=index, listeners=[catalog.document_written]), catalog
+
+def test_writes_are_cataloged_with_hashes(vault):
+    """Test that vault writes show up in the catalog with their content hash"""
+    manager, catalog = vault
+    manager.create_file("notes/a.md", "hello")
+    entries = {entry["path"]: entry for entry in catalog.query(sort="path")["entries"]}
+    assert entries["notes"]["type"] == "directory"
+    assert entries["notes/a.md"]["size"] == 5
+    assert entries["notes/a.md"]["hash"] == "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"
+    manager.update_file("notes/a.md", "hello!")
+    assert catalog.content_hash("notes/a.md") == catalog.query(sort="path")["entries"][1]["hash"] != entries["notes/a.md"]["hash"]
+
+def test_query_filters_and_pages(vault, tmp_path):
+    """Test size/mtime filters, recency sort and cursors"""
+    manager, catalog = vault
+    for i, size in enumerate([10, 200, 3000]):
+        manager.create_file(f"d/f{i}.md", "x" * size)
+        os.utime(tmp_path / "d" / f"f{i}.md", (1000 + i, 1000 + i))
+        manager.index.refresh(f"d/f{i}.md")
+    assert [e["path"] for e in catalog.query(type="file", sort="-modified")["entries"]] == ["d/f2.md", "d/f1.md", "d/f0.md"]
+    assert [e["path"] for e in catalog.query(min_size=100, max_size=1000)["entries"]] == ["d/f1.md"]
+    assert [e["path"] for e in catalog.query(modified_before=1001.5, sort="size")["entries"]] == ["d/f0.md", "d/f1.md"]
+    assert catalog.query(under="d", recursive=False, limit=5)["next_cursor"] is None
+
+    first = catalog.query(type="file", sort="size", limit=2)
+    assert [e["path"] for e in first["entries"]] == ["d/f0.md", "d/f1.md"]
+    rest = catalog.query(type="file", sort="size", limit=2, cursor=first["next_cursor"])
+    assert [e["path"] for e in rest["entries"]] == ["d/f2.md"] and rest["next_cursor"] is None
+    with pytest.raises(InvalidCursorError):
+        catalog.query(sort="path", cursor=first["next_cursor"])
+
+def test_reconcile_lists_only_changed_directories(tmp_path):
+    """Test that a restart re-lists only directories whose mtime changed"""
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "note.md").write_text(name)
+    stats = Catalog(tmp_path).reconcile()
+    assert stats["directories_listed"] == 4 and stats["entries_updated"] == 6
+
+    (tmp_path / "b" / "new.md").write_text("new")
+    (tmp_path / "c" / "note.md").unlink()
+    catalog = Catalog(tmp_path)
+    stats = catalog.reconcile()
+    assert stats == {"directories_listed": 2, "directories_skipped": 2, "entries_updated": 1, "entries_deleted": 1}
+    paths = sorted(path for path, _ in catalog.entries())
+    assert paths == [".", "a", "a/note.md", "b", "b/new.md", "b/note.md", "c"]
+
+    index = MetadataIndex(tmp_path)
+    index.load(catalog.entries())
+    assert index.children("b") == ["b/new.md", "b/note.md"]
+
+def test_index_seeded_after_reconcile_relists_only_changed_directories(tmp_path, monkeypatch):
+    """Test that the first listing after seeding lists only changed directories, yet sees in-place edits"""
+    for i in range(20):
+        (tmp_path / f"d{i}").mkdir()
+        for j in range(5):
+            (tmp_path / f"d{i}" / f"n{j}.md").write_text("x")
+    Catalog(tmp_path).reconcile()
+    (tmp_path / "d3" / "new.md").write_text("new")
+    # Same directory mtime: only a stat of the file shows the edit
+    (tmp_path / "d5" / "n0.md").write_text("edited in place")
+    catalog = Catalog(tmp_path)
+    catalog.reconcile()
+    assert catalog.listed_directories() == {"d3"}
+
+    calls = []
+    for name in ("stat", "scandir"):
+        real = getattr(os, name)
+        monkeypatch.setattr(os, name, lambda *args, real=real, name=name, **kwargs: calls.append(name) or real(*args, **kwargs))
+
+    def first_listing(stale=None):
+        index = MetadataIndex(tmp_path)
+        entries = list(catalog.entries())
+        index.load(entries, stale=None if stale is None else stale | {key for key, meta in entries if meta.type == "file"})
+        calls.clear()
+        listing = {key: index.children(key) for key in index.children(".")}
+        return index, listing, calls.count("scandir")
+
+    index, listing, seeded_scans = first_listing(stale=catalog.listed_directories())
+    assert "d3/new.md" in listing["d3"]
+    assert index.get("d5/n0.md").size == len("edited in place")
+    _, all_stale, all_stale_scans = first_listing()
+    assert listing == all_stale
+    assert seeded_scans == 1 and all_stale_scans == 21
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from .changes import ChangeFeed
+from .metadata_index import MetadataIndex, VaultWatcher
+from .vault import VaultManager
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create an indexed vault with a change feed attached"""
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "a.md").write_text("alpha")
+    index = MetadataIndex(tmp_path)
+    index.build()
+    return VaultManager(tmp_path, index=index), ChangeFeed(index)
+
+def test_writes_produce_ordered_events(vault):
+    """Test that API writes become created/modified events with sequence numbers"""
+    manager, feed = vault
+    manager.create_file("notes/b.md", "bravo")
+    manager.update_file("notes/a.md", "alpha 2")
+    events = feed.since(0)
+    assert [(e["seq"], e["type"], e["path"]) for e in events] == [(1, "created", "notes/b.md"), (2, "modified", "notes/a.md")]
+    assert events[1]["size"] == len("alpha 2")
+    assert feed.since(1) == events[1:]
+
+def test_external_changes_are_reported_once(vault, tmp_path):
+    """Test that watcher invalidations are revalidated eagerly without duplicating API writes"""
+    manager, feed = vault
+    watcher = VaultWatcher(manager.index)
+    watcher.poll_once()
+    manager.update_file("notes/a.md", "from the api")
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "c.md").write_text("charlie")
+    (tmp_path / "notes" / "a.md").unlink()
+    watcher.poll_once()
+    changes = {(e["type"], e["path"]) for e in feed.since(0)}
+    assert changes == {("modified", "notes/a.md"), ("created", "new"), ("created", "new/c.md"), ("deleted", "notes/a.md")}
+
+def test_moves_are_reported_as_renames(vault, tmp_path):
+    """Test that filesystem moves become a single renamed event"""
+    manager, feed = vault
+    (tmp_path / "notes" / "a.md").rename(tmp_path / "notes" / "z.md")
+    manager.index.moved("notes/a.md", "notes/z.md")
+    [event] = feed.since(0)
+    assert (event["type"], event["path"], event["previous_path"]) == ("renamed", "notes/z.md", "notes/a.md")
+
+def test_resume_beyond_buffer_is_refused(tmp_path):
+    """Test that since() signals a gap once events have been dropped"""
+    index = MetadataIndex(tmp_path)
+    index.build()
+    feed = ChangeFeed(index, capacity=2)
+    manager = VaultManager(tmp_path, index=index)
+    for name in "abc":
+        manager.create_file(f"{name}.md", name)
+    assert feed.since(0) is None
+    assert [e["path"] for e in feed.since(1)] == ["b.md", "c.md"]
+
+def test_wait_wakes_on_new_event(vault):
+    """Test that waiters are woken by writes made from another thread"""
+    manager, feed = vault
+
+    async def scenario():
+        waiting = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0)
+        await asyncio.to_thread(manager.create_file, "notes/d.md", "delta")
+        return await waiting, await feed.wait(feed.last_seq, timeout=0.01)
+
+    assert asyncio.run(scenario()) == (True, False)
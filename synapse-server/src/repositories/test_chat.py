@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from .chat import ChatLog
+from .vault import VaultManager, PathNotFoundError, UnsupportedFileTypeError
+
+@pytest.fixture
+def chat(tmp_path):
+    """Fixture to provide a ChatLog over a temporary vault"""
+    return ChatLog(VaultManager(tmp_path))
+
+def _append(chat, count, path="talk.chat"):
+    for i in range(count):
+        chat.append(path, {"role": "user", "content": f"message {i}"})
+
+def test_append_creates_transcript_and_indexes_messages(chat, tmp_path):
+    """Test that appends write one JSON line each and report their index"""
+    first = chat.append("talk.chat", {"role": "user", "content": "hi\nthere"})
+    second = chat.append("talk.chat", {"role": "assistant", "content": "hello"})
+    assert (first["start"], second["start"], second["total"]) == (0, 1, 2)
+    lines = (tmp_path / "talk.chat").read_text().splitlines()
+    assert [json.loads(line)["content"] for line in lines] == ["hi\nthere", "hello"]
+    assert "created_at" in json.loads(lines[0])
+
+def test_windowed_reads(chat):
+    """Test that last-N and range reads return the right slice"""
+    _append(chat, 10)
+    window = chat.read("talk.chat", last=3)
+    assert (window["total"], window["start"]) == (10, 7)
+    assert [m["content"] for m in window["messages"]] == ["message 7", "message 8", "message 9"]
+    assert [m["content"] for m in chat.read("talk.chat", start=2, end=4)["messages"]] == ["message 2", "message 3"]
+    assert [m["content"] for m in chat.read("talk.chat", start=-2)["messages"]] == ["message 8", "message 9"]
+    assert len(chat.read("talk.chat", start=0, limit=4)["messages"]) == 4
+
+def test_external_appends_and_rewrites_are_picked_up(chat, tmp_path):
+    """Test that the sidecar index follows appends by other tools and rebuilds after rewrites"""
+    _append(chat, 3)
+    with open(tmp_path / "talk.chat", "a") as f:
+        f.write(json.dumps({"role": "user", "content": "external"}) + "\n")
+    assert chat.read("talk.chat", last=1)["messages"][0]["content"] == "external"
+
+    (tmp_path / "talk.chat").write_text('{"role": "user", "content": "rewritten"}\nplain text line\n')
+    window = chat.read("talk.chat", last=5)
+    assert window["total"] == 2
+    assert [m["content"] for m in window["messages"]] == ["rewritten", "plain text line"]
+
+def test_append_after_unterminated_line(chat, tmp_path):
+    """Test that a hand-written line without newline stays a separate message"""
+    (tmp_path / "talk.chat").write_text('{"role": "user", "content": "typed"}')
+    chat.append("talk.chat", {"role": "assistant", "content": "reply"})
+    assert [m["content"] for m in chat.read("talk.chat")["messages"]] == ["typed", "reply"]
+
+def test_rejects_missing_and_non_chat_paths(chat):
+    """Test that reads need an existing .chat file"""
+    with pytest.raises(PathNotFoundError):
+        chat.read("missing.chat")
+    with pytest.raises(UnsupportedFileTypeError):
+        chat.append("note.md", {"role": "user", "content": "x"})
@@ -0,0 +1,102 @@
+import socket
+import threading
+import time
+import pytest
+from .coherence import InvalidationBus, WorkerCoordinator, load_snapshot, save_snapshot
+from .metadata_index import MetadataIndex
+from .vault import VaultManager
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_snapshot_round_trip_revalidates(tmp_path):
+    """Test that a loaded snapshot is checked against disk before it is trusted"""
+    vault = tmp_path / "vault"
+    (vault / "notes").mkdir(parents=True)
+    (vault / "notes" / "a.md").write_text("a")
+    (vault / "notes" / "b.md").write_text("b")
+    index = MetadataIndex(vault)
+    index.build()
+    assert save_snapshot(index, tmp_path / "snapshot.db") == 4
+
+    (vault / "notes" / "b.md").unlink()
+    (vault / "notes" / "c.md").write_text("c")
+    (vault / "notes" / "a.md").write_text("longer")
+    follower = MetadataIndex(vault)
+    assert load_snapshot(follower, tmp_path / "snapshot.db")
+    assert follower.children("notes") == ["notes/a.md", "notes/c.md"]
+    assert follower.get("notes/a.md").size == 6
+    assert not load_snapshot(MetadataIndex(vault), tmp_path / "missing.db")
+
+def test_bus_delivers_and_drops_dead_peers(tmp_path):
+    """Test that published keys reach other workers and dead sockets are removed"""
+    sender, receiver = InvalidationBus(tmp_path), InvalidationBus(tmp_path)
+    received = []
+    done = threading.Event()
+    receiver.subscribe(lambda key: (received.append(key), len(received) == 2 and done.set()))
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    dead.bind(str(tmp_path / "1-dead.sock"))
+    dead.close()
+    sender.start()
+    receiver.start()
+    try:
+        sender.publish("notes/a.md")
+        sender.publish("notes/b.md")
+        assert done.wait(5)
+        assert received == ["notes/a.md", "notes/b.md"]
+        wait_for(lambda: not (tmp_path / "1-dead.sock").exists())
+    finally:
+        sender.stop()
+        receiver.stop()
+    assert not sender.address.exists()
+
+def test_follower_sees_leader_writes(tmp_path):
+    """Test that a write in one worker reaches another worker's index"""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "old.md").write_text("old")
+    channel = tmp_path / "channel"
+    leader = WorkerCoordinator(MetadataIndex(vault), channel_dir=channel)
+    follower = WorkerCoordinator(MetadataIndex(vault), channel_dir=channel)
+    leader.start()
+    follower.start()
+    try:
+        assert leader.is_leader and not follower.is_leader
+        assert follower.index.children(".") == ["old.md"]
+        # Warm the follower's view so only a message can make it notice the write
+        assert follower.index.get("new.md") is None
+        VaultManager(vault, index=leader.index).create_file("new.md", "hello")
+        wait_for(lambda: follower.index.get("new.md") is not None)
+        assert follower.index.children(".") == ["new.md", "old.md"]
+    finally:
+        follower.stop()
+        leader.stop()
+
+def test_follower_waits_for_the_new_leaders_snapshot(tmp_path):
+    """Test that a follower starting while the leader builds doesn't load the previous run's snapshot"""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    channel = tmp_path / "channel"
+    stale = MetadataIndex(vault)
+    stale.build()
+    save_snapshot(stale, channel / "metadata.db")
+    (vault / "new.md").write_text("new")
+
+    built = threading.Event()
+    leader_index = MetadataIndex(vault)
+    leader = WorkerCoordinator(leader_index, channel_dir=channel, build=lambda: (time.sleep(0.2), leader_index.build(), built.set()))
+    follower = WorkerCoordinator(MetadataIndex(vault), channel_dir=channel)
+    starting = threading.Thread(target=leader.start)
+    starting.start()
+    try:
+        wait_for(lambda: leader.is_leader)
+        follower.start()
+        assert built.is_set() and not follower.is_leader
+        assert len(follower.index) == 2
+    finally:
+        starting.join()
+        follower.stop()
+        leader.stop()
@@ -0,0 +1,62 @@
+import os
+import pytest
+from .content_cache import ContentCache
+from .vault import VaultManager
+
+def test_hit_requires_matching_stamp():
+    """Test that lookups only hit for the same mtime and size"""
+    cache = ContentCache(max_bytes=100)
+    cache.put("a.md", 1, 5, "hello")
+    assert cache.get("a.md", 1, 5) == "hello"
+    assert cache.get("a.md", 2, 5) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_evicts_least_recently_used_by_bytes():
+    """Test that the cache stays under its byte budget, evicting LRU first"""
+    cache = ContentCache(max_bytes=10)
+    cache.put("a.md", 1, 4, "aaaa")
+    cache.put("b.md", 1, 4, "bbbb")
+    cache.get("a.md", 1, 4)
+    cache.put("c.md", 1, 4, "cccc")
+
+    assert cache.get("b.md", 1, 4) is None
+    assert cache.get("a.md", 1, 4) == "aaaa"
+    assert cache.current_bytes == 8
+    assert cache.evictions == 1
+
+def test_oversized_documents_are_not_cached():
+    """Test that a document bigger than the budget is skipped"""
+    cache = ContentCache(max_bytes=3)
+    cache.put("a.md", 1, 4, "aaaa")
+    assert len(cache) == 0
+
+def test_vault_reads_go_through_cache(tmp_path):
+    """Test that repeated opens are served from the cache"""
+    cache = ContentCache(max_bytes=1024)
+    vault = VaultManager(tmp_path, cache=cache)
+    vault.create_file("a.md", "cached")
+    vault.get_document("a.md")
+    vault.get_document("a.md")
+    assert cache.hits >= 1
+
+def test_external_edit_is_not_served_stale(tmp_path):
+    """Test that an edit outside the API bypasses the cached copy"""
+    cache = ContentCache(max_bytes=1024)
+    vault = VaultManager(tmp_path, cache=cache)
+    vault.create_file("a.md", "before")
+    vault.get_document("a.md")
+
+    (tmp_path / "a.md").write_text("after!")
+    stat = os.stat(tmp_path / "a.md")
+    os.utime(tmp_path / "a.md", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert vault.get_document("a.md")["content"] == "after!"
+
+def test_writes_invalidate_cache(tmp_path):
+    """Test that the vault's own writes replace cached content"""
+    cache = ContentCache(max_bytes=1024)
+    vault = VaultManager(tmp_path, cache=cache)
+    vault.create_file("a.md", "one")
+    vault.get_document("a.md")
+    vault.update_file("a.md", "two")
+    assert vault.get_document("a.md")["content"] == "two"
@@ -0,0 +1,104 @@
+import os
+import random
+import shutil
+import pytest
+from ..llm import HashedTfidfEmbedder, load_embedder
+from . import embeddings as embeddings_module
+from .embeddings import EmbeddingIndex, VectorMatrix, IndexTooLargeError
+from .metadata_index import MetadataIndex
+from .vault import VaultManager
+
+@pytest.fixture(params=["numpy", "python"])
+def scoring(request, monkeypatch):
+    """Fixture to score queries with NumPy (when installed) and with the pure-Python loop"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(embeddings_module, "numpy", None)
+    return request.param
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create a vault whose writes and invalidations feed an embedding index"""
+    index = MetadataIndex(tmp_path)
+    embeddings = EmbeddingIndex(tmp_path, HashedTfidfEmbedder(dim=256))
+    index.subscribe(embeddings.mark_dirty)
+    return VaultManager(tmp_path, index=index, listeners=[embeddings.document_written]), embeddings
+
+def test_embedder_is_deterministic_and_normalized():
+    """Test that the default model gives the same unit vectors every time"""
+    first = HashedTfidfEmbedder().embed(["Compost for the garden", ""])
+    second = load_embedder("hashed-tfidf").embed(["Compost for the garden", ""])
+    assert first == second
+    assert abs(sum(value * value for value in first[0]) - 1) < 1e-6
+    assert not any(first[1])
+    with pytest.raises(ValueError):
+        load_embedder("no-such-model")
+
+def test_related_and_search(vault, scoring):
+    """Test that similar notes rank first and that only changed content is re-embedded"""
+    manager, embeddings = vault
+    manager.create_file("garden.md", "Planting tomatoes and basil; compost the garden beds in spring.")
+    manager.create_file("soil.md", "Garden soil: compost, mulch and tomatoes need feeding.")
+    manager.create_file("budget.md", "Quarterly budget review: revenue, expenses and forecasts.")
+    manager.create_file("chats/ask.chat", '{"role": "user", "content": "what should the revenue forecast be?"}\n')
+    embeddings.flush()
+    assert len(embeddings) == 4 and embeddings.embedded == 4
+
+    assert embeddings.related("garden.md")[0]["path"] == "soil.md"
+    assert [hit["path"] for hit in embeddings.search("revenue forecast")][:2] == ["chats/ask.chat", "budget.md"]
+
+    manager.update_file("budget.md", "Quarterly budget review: revenue, expenses and forecasts.")
+    manager.update_file("soil.md", "Soil notes: compost and mulch.")
+    embeddings.flush()
+    assert embeddings.embedded == 5
+
+def test_renames_deletes_and_restarts(vault, tmp_path):
+    """Test that renames reuse vectors, deletions free rows and a restart re-embeds nothing unchanged"""
+    manager, embeddings = vault
+    manager.create_file("notes/a.md", "alpha beta gamma")
+    manager.create_file("notes/b.md", "alpha beta delta")
+    manager.create_file("c.md", "unrelated words entirely")
+    embeddings.flush()
+
+    os.rename(tmp_path / "notes" / "a.md", tmp_path / "notes" / "a2.md")
+    manager.index.moved("notes/a.md", "notes/a2.md")
+    embeddings.flush()
+    assert embeddings.embedded == 3 and embeddings.reused == 1
+    assert [hit["path"] for hit in embeddings.related("notes/b.md")] == ["notes/a2.md"]
+
+    shutil.rmtree(tmp_path / "notes")
+    manager.index.invalidate("notes")
+    manager.index.get("notes")
+    embeddings.flush()
+    assert len(embeddings) == 1
+    manager.create_file("d.md", "entirely unrelated words")
+    embeddings.flush()
+    assert [hit["path"] for hit in embeddings.related("d.md")] == ["c.md"]
+
+    restarted = EmbeddingIndex(tmp_path, HashedTfidfEmbedder(dim=256))
+    restarted.reconcile()
+    restarted.flush()
+    assert restarted.embedded == 0 and len(restarted) == 2
+    assert len(EmbeddingIndex(tmp_path, HashedTfidfEmbedder(dim=128))) == 0
+
+def test_numpy_and_pure_python_rank_alike(tmp_path, monkeypatch):
+    """Test that both scoring paths find the same rows, and that large indexes need NumPy"""
+    pytest.importorskip("numpy")
+    matrix = VectorMatrix(tmp_path / "vectors.f32", 256)
+    words = "garden compost budget revenue planet orbit violin melody river bridge".split()
+    shuffle = random.Random(0)
+    texts = [" ".join(shuffle.choices(words, k=8)) for _ in range(200)]
+    vectors = HashedTfidfEmbedder(dim=256).embed(texts)
+    for row, vector in enumerate(vectors):
+        matrix.write(row, vector)
+    expected = matrix.top(vectors[3], 200, 5)
+
+    monkeypatch.setattr(embeddings_module, "numpy", None)
+    actual = matrix.top(vectors[3], 200, 5)
+    assert [row for _, row in actual] == [row for _, row in expected]
+    assert [score for score, _ in actual] == pytest.approx([score for score, _ in expected], abs=1e-5)
+
+    monkeypatch.setattr(embeddings_module, "PURE_PYTHON_MAX_ROWS", 100)
+    with pytest.raises(IndexTooLargeError):
+        matrix.top(vectors[3], 200, 5)
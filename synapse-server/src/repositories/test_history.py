@@ -0,0 +1,102 @@
+import io
+import tarfile
+import pytest
+from .archive import import_tar
+from .history import HistoryStore, RetentionPolicy
+from .vault import VaultManager, PathNotFoundError
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create a vault whose writes are recorded in a history store"""
+    history = HistoryStore(tmp_path)
+    return VaultManager(tmp_path, listeners=[history.record]), history
+
+def test_saves_append_versions(vault):
+    """Test that each distinct save becomes a version, newest first"""
+    manager, history = vault
+    manager.create_file("a.md", "one")
+    manager.update_file("a.md", "two")
+    versions = history.versions("a.md")
+    assert [v["size"] for v in versions] == [3, 3]
+    assert history.content("a.md", versions[-1]["id"]) == "one"
+    assert history.content("a.md", versions[0]["id"]) == "two"
+
+def test_unchanged_saves_and_duplicate_content_are_deduplicated(vault, tmp_path):
+    """Test that autosaves without changes add nothing and equal content shares a blob"""
+    manager, history = vault
+    manager.create_file("a.md", "same")
+    manager.update_file("a.md", "same")
+    manager.create_file("b.md", "same")
+    assert len(history.versions("a.md")) == 1
+    assert history.versions("a.md")[0]["blob"] == history.versions("b.md")[0]["blob"]
+    blobs = [p for p in (tmp_path / ".synapse" / "history" / "objects").rglob("*") if p.is_file()]
+    assert len(blobs) == 1
+
+def test_patches_are_recorded(vault):
+    """Test that partial writes are recorded from the file on disk"""
+    manager, history = vault
+    manager.create_file("a.md", "hello")
+    version = manager.get_entry("a.md").version
+    manager.patch_file("a.md", [{"offset": 5, "length": 0, "text": " world"}], version)
+    assert history.content("a.md", history.versions("a.md")[0]["id"]) == "hello world"
+
+def test_saves_are_recorded_in_the_background(tmp_path):
+    """Test that as a write listener, saves are recorded once the queue is flushed"""
+    history = HistoryStore(tmp_path)
+    manager = VaultManager(tmp_path, listeners=[history.document_written], rewrite_listeners=[history.preserve])
+    manager.create_file("a.md", "one")
+    manager.update_file("a.md", "two")
+    assert history.flush(timeout=5)
+    assert [history.content("a.md", v["id"]) for v in history.versions("a.md")] == ["two", "one"]
+
+def test_rewritten_transcripts_keep_their_appends(tmp_path):
+    """Test that a transcript replaced by an import keeps its appended content as a version"""
+    history = HistoryStore(tmp_path)
+    manager = VaultManager(tmp_path, listeners=[history.document_written], rewrite_listeners=[history.preserve])
+    manager.append_file("log.chat", "one\n", create=True)
+    manager.append_file("log.chat", "two\n")
+    history.flush()
+    assert history.versions("log.chat") == []
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        info = tarfile.TarInfo("log.chat")
+        info.size = 9
+        tar.addfile(info, io.BytesIO(b"imported\n"))
+    buffer.seek(0)
+    import_tar(manager, buffer)
+    history.flush()
+    assert [history.content("log.chat", v["id"]) for v in history.versions("log.chat")] == ["imported\n", "one\ntwo\n"]
+
+    manager.append_file("log.chat", "three\n")
+    history.flush()
+    assert len(history.versions("log.chat")) == 2
+
+def test_missing_version_raises(vault):
+    """Test that unknown versions raise PathNotFoundError"""
+    _, history = vault
+    with pytest.raises(PathNotFoundError):
+        history.content("a.md", 42)
+
+def test_diff(vault):
+    """Test that diffs are unified diffs labelled with the versions"""
+    _, history = vault
+    diff = history.diff("a.md", "a\nb\n", "a\nc\n", "1", "2")
+    assert "--- a.md@1" in diff and "-b" in diff and "+c" in diff
+
+def test_gc_thins_old_versions_and_removes_orphan_blobs(vault):
+    """Test that GC applies the retention policy and deletes unreferenced blobs"""
+    manager, history = vault
+    manager.create_file("a.md", "v0")
+    for i in range(1, 4):
+        manager.update_file("a.md", f"v{i}")
+    ids = [v["id"] for v in history.versions("a.md")]
+    # Pretend the three oldest saves fell into one hour, three days ago
+    history._conn.execute("UPDATE versions SET saved_at = ? WHERE id != ?", (1000.0, ids[0]))
+    history._conn.commit()
+
+    stats = history.gc(RetentionPolicy(keep_all=3600, hourly=7 * 86400, daily=0), now=1000.0 + 3 * 86400)
+    assert stats["versions_removed"] == 2
+    assert stats["blobs_removed"] == 2
+    assert [v["id"] for v in history.versions("a.md")] == [ids[0], ids[1]]
+    assert history.content("a.md", ids[1]) == "v2"
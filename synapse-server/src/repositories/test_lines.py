@@ -0,0 +1,57 @@
+import os
+import pytest
+from .lines import LineIndex, BLOCK_SIZE
+
+@pytest.fixture
+def lines():
+    """Fixture to provide an empty line index"""
+    return LineIndex(max_documents=2)
+
+def test_windows_across_blocks(lines, tmp_path):
+    """Test that windows anywhere in a multi-block file match a plain split"""
+    path = tmp_path / "log.md"
+    content = "".join(f"{'x' * (i % 300)} {i}\r\n" if i % 7 else f"ü{i}\n" for i in range(20000))
+    path.write_bytes(content.encode())
+    assert path.stat().st_size > 10 * BLOCK_SIZE
+    expected = content.splitlines()
+
+    for start in (0, 1, 4999, 12345, 19990):
+        assert lines.window("log.md", path, start, 20) == (20000, expected[start:start + 20])
+    assert lines.window("log.md", path, 20000, 5) == (20000, [])
+    assert lines.scans == 1
+
+def test_appends_extend_and_rewrites_rebuild(lines, tmp_path):
+    """Test that growth is scanned incrementally and other changes re-index"""
+    path = tmp_path / "chat.chat"
+    path.write_text("a\nb")
+    assert lines.window("chat.chat", path, 0, 10) == (2, ["a", "b"])
+
+    with open(path, "a") as f:
+        f.write("c\nd\n")
+    assert lines.window("chat.chat", path, 1, 10) == (3, ["bc", "d"])
+
+    path.write_text("z\n")
+    os.utime(path, ns=(1, 1))
+    assert lines.window("chat.chat", path, 0, 10) == (1, ["z"])
+    assert lines.scans == 3
+
+    path.write_text("")
+    assert lines.window("chat.chat", path, 0, 10) == (0, [])
+
+def test_growing_rewrite_rebuilds(lines, tmp_path):
+    """Test that rewriting a file into a longer one isn't mistaken for an append"""
+    path = tmp_path / "log.md"
+    content = b"line\n" * 100
+    path.write_bytes(content)
+    assert lines.window("log.md", path, 0, 1) == (100, ["line"])
+
+    path.write_bytes(b"xx" + content)
+    assert lines.window("log.md", path, 0, 2) == (100, ["xxline", "line"])
+
+    # Same head and tail as before, but a newline less in the middle: only
+    # the new inode shows it was replaced
+    replacement = tmp_path / "replacement"
+    replacement.write_bytes(b"xx" + b"line\n" * 50 + b"lineX" + b"line\n" * 50)
+    os.replace(replacement, path)
+    assert lines.window("log.md", path, 98, 5) == (100, ["line", "line"])
+    assert lines.scans == 3
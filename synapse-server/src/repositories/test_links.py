@@ -0,0 +1,96 @@
+import pytest
+from .links import LinkGraph, extract_links
+from .vault import VaultManager, PathNotFoundError
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create a vault whose writes feed a link graph"""
+    graph = LinkGraph(tmp_path)
+    return VaultManager(tmp_path, listeners=[graph.document_written]), graph
+
+def test_extract_links():
+    """Test wikilinks, markdown links and tags, skipping code and external URLs"""
+    text = (
+        "---\ntags: [project, 'draft']\n---\n"
+        "See [[Ideas]], [[folder/Plan|the plan]] and [[Ideas#Heading]].\n"
+        "Also [this](../other.md#part), [site](https://example.com) and [top](#anchor).\n"
+        "`[[not a link]]` #todo #42 issue#7\n"
+        "```\n[[fenced]] #nope\n```\n"
+    )
+    targets, tags = extract_links("notes/today.md", text)
+    assert targets == ["Ideas", "folder/Plan", "other"]
+    assert tags == ["project", "draft", "todo"]
+
+def test_backlinks_and_outlinks(vault):
+    """Test that links resolve by name and show up in both directions"""
+    manager, graph = vault
+    manager.create_file("projects/alpha.md", "Depends on [[beta]] and [[missing]]")
+    manager.create_file("projects/deep/beta.md", "Back to [alpha](../alpha.md) #status/active")
+
+    assert graph.backlinks("projects/deep/beta.md") == ["projects/alpha.md"]
+    assert graph.backlinks("projects/alpha.md") == ["projects/deep/beta.md"]
+    links = graph.links("projects/alpha.md")
+    assert links["links"] == [
+        {"target": "beta", "path": "projects/deep/beta.md"},
+        {"target": "missing", "path": None},
+    ]
+    assert graph.links("projects/deep/beta.md")["tags"] == ["status/active"]
+    assert graph.tagged("#status/active") == ["projects/deep/beta.md"]
+
+def test_links_follow_updates_and_new_notes(vault):
+    """Test that editing a note replaces its edges and a new note picks up dangling links"""
+    manager, graph = vault
+    manager.create_file("a.md", "[[b]]")
+    manager.create_file("c.md", "nothing yet")
+    assert graph.orphans() == ["a.md", "c.md"]
+    manager.create_file("b.md", "")
+    assert graph.backlinks("b.md") == ["a.md"]
+    manager.update_file("a.md", "[[c]]")
+    assert graph.backlinks("b.md") == []
+    assert graph.backlinks("c.md") == ["a.md"]
+    assert graph.orphans() == ["b.md"]
+
+def test_reconcile_and_dirty_paths(vault, tmp_path):
+    """Test that edits made on disk are picked up by reconcile and mark_dirty"""
+    manager, graph = vault
+    (tmp_path / "x.md").write_text("[[y]]")
+    (tmp_path / "y.md").write_text("")
+    graph.reconcile()
+    assert graph.backlinks("y.md") == ["x.md"]
+    (tmp_path / "x.md").unlink()
+    graph.mark_dirty("x.md")
+    assert graph.backlinks("y.md") == []
+    with pytest.raises(PathNotFoundError):
+        graph.backlinks("x.md")
+
+def test_unreferenced_strings_are_released(vault, tmp_path):
+    """Test that targets typed during autosave, dropped tags and deleted notes don't stay interned"""
+    manager, graph = vault
+    manager.create_file("b.md", "")
+    manager.create_file("a.md", "")
+    for i in range(1, 50):
+        manager.update_file("a.md", f"[[{'b' * i}]] #t{i}")
+    manager.update_file("a.md", "[[b]] #tag")
+    for i in range(20):
+        manager.create_file(f"tmp{i}.md", f"[[gone{i}]]")
+        (tmp_path / f"tmp{i}.md").unlink()
+        graph.mark_dirty(f"tmp{i}.md")
+    assert graph.backlinks("b.md") == ["a.md"]
+    assert graph.tags() == {"tag": 1}
+    assert sorted(graph._ids) == ["#tag", "a.md", "b", "b.md"]
+    assert len(graph._strings) - len(graph._free) == 4
+
+def test_neighbourhood(vault):
+    """Test that the neighbourhood follows links both ways up to the depth"""
+    manager, graph = vault
+    manager.create_file("a.md", "[[b]]")
+    manager.create_file("b.md", "[[c]]")
+    manager.create_file("c.md", "")
+    manager.create_file("d.md", "[[a]]")
+
+    hood = graph.neighbourhood("a.md", depth=1)
+    assert {node["path"]: node["distance"] for node in hood["nodes"]} == {"a.md": 0, "b.md": 1, "d.md": 1}
+    assert hood["edges"] == [("a.md", "b.md"), ("d.md", "a.md")]
+    hood = graph.neighbourhood("a.md", depth=2)
+    assert {node["path"] for node in hood["nodes"]} == {"a.md", "b.md", "c.md", "d.md"}
+    assert graph.neighbourhood("a.md", depth=2, max_nodes=2)["truncated"]
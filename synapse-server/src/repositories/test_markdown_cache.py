@@ -0,0 +1,78 @@
+import os
+import pytest
+from .markdown_cache import MarkdownCache, parse_markdown
+
+NOTE = """---
+title: Garden plan
+tags: [garden, spring]
+aliases:
+  - plan
+---
+# Garden *plan*
+
+Intro with **bold**, `<x>`, a [link](https://example.com/a_b) and [[Soil|soil notes]].
+<script>alert(1)</script> [bad](javascript:void)
+
+## Tasks
+
+- [ ] buy seeds
+- [x] dig beds
+  - nested
+
+Setext
+------
+"""
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture to provide a markdown cache over a temporary vault"""
+    return MarkdownCache(tmp_path)
+
+def test_parse_structure():
+    """Test front matter, outline and task extraction with source line numbers"""
+    parsed = parse_markdown(NOTE)
+    assert parsed["title"] == "Garden plan"
+    assert parsed["frontmatter"] == {"title": "Garden plan", "tags": ["garden", "spring"], "aliases": ["plan"]}
+    assert [(h["level"], h["text"], h["slug"], h["line"]) for h in parsed["headings"]] == [
+        (1, "Garden plan", "garden-plan", 6), (2, "Tasks", "tasks", 11), (2, "Setext", "setext", 17),
+    ]
+    assert parsed["tasks"] == [
+        {"line": 13, "checked": False, "text": "buy seeds"},
+        {"line": 14, "checked": True, "text": "dig beds"},
+    ]
+    assert not parsed["truncated"]
+
+def test_preview_html_is_safe():
+    """Test the rendered preview, with raw HTML escaped and unsafe URLs dropped"""
+    html = parse_markdown(NOTE)["html"]
+    assert '<h1 id="garden-plan">Garden <em>plan</em></h1>' in html
+    assert '<code>&lt;x&gt;</code>' in html
+    assert '<a href="https://example.com/a_b">link</a>' in html
+    assert '<a class="wikilink" data-target="Soil">soil notes</a>' in html
+    assert "&lt;script&gt;" in html and "<script>" not in html
+    assert '<a href="#">bad</a>' in html
+    assert '<li class="task"><input type="checkbox" disabled checked> dig beds\n<ul>\n<li>nested</li>\n</ul></li>' in html
+
+    long = parse_markdown("\n\n".join(f"paragraph {i} " + "x" * 100 for i in range(1000)))
+    assert long["truncated"] and "paragraph 10 " in long["html"] and "paragraph 999" not in long["html"]
+
+def test_cache_by_content_hash(cache, tmp_path):
+    """Test that summaries are reused across paths and restarts and dropped when notes change"""
+    (tmp_path / "a.md").write_text(NOTE)
+    (tmp_path / "b.md").write_text(NOTE)
+    first = cache.summary("a.md")
+    assert cache.summary("b.md")["hash"] == first["hash"]
+    assert cache.summary("a.md") == first
+    assert (cache.parsed, cache.hits) == (1, 2)
+
+    reopened = MarkdownCache(tmp_path)
+    assert reopened.summary("b.md")["headings"] == first["headings"]
+    assert reopened.parsed == 0
+
+    (tmp_path / "a.md").write_text("plain")
+    os.utime(tmp_path / "a.md", ns=(1, 1))
+    cache.invalidate("a.md")
+    assert cache.summary("a.md")["title"] == "a"
+    assert len(cache) == 2
+    cache.invalidate("b.md")
+    assert len(cache) == 1
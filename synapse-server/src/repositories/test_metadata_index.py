@@ -0,0 +1,128 @@
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+import pytest
+from .metadata_index import MetadataIndex, VaultWatcher
+from .vault import VaultManager, PathNotFoundError
+
+@pytest.fixture
+def index(tmp_path):
+    """Fixture to create a metadata index over a temporary vault"""
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "a.md").write_text("alpha")
+    (tmp_path / "b.chat").write_text("bravo")
+    index = MetadataIndex(tmp_path)
+    index.build()
+    return index
+
+def test_build_indexes_tree(index):
+    """Test that building the index records every entry"""
+    assert index.get("notes").type == "directory"
+    assert index.get("notes/a.md").size == 5
+    assert index.children(".") == ["b.chat", "notes"]
+    assert index.children("notes") == ["notes/a.md"]
+
+def test_external_change_is_invisible_until_invalidated(index, tmp_path):
+    """Test that the index serves from memory until an entry is invalidated"""
+    (tmp_path / "notes" / "c.md").write_text("charlie")
+    assert index.children("notes") == ["notes/a.md"]
+
+    index.invalidate("notes/c.md")
+    assert index.children("notes") == ["notes/a.md", "notes/c.md"]
+    assert index.get("notes/c.md").size == 7
+
+def test_invalidated_deletion_is_dropped(index, tmp_path):
+    """Test that deleted entries disappear once invalidated"""
+    (tmp_path / "notes" / "a.md").unlink()
+    (tmp_path / "notes").rmdir()
+    index.invalidate("notes")
+    assert index.get("notes") is None
+    assert index.get("notes/a.md") is None
+    assert index.children(".") == ["b.chat"]
+
+def test_vault_writes_refresh_index(index, tmp_path):
+    """Test that VaultManager writes keep the index current"""
+    vault = VaultManager(tmp_path, index=index)
+    vault.create_file("deep/nested/new.md", "hello")
+    vault.update_file("notes/a.md", "a longer body")
+
+    assert index.get("deep/nested/new.md").type == "file"
+    assert index.get("notes/a.md").size == len("a longer body")
+    assert [c["path"] for c in vault.list_directory("deep")["children"]] == ["deep/nested"]
+
+def test_indexed_listing_matches_disk_listing(index, tmp_path):
+    """Test that listings served from the index match a disk walk"""
+    indexed = VaultManager(tmp_path, index=index).list_directory("", max_depth=2)
+    walked = VaultManager(tmp_path).list_directory("", max_depth=2)
+    assert indexed == walked
+
+def test_indexed_get_document_missing(index, tmp_path):
+    """Test that documents unknown to the index raise PathNotFoundError"""
+    vault = VaultManager(tmp_path, index=index)
+    with pytest.raises(PathNotFoundError):
+        vault.get_document("notes/missing.md")
+
+def test_polling_watcher_invalidates_changes(index, tmp_path):
+    """Test that the fallback watcher notices external changes"""
+    watcher = VaultWatcher(index)
+    watcher.poll_once()
+    (tmp_path / "notes" / "d.md").write_text("delta")
+    watcher.poll_once()
+    assert "notes/d.md" in index.children("notes")
+
+class _FakeObserver:
+    """Stands in for a watchdog Observer: events are handed to the handler directly"""
+
+    def schedule(self, handler, path, recursive):
+        self.handler = handler
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+class _Event(NamedTuple):
+    event_type: str
+    src_path: str
+    is_directory: bool = False
+    dest_path: str = ""
+
+def test_watcher_skips_reads_and_own_writes(index, tmp_path):
+    """Test that only content events invalidate, and not for the vault's own writes"""
+    invalidated = []
+    index.subscribe(invalidated.append)
+    observer = _FakeObserver()
+    watcher = VaultWatcher(index, observer_factory=lambda: observer)
+    watcher.start()
+    vault = VaultManager(tmp_path, index=index)
+    a = str(tmp_path / "notes" / "a.md")
+
+    for event_type in ("opened", "closed", "closed_no_write"):
+        observer.handler.dispatch(_Event(event_type, a))
+    vault.update_file("notes/a.md", "rewritten")
+    observer.handler.dispatch(_Event("created", str(tmp_path / ".synapse" / "tmp" / "x.tmp")))
+    observer.handler.dispatch(_Event("moved", str(tmp_path / ".synapse" / "tmp" / "x.tmp"), dest_path=a))
+    observer.handler.dispatch(_Event("modified", str(tmp_path / "notes"), is_directory=True))
+    assert invalidated == []
+
+    (tmp_path / "notes" / "a.md").write_text("edited elsewhere")
+    observer.handler.dispatch(_Event("modified", a))
+    assert invalidated == ["notes/a.md"]
+    assert index.get("notes/a.md").size == len("edited elsewhere")
+
+    os.rename(a, tmp_path / "notes" / "z.md")
+    observer.handler.dispatch(_Event("moved", a, dest_path=str(tmp_path / "notes" / "z.md")))
+    assert index.children("notes") == ["notes/z.md"]
+    watcher.stop()
+
+def test_polling_can_be_disabled(index):
+    """Test that a zero poll interval starts no polling thread without watchdog"""
+    watcher = VaultWatcher(index, poll_interval=0)
+    watcher.start()
+    assert watcher._thread is None
+    watcher.stop()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import pytest
+from .metadata_index import MetadataIndex
+from .quickopen import PathIndex, score_path
+from .vault import VaultManager
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create a vault whose index changes feed a quick-open index"""
+    index = MetadataIndex(tmp_path)
+    quick_open = PathIndex(index, clock=lambda: 2_000_000.0)
+    return VaultManager(tmp_path, index=index), quick_open
+
+def paths(hits):
+    return [hit["path"] for hit in hits]
+
+def test_score_prefers_boundaries_and_file_names():
+    """Test fzf-style scoring: word starts and consecutive runs beat scattered matches"""
+    def score(query, path):
+        return score_path(query, path, path.lower(), path.rfind("/") + 1)
+    assert score("mn", "notes/meeting-notes.md")[0] > score("mn", "notes/summing.md")[0]
+    assert score("plan", "work/plan.md")[0] > score("plan", "p/l/a/n.md")[0]
+    assert score("plan", "work/plan.md")[1] == [5, 6, 7, 8]
+    assert score("xyz", "work/plan.md") is None
+
+def test_search_ranks_and_tracks_writes(vault, tmp_path):
+    """Test ranking, the recency boost and that creates, updates, renames and deletes are picked up"""
+    manager, quick_open = vault
+    manager.create_file("projects/roadmap.md", "")
+    manager.create_file("archive/road-trip-map.md", "")
+    manager.create_file("notes/random.chat", "")
+    assert paths(quick_open.search("rdmp")) == ["projects/roadmap.md", "archive/road-trip-map.md"]
+    assert quick_open.search("RD mp") == quick_open.search("rdmp")
+
+    # Equal matches: the recently modified one wins
+    manager.create_file("a/idea.md", "")
+    manager.create_file("b/idea.md", "")
+    os.utime(tmp_path / "a" / "idea.md", (1_000_000, 1_000_000))
+    os.utime(tmp_path / "b" / "idea.md", (1_999_000, 1_999_000))
+    manager.index.refresh("a/idea.md")
+    manager.index.refresh("b/idea.md")
+    assert paths(quick_open.search("idea")) == ["b/idea.md", "a/idea.md"]
+    assert paths(quick_open.search(""))[-2:] == ["b/idea.md", "a/idea.md"]
+
+    manager.create_file("projects/rdmp-new.md", "")
+    assert paths(quick_open.search("rdmp"))[0] == "projects/rdmp-new.md"
+    os.rename(tmp_path / "projects" / "rdmp-new.md", tmp_path / "projects" / "other.md")
+    manager.index.moved("projects/rdmp-new.md", "projects/other.md")
+    (tmp_path / "archive" / "road-trip-map.md").unlink()
+    manager.index.refresh("archive/road-trip-map.md")
+    assert paths(quick_open.search("rdmp")) == ["projects/roadmap.md"]
+    assert len(quick_open) == 5
+
+    os.rename(tmp_path / "projects", tmp_path / "plans")
+    manager.index.moved("projects", "plans")
+    assert "plans/roadmap.md" in paths(quick_open.search("rdmp"))
+    shutil.rmtree(tmp_path / "plans")
+    manager.index.refresh("plans")
+    assert quick_open.search("rdmp") == []
+
+def test_candidates_survive_many_changes_and_warm(vault, tmp_path):
+    """Test that bitsets stay right across batched changes, compaction and warm()"""
+    manager, quick_open = vault
+    for i in range(40):
+        manager.create_file(f"n/note-{i}.md", "")
+    quick_open.warm()
+    assert len(quick_open.search("note", limit=100)) == 40
+    for i in range(30):
+        (tmp_path / "n" / f"note-{i}.md").unlink()
+        manager.index.refresh(f"n/note-{i}.md")
+    manager.create_file("n/zebra.md", "")
+    assert paths(quick_open.search("zbr")) == ["n/zebra.md"]
+    assert len(quick_open.search("note", limit=100)) == 10
+    assert len(quick_open) == 11
@@ -0,0 +1,81 @@
+import os
+import pytest
+from .search import SearchIndex, build_match_query
+from .vault import VaultManager, InvalidPathError
+
+@pytest.fixture
+def vault(tmp_path):
+    """Fixture to create a vault whose writes feed a search index"""
+    index = SearchIndex(tmp_path)
+    return VaultManager(tmp_path, listeners=[index.document_written]), index
+
+def test_build_match_query_quotes_tokens():
+    """Test that user input is tokenized into quoted prefix terms"""
+    assert build_match_query('Hello "world" OR') == '"hello" * "world" * "or" *'
+    assert build_match_query("  ?! ") is None
+
+def test_search_finds_written_documents(vault):
+    """Test that documents written through the vault are searchable"""
+    manager, index = vault
+    manager.create_file("notes/garden.md", "Tomatoes need plenty of sunlight")
+    manager.create_file("notes/kitchen.md", "Roast the tomatoes slowly")
+
+    results = index.search("sunlight")
+    assert [hit["path"] for hit in results] == ["notes/garden.md"]
+    assert "<mark>sunlight</mark>" in results[0]["snippet"]
+
+def test_snippets_escape_document_html(vault):
+    """Test that markup in a document comes back escaped around the <mark> highlights"""
+    manager, index = vault
+    manager.create_file("x.md", 'payload <img src=x onerror="alert(1)"> & more')
+    snippet = index.search("payload")[0]["snippet"]
+    assert snippet.startswith("<mark>payload</mark> ")
+    assert "<img" not in snippet and "&lt;img" in snippet and "&amp;" in snippet
+
+def test_search_prefix_matching(vault):
+    """Test that query terms match as prefixes"""
+    manager, index = vault
+    manager.create_file("a.md", "photosynthesis")
+    assert [hit["path"] for hit in index.search("photo")] == ["a.md"]
+
+def test_title_matches_rank_first(vault):
+    """Test that a term in the file name outranks the same term in a body"""
+    manager, index = vault
+    manager.create_file("other.md", "a note mentioning compost once")
+    manager.create_file("compost.md", "how to turn a heap")
+    assert index.search("compost")[0]["path"] == "compost.md"
+
+def test_update_replaces_indexed_content(vault):
+    """Test that updates re-index a document"""
+    manager, index = vault
+    manager.create_file("a.md", "first draft")
+    manager.update_file("a.md", "second version")
+    assert index.search("draft") == []
+    assert len(index.search("second")) == 1
+    assert len(index) == 1
+
+def test_reconcile_picks_up_external_changes(tmp_path):
+    """Test that files changed outside the API are indexed lazily by mtime"""
+    (tmp_path / "external.chat").write_text("imported transcript")
+    (tmp_path / "ignored.txt").write_text("imported transcript")
+    index = SearchIndex(tmp_path)
+    assert [hit["path"] for hit in index.search("transcript")] == ["external.chat"]
+
+    (tmp_path / "external.chat").unlink()
+    index.mark_dirty("external.chat")
+    assert index.search("transcript") == []
+
+def test_index_persists_on_disk(tmp_path):
+    """Test that a new SearchIndex reuses the stored index"""
+    (tmp_path / "a.md").write_text("persistent")
+    SearchIndex(tmp_path).reconcile()
+    reopened = SearchIndex(tmp_path)
+    assert len(reopened) == 1
+
+def test_meta_dir_is_reserved(vault):
+    """Test that the index directory can't be read or listed through the vault"""
+    manager, index = vault
+    manager.create_file("a.md", "x")
+    with pytest.raises(InvalidPathError):
+        manager.get_document(".synapse/search.db")
+    assert [child["path"] for child in manager.list_directory("")["children"]] == ["a.md"]
@@ -1,8 +1,10 @@
 # test_vault.py
 # Code generated by ChatGPT.
+import subprocess
+import sys
 import pytest
 from pathlib import Path
-from vault import VaultManager, PathNotFoundError, InvalidPathError, UnsupportedFileTypeError, FileExistsError
+from .vault import VaultManager, PathNotFoundError, InvalidPathError, UnsupportedFileTypeError, FileExistsError, VersionConflictError, InvalidPatchError, InvalidCursorError
 
 @pytest.fixture
 def temp_vault(tmp_path):
@@ -96,5 +98,156 @@ def test_list_directory_with_max_depth(temp_vault):
     contents = temp_vault.list_directory("parent", max_depth=1)
     assert len(contents["children"]) == 1  # Includes "file.md"
 
+def test_iter_directory_matches_listing_order(temp_vault):
+    """Test that iter_directory walks the tree in resumable pre-order"""
+    temp_vault.create_file("b/z.md", "z")
+    temp_vault.create_file("a.md", "a")
+    temp_vault.create_file("b/c/y.md", "y")
+
+    paths = [entry["path"] for entry in temp_vault.iter_directory("")]
+    assert paths == ["a.md", "b", "b/c", "b/c/y.md", "b/z.md"]
+
+    resumed = [entry["path"] for entry in temp_vault.iter_directory("", cursor="b/c")]
+    assert resumed == ["b/c/y.md", "b/z.md"]
+
+def _version(vault, path):
+    return vault.get_entry(path).version
+
+def test_patch_file_appends(temp_vault):
+    """Test that an insertion at the end of a file is appended"""
+    temp_vault.create_file("log.chat", "first\n")
+    info = temp_vault.patch_file("log.chat", [{"offset": 6, "length": 0, "text": "second\n"}], _version(temp_vault, "log.chat"))
+
+    assert info["content"] is None
+    assert info["size"] == 13
+    assert temp_vault.get_document("log.chat")["content"] == "first\nsecond\n"
+
+def test_patch_file_multiple_splices(temp_vault):
+    """Test applying several non-overlapping splices against the base"""
+    temp_vault.create_file("test.md", "Hello, world!")
+    splices = [
+        {"offset": 7, "length": 5, "text": "there"},  # same length
+        {"offset": 0, "length": 5, "text": "Hi"},
+    ]
+    temp_vault.patch_file("test.md", splices, _version(temp_vault, "test.md"))
+    assert temp_vault.get_document("test.md")["content"] == "Hi, there!"
+
+def test_patch_file_in_place(temp_vault):
+    """Test that same-length replacements keep the rest of the file"""
+    temp_vault.create_file("test.md", "aaaa bbbb cccc")
+    temp_vault.patch_file("test.md", [{"offset": 5, "length": 4, "text": "BBBB"}], _version(temp_vault, "test.md"))
+    assert temp_vault.get_document("test.md")["content"] == "aaaa BBBB cccc"
+
+def test_patch_file_stale_base_raises_error(temp_vault):
+    """Test that patches against an old version are rejected"""
+    temp_vault.create_file("test.md", "one")
+    base = _version(temp_vault, "test.md")
+    temp_vault.update_file("test.md", "two!")
+    with pytest.raises(VersionConflictError):
+        temp_vault.patch_file("test.md", [{"offset": 0, "length": 0, "text": "x"}], base)
+
+def test_patch_file_rejects_bad_splices(temp_vault):
+    """Test that overlapping, out-of-range and mid-character splices are rejected"""
+    temp_vault.create_file("test.md", "héllo")
+    base = _version(temp_vault, "test.md")
+    with pytest.raises(InvalidPatchError):
+        temp_vault.patch_file("test.md", [{"offset": 0, "length": 3, "text": ""}, {"offset": 2, "length": 1, "text": ""}], base)
+    with pytest.raises(InvalidPatchError):
+        temp_vault.patch_file("test.md", [{"offset": 5, "length": 10, "text": ""}], base)
+    with pytest.raises(InvalidPatchError):
+        temp_vault.patch_file("test.md", [{"offset": 2, "length": 0, "text": "x"}], base)
+    assert temp_vault.get_document("test.md")["content"] == "héllo"
+
+def test_path_cache_reuses_resolution(tmp_path):
+    """Test that validated paths are served from the path cache"""
+    from .metadata_index import MetadataIndex
+    vault = VaultManager(tmp_path, index=MetadataIndex(tmp_path), path_cache_size=8)
+    vault.create_file("notes/a.md", "alpha")
+    assert vault.get_document("notes/a.md")["content"] == "alpha"
+    assert vault.path_cache.get("notes/a.md") == tmp_path.resolve() / "notes" / "a.md"
+
+def test_path_cache_skips_and_drops_symlinked_paths(tmp_path):
+    """Test that symlinked paths aren't cached and directory changes evict entries"""
+    from .metadata_index import MetadataIndex
+    outside = tmp_path / "outside"
+    vault_dir = tmp_path / "vault"
+    outside.mkdir()
+    (vault_dir / "notes").mkdir(parents=True)
+    index = MetadataIndex(vault_dir)
+    vault = VaultManager(vault_dir, index=index, path_cache_size=8)
+
+    vault.get_entry("notes")
+    assert vault.path_cache.get("notes") is not None
+    (vault_dir / "notes").rmdir()
+    (vault_dir / "notes").symlink_to(outside)
+    index.invalidate("notes")
+    assert vault.path_cache.get("notes") is None
+    with pytest.raises(InvalidPathError):
+        vault.get_entry("notes")
+    assert len(vault.path_cache) == 0
+
+def test_list_page_walks_directory_in_pages(temp_vault):
+    """Test that cursors page through directories first, then files, by name"""
+    for name in ["c.md", "a.md", "b.md"]:
+        temp_vault.create_file(f"daily/{name}", name)
+    temp_vault.create_file("daily/zdir/inner.md", "x")
+    temp_vault.create_directory("daily/empty")
+
+    first = temp_vault.list_page("daily", limit=2)
+    assert [c["path"] for c in first["children"]] == ["daily/empty", "daily/zdir"]
+    assert [c["has_children"] for c in first["children"]] == [False, True]
+    second = temp_vault.list_page("daily", limit=2, cursor=first["next_cursor"])
+    assert [c["path"] for c in second["children"]] == ["daily/a.md", "daily/b.md"]
+    last = temp_vault.list_page("daily", limit=2, cursor=second["next_cursor"])
+    assert [c["path"] for c in last["children"]] == ["daily/c.md"]
+    assert last["next_cursor"] is None
+
+def test_list_page_sorts_descending_by_size(temp_vault):
+    """Test that descending sorts keep directories first and order files by size"""
+    temp_vault.create_file("small.md", "a")
+    temp_vault.create_file("large.md", "a" * 10)
+    temp_vault.create_directory("folder")
+    page = temp_vault.list_page("", limit=10, sort="-size")
+    assert [c["path"] for c in page["children"]] == ["folder", "large.md", "small.md"]
+
+def test_list_page_rejects_foreign_cursor(temp_vault):
+    """Test that a cursor can't be reused with another sort or tampered with"""
+    for name in ["a.md", "b.md"]:
+        temp_vault.create_file(name, name)
+    cursor = temp_vault.list_page("", limit=1)["next_cursor"]
+    with pytest.raises(InvalidCursorError):
+        temp_vault.list_page("", limit=1, cursor=cursor, sort="size")
+    with pytest.raises(InvalidCursorError):
+        temp_vault.list_page("", limit=1, cursor="not-a-cursor")
+
+def test_append_file(temp_vault):
+    """Test that appends land at the end and can create the file"""
+    assert temp_vault.append_file("log.chat", "one\n", create=True) == 0
+    assert temp_vault.append_file("log.chat", "two\n") == 4
+    assert temp_vault.get_document("log.chat")["content"] == "one\ntwo\n"
+    with pytest.raises(PathNotFoundError):
+        temp_vault.append_file("missing.chat", "x")
+
+def test_process_locks_hold_writes_across_processes(tmp_path):
+    """Test that with process_locks another process can't lock a file being written, even after a nested lock"""
+    manager = VaultManager(tmp_path, process_locks=True)
+    manager.create_file("a.md", "hello")
+    path = manager._get_safe_path("a.md")
+    probe = (
+        "import fcntl, os, sys\n"
+        "fd = os.open(sys.argv[1], os.O_RDWR)\n"
+        "try:\n"
+        "    fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+        "except OSError:\n"
+        "    sys.exit(1)\n"
+    )
+    lock_file = next((tmp_path / ".synapse" / "locks").iterdir())
+    locked_elsewhere = lambda: subprocess.run([sys.executable, "-c", probe, str(lock_file)]).returncode == 1
+    with manager.write_lock(path):
+        with manager.write_lock(path):
+            pass
+        assert locked_elsewhere()
+    assert not locked_elsewhere()
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+import pytest
+from .vault import WritePipeline, VaultManager, _lock_for
+
+@pytest.fixture
+def pipeline(tmp_path):
+    """Fixture to create a write pipeline over a temporary vault"""
+    return WritePipeline(tmp_path)
+
+def test_write_replaces_content_atomically(pipeline, tmp_path):
+    """Test that writes land in place and leave no temp files behind"""
+    target = tmp_path / "a.md"
+    target.write_text("old")
+    os.chmod(target, 0o600)
+
+    assert pipeline.write(target, "new") == "new"
+    assert target.read_text() == "new"
+    assert os.stat(target).st_mode & 0o777 == 0o600
+    assert list(pipeline.temp_dir.iterdir()) == []
+
+def test_queued_writes_coalesce(pipeline, tmp_path):
+    """Test that only the newest of several queued writes is performed"""
+    target = tmp_path / "a.md"
+    target.write_text("v0")
+    results = {}
+
+    def write(content):
+        results[content] = pipeline.write(target, content)
+
+    threads = []
+    with _lock_for(target):
+        for content in ("v1", "v2", "v3"):
+            thread = threading.Thread(target=write, args=(content,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.05)  # make the queueing order deterministic
+    for thread in threads:
+        thread.join()
+
+    assert target.read_text() == "v3"
+    assert pipeline.writes == 1
+    assert pipeline.coalesced == 2
+    assert sorted(results.values(), key=str) == [None, None, "v3"]
+
+def test_group_commit_batches_concurrent_writes(tmp_path):
+    """Test that writes within the window share one durability batch"""
+    pipeline = WritePipeline(tmp_path, group_commit_window=0.1)
+    threads = [
+        threading.Thread(target=pipeline.write, args=(tmp_path / f"{i}.md", f"doc {i}"))
+        for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [(tmp_path / f"{i}.md").read_text() for i in range(5)] == [f"doc {i}" for i in range(5)]
+    assert pipeline._committer.batches < 5
+
+def test_cleanup_removes_orphaned_temp_files(pipeline):
+    """Test that stale temp files from a crash are removed"""
+    pipeline.temp_dir.mkdir(parents=True)
+    orphan = pipeline.temp_dir / "dead.tmp"
+    orphan.write_text("partial")
+    os.utime(orphan, (0, 0))
+    pipeline.cleanup()
+    assert not orphan.exists()
+
+def test_vault_writes_go_through_pipeline(tmp_path):
+    """Test that VaultManager uses its pipeline for creates and updates"""
+    pipeline = WritePipeline(tmp_path)
+    vault = VaultManager(tmp_path, writer=pipeline)
+    vault.create_file("a.md", "one")
+    vault.update_file("a.md", "two")
+    assert pipeline.writes == 2
+    assert vault.get_document("a.md")["content"] == "two"
@@ -1,8 +1,324 @@
 # vault.py
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Union, TypedDict
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, TypedDict
 from datetime import datetime
 
+from ..metrics import VAULT_BYTES_READ, VAULT_BYTES_WRITTEN, timed
+from .metadata_index import MetadataIndex, EntryMeta, META_DIR, meta_from_stat
+from .content_cache import ContentCache
+from .lines import LineIndex
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = (".md", ".chat")
+
+# Sort keys accepted by VaultManager.list_page; prefix with "-" for descending
+LISTING_SORTS = ("name", "modified", "size")
+
+# Called with (path relative to vault root, new content) after a file write.
+# Content is None when the write didn't have the full text at hand (patches);
+# listeners that need it should re-read the file lazily.
+WriteListener = Callable[[str, Optional[str]], None]
+
+# Called with the path relative to the vault root just before an existing
+# file is rewritten other than by appending, while the old content is on disk.
+RewriteListener = Callable[[str], None]
+
+# Process-wide per-file locks, so read-check-write sequences don't interleave
+_path_locks: "weakref.WeakValueDictionary[Path, threading.RLock]" = weakref.WeakValueDictionary()
+_path_locks_guard = threading.Lock()
+
+def _lock_for(path: Path) -> threading.RLock:
+    with _path_locks_guard:
+        lock = _path_locks.get(path)
+        if lock is None:
+            lock = _path_locks[path] = threading.RLock()
+        return lock
+
+class PathCache:
+    """Bounded LRU of request path -> resolved absolute path.
+
+    Only paths that resolve to their lexical location (no symlinks along the
+    way, no "..") are cached, so an entry stays valid until something at or
+    above its key changes on disk; invalidate() is fed the same keys as the
+    MetadataIndex.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Path]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, relative_path: str) -> Optional[Path]:
+        with self._lock:
+            entry = self._entries.get(relative_path)
+            if entry is None:
+                return None
+            self._entries.move_to_end(relative_path)
+            return entry[1]
+
+    def put(self, relative_path: str, key: str, resolved: Path) -> None:
+        with self._lock:
+            self._entries[relative_path] = (key, resolved)
+            self._entries.move_to_end(relative_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        """Drop entries for a vault key and everything below it."""
+        if key == ".":
+            self.clear()
+            return
+        prefix = key + "/"
+        with self._lock:
+            stale = [path for path, (entry_key, _) in self._entries.items() if entry_key == key or entry_key.startswith(prefix)]
+            for path in stale:
+                del self._entries[path]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories can't be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class _StagedWrite:
+    """A fully written temp file waiting to be made durable and renamed into place."""
+
+    def __init__(self, fd: int, temp_path: Path, target: Path, size: int = 0):
+        self.fd = fd
+        self.temp_path = temp_path
+        self.target = target
+        self.size = size
+
+    def commit(self) -> None:
+        """fsync, close and rename into place (the directory is synced by the caller)."""
+        try:
+            os.fsync(self.fd)
+        finally:
+            os.close(self.fd)
+        os.replace(self.temp_path, self.target)
+
+    def discard(self) -> None:
+        """Close and remove the temp file of a write that won't be committed."""
+        os.close(self.fd)
+        self.temp_path.unlink(missing_ok=True)
+
+class GroupCommitter:
+    """Batches the durability work of writes that arrive within a short window.
+
+    The first write of a batch becomes its leader: it waits `window` seconds
+    for others to join, then fsyncs every staged file, renames them into
+    place and fsyncs each affected directory once. Followers block until
+    their batch is done.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._cond = threading.Condition()
+        self._batch: Optional[List[_StagedWrite]] = None
+        self._results: Dict[int, Optional[BaseException]] = {}
+        self.batches = 0
+
+    def commit(self, staged: _StagedWrite) -> None:
+        with self._cond:
+            leader = self._batch is None
+            if leader:
+                self._batch = []
+            batch = self._batch
+            batch.append(staged)
+
+        if leader:
+            time.sleep(self.window)
+            with self._cond:
+                self._batch = None
+            self.batches += 1
+            directories = set()
+            for item in batch:
+                try:
+                    item.commit()
+                    directories.add(item.target.parent)
+                    error = None
+                except OSError as exc:
+                    error = exc
+                self._results[id(item)] = error
+            for directory in directories:
+                _fsync_dir(directory)
+            with self._cond:
+                self._cond.notify_all()
+        else:
+            with self._cond:
+                self._cond.wait_for(lambda: id(staged) in self._results)
+
+        error = self._results.pop(id(staged))
+        if error is not None:
+            raise error
+
+class WritePipeline:
+    """Crash-safe, coalescing writer for whole-file replacements.
+
+    Each write goes to a temp file in the vault's META_DIR, is fsynced and
+    then atomically renamed over the target, so readers and crashes only
+    ever see the old or the new document. Writes to the same path are
+    serialized by a per-path lock; if several are queued, only the newest
+    is written and the superseded callers return once it is durable.
+    With group_commit_window set, fsyncs from concurrent writes across
+    files are batched (see GroupCommitter).
+    """
+
+    def __init__(self, vault_dir: Path, group_commit_window: Optional[float] = None):
+        self.vault_dir = vault_dir
+        self.temp_dir = vault_dir / META_DIR / "tmp"
+        self._committer = GroupCommitter(group_commit_window) if group_commit_window else None
+        self._pending: Dict[Path, Tuple[int, str]] = {}
+        self._seq = itertools.count()
+        self._guard = threading.Lock()
+        self.writes = 0
+        self.coalesced = 0
+
+    def cleanup(self, max_age: float = 60.0) -> None:
+        """Remove temp files orphaned by a crash mid-write."""
+        cutoff = time.time() - max_age
+        try:
+            with os.scandir(self.temp_dir) as it:
+                for entry in it:
+                    try:
+                        if entry.name.endswith(".tmp") and entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+    def _stage(self, target: Path, data: bytes) -> _StagedWrite:
+        return self.stage(target, (data,))
+
+    def stage(self, target: Path, chunks: Iterable[bytes]) -> _StagedWrite:
+        """Write new content for target to a temp file, without publishing it.
+
+        Chunks are written as they come, so content of any size is staged
+        in constant memory. If iterating them raises, the temp file is
+        removed. Publish staged writes with commit_many.
+        """
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.temp_dir / f"{uuid.uuid4().hex}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            try:
+                os.chmod(temp_path, os.stat(target).st_mode & 0o7777)
+            except OSError:
+                pass
+            size = 0
+            for data in chunks:
+                size += len(data)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+        except BaseException:
+            os.close(fd)
+            os.unlink(temp_path)
+            raise
+        return _StagedWrite(fd, temp_path, target, size)
+
+    def _commit(self, staged: _StagedWrite) -> None:
+        try:
+            if self._committer is not None:
+                self._committer.commit(staged)
+            else:
+                staged.commit()
+                _fsync_dir(staged.target.parent)
+        except OSError as exc:
+            if staged.temp_path.exists():
+                staged.temp_path.unlink()
+            raise exc
+
+    def commit_many(self, batch: Sequence[_StagedWrite], lock: Callable[[Path], ContextManager] = _lock_for) -> None:
+        """Durably publish staged writes, in order.
+
+        Each file is fsynced and renamed under its path lock (`lock`, e.g.
+        VaultManager.write_lock to exclude other processes too); each
+        affected directory is fsynced once for the whole batch. If one
+        fails, the remaining temp files are removed and the error is
+        raised; the writes before it have been published.
+        """
+        directories = set()
+        try:
+            for done, staged in enumerate(batch):
+                with lock(staged.target):
+                    staged.commit()
+                directories.add(staged.target.parent)
+                VAULT_BYTES_WRITTEN.inc(staged.size)
+                self.writes += 1
+        except OSError:
+            if batch[done].temp_path.exists():
+                batch[done].temp_path.unlink()
+            for staged in batch[done + 1:]:
+                staged.discard()
+            raise
+        finally:
+            for directory in directories:
+                _fsync_dir(directory)
+
+    def write(self, path: Path, content: str) -> Optional[str]:
+        """Durably replace a file's content.
+
+        Args:
+            path: Absolute target path
+            content: New file contents
+
+        Returns:
+            The content actually written (the newest pending for the path),
+            or None if a concurrent call already wrote a newer version
+        """
+        with self._guard:
+            seq = next(self._seq)
+            self._pending[path] = (seq, content)
+        with _lock_for(path):
+            with self._guard:
+                pending = self._pending.get(path)
+                if pending is None:
+                    # Superseded by a write that has already been made durable
+                    self.coalesced += 1
+                    return None
+                del self._pending[path]
+            latest = pending[1]
+            data = latest.encode("utf-8")
+            with timed("write"):
+                self._commit(self._stage(path, data))
+            VAULT_BYTES_WRITTEN.inc(len(data))
+            self.writes += 1
+            return latest
+
 class VaultError(Exception):
     """Base exception for vault operations"""
     pass
@@ -19,6 +335,15 @@ class UnsupportedFileTypeError(VaultError):
 class FileExistsError(VaultError):
     pass
 
+class VersionConflictError(VaultError):
+    pass
+
+class InvalidPatchError(VaultError):
+    pass
+
+class InvalidCursorError(VaultError):
+    pass
+
 class FileInfo(TypedDict):
     path: str
     type: str  # "file" or "directory"
@@ -27,6 +352,11 @@ class FileInfo(TypedDict):
     size: int
     content: Optional[str]  # Only for files
 
+class Splice(TypedDict):
+    offset: int  # UTF-8 byte offset into the base document
+    length: int  # number of bytes replaced
+    text: str    # replacement
+
 class DirectoryInfo(TypedDict):
     path: str
     type: str
@@ -34,16 +364,90 @@ class DirectoryInfo(TypedDict):
     modified_at: float
     children: List[Union[FileInfo, 'DirectoryInfo']]
 
+class ListingEntry(TypedDict, total=False):
+    path: str
+    type: str  # "file" or "directory"
+    created_at: float
+    modified_at: float
+    size: int  # files only
+    has_children: bool  # directories only
+
+class LineWindow(TypedDict):
+    path: str
+    start: int  # index of the first line returned
+    total: int  # lines in the document
+    lines: List[str]  # without line breaks
+
+class ListingPage(TypedDict):
+    path: str
+    children: List[ListingEntry]
+    next_cursor: Optional[str]  # None on the last page
+
+def _encode_cursor(sort: str, key: tuple) -> str:
+    raw = json.dumps([sort, list(key)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+        group, value, name = key
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+    if cursor_sort != sort:
+        raise InvalidCursorError(f"Cursor was issued for sort={cursor_sort}")
+    return (group, value, name)
+
 class VaultManager:
     """Manages file operations within a vault directory."""
     
-    def __init__(self, vault_dir: Path):
+    def __init__(
+        self,
+        vault_dir: Path,
+        index: Optional[MetadataIndex] = None,
+        listeners: Sequence[WriteListener] = (),
+        writer: Optional[WritePipeline] = None,
+        cache: Optional[ContentCache] = None,
+        path_cache_size: int = 0,
+        rewrite_listeners: Sequence[RewriteListener] = (),
+        process_locks: bool = False,
+    ):
         """Initialize the VaultManager with a vault directory.
         
         Args:
             vault_dir: Root directory for all vault operations
+            index: Optional shared metadata index used to answer listings
+                and existence checks from memory
+            listeners: Callbacks notified after every successful file write
+            writer: Shared write pipeline; share one per vault so that
+                concurrent writes to a file can be coalesced
+            cache: Optional shared cache of decoded document contents
+            path_cache_size: Number of resolved request paths to remember.
+                Needs an index to learn about symlink/directory changes, so
+                it is ignored without one; construct one VaultManager per
+                vault when enabling it, as it subscribes to the index.
+            rewrite_listeners: Callbacks notified before an existing file's
+                content is replaced (anything but an append)
+            process_locks: Also serialize writes to a file across processes
+                (with lock files under META_DIR/locks), for several workers
+                serving one vault
         """
         self.vault_dir = vault_dir
+        self.index = index
+        self.listeners = listeners
+        self.rewrite_listeners = rewrite_listeners
+        self.writer = writer or WritePipeline(vault_dir)
+        self.cache = cache
+        self.lines = LineIndex()
+        self._root = vault_dir.resolve()
+        self._root_depth = len(self._root.parts)
+        self.path_cache = PathCache(path_cache_size) if index is not None and path_cache_size else None
+        if self.path_cache is not None:
+            index.subscribe(self.path_cache.invalidate)
+        if process_locks and fcntl is None:
+            raise RuntimeError("Cross-process write locks need fcntl")
+        self.lock_dir = vault_dir / META_DIR / "locks" if process_locks else None
+        self._held = threading.local()
     
     def _get_safe_path(self, relative_path: str) -> Path:
         """Ensure the path doesn't escape the vault directory.
@@ -57,12 +461,19 @@ class VaultManager:
         Raises:
             InvalidPathError: If path attempts to escape vault
         """
-        print(f'{relative_path=}')
-        safe_path = (self.vault_dir / relative_path).resolve()
-        print(f'{safe_path=},{relative_path=}')
-        if not str(safe_path).startswith(str(self.vault_dir.resolve())):
-            # print(f"INVALID PATH")
+        if self.path_cache is not None:
+            cached = self.path_cache.get(relative_path)
+            if cached is not None:
+                return cached
+        safe_path = (self._root / relative_path).resolve()
+        logger.debug("Resolved %r to %s", relative_path, safe_path)
+        if not safe_path.is_relative_to(self._root):
             raise InvalidPathError(f"Path {relative_path} attempts to escape vault")
+        parts = safe_path.parts[self._root_depth:]
+        if parts[:1] == (META_DIR,):
+            raise InvalidPathError(f"Path {relative_path} is reserved")
+        if self.path_cache is not None and safe_path == Path(os.path.normpath(self._root / relative_path)) and ".." not in Path(relative_path).parts:
+            self.path_cache.put(relative_path, "/".join(parts) or ".", safe_path)
         return safe_path
 
     def _validate_file_type(self, path: Path) -> None:
@@ -74,7 +485,7 @@ class VaultManager:
         Raises:
             UnsupportedFileTypeError: If file type not supported
         """
-        if not path.suffix in [".md", ".chat"]:
+        if not path.suffix in SUPPORTED_SUFFIXES:
             raise UnsupportedFileTypeError(f"File type {path.suffix} not supported")
 
     def _get_path_info(self, path: Path, include_content: bool = True, max_depth: Optional[int] = None) -> Union[FileInfo, DirectoryInfo]:
@@ -104,11 +515,13 @@ class VaultManager:
                 **base_info,
                 type="file",
                 size=stat.st_size,
-                content=path.read_text() if include_content else None
+                content=self._read_content(path, stat) if include_content else None
             )
         elif path.is_dir() and (max_depth >= 0):
             children = []
             for child in path.iterdir():
+                if path == self.vault_dir and child.name == META_DIR:
+                    continue
                 path_info = self._get_path_info(
                     child, 
                     include_content=include_content,
@@ -122,6 +535,115 @@ class VaultManager:
                 children=sorted(children, key=lambda x: x["path"])
             )
 
+    def _read_content(self, path: Path, stat: os.stat_result) -> str:
+        """Read a document's text, going through the content cache if there is one."""
+        if self.cache is None:
+            return self._read_disk(path, stat)
+        key = self._relative_key(path)
+        content = self.cache.get(key, stat.st_mtime_ns, stat.st_size)
+        if content is None:
+            content = self._read_disk(path, stat)
+            self.cache.put(key, stat.st_mtime_ns, stat.st_size, content)
+        return content
+
+    @staticmethod
+    def _read_disk(path: Path, stat: os.stat_result) -> str:
+        with timed("read"):
+            content = path.read_text()
+        VAULT_BYTES_READ.inc(stat.st_size)
+        return content
+
+    def _relative_key(self, path: Path) -> str:
+        return str(path.relative_to(self.vault_dir))
+
+    def normalize_path(self, relative_path: str) -> str:
+        """Validate a path and return the form VaultManager reports it in
+        (and write listeners receive it in).
+
+        Raises:
+            InvalidPathError: If path escapes the vault or is reserved
+        """
+        return self._relative_key(self._get_safe_path(relative_path))
+
+    def _get_indexed_info(self, key: str, meta: EntryMeta, max_depth: Optional[int] = None) -> Union[FileInfo, DirectoryInfo]:
+        """Build listing metadata from the in-memory index instead of disk.
+
+        Mirrors _get_path_info(include_content=False).
+        """
+        if max_depth == None:
+            max_depth = float('inf')
+        if max_depth == -1:
+            return None
+        base_info = {
+            "path": key,
+            "created_at": meta.created_at,
+            "modified_at": meta.modified_at,
+        }
+        if meta.type == "file":
+            return FileInfo(**base_info, type="file", size=meta.size, content=None)
+        children = []
+        for child_key in self.index.children(key):
+            child_meta = self.index.get(child_key)
+            if child_meta is None:
+                continue
+            child_info = self._get_indexed_info(child_key, child_meta, max_depth=max_depth - 1)
+            if child_info is not None:
+                children.append(child_info)
+        return DirectoryInfo(**base_info, type="directory", children=children)
+
+    @contextmanager
+    def write_lock(self, path: Path) -> Iterator[None]:
+        """Serialize a file's check-and-write sequences between threads and,
+        with process_locks, between processes. Reentrant.
+
+        Args:
+            path: Absolute path, as returned by _get_safe_path
+        """
+        with _lock_for(path):
+            held = self._held.__dict__.setdefault("paths", set())
+            if self.lock_dir is None or path in held:
+                yield
+                return
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+            name = hashlib.sha1(self._relative_key(path).encode("utf-8")).hexdigest()
+            fd = os.open(self.lock_dir / name, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # POSIX locks belong to the process and closing any
+                # descriptor of the file drops them, hence opened once per
+                # thread and path (the thread lock excludes other threads)
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+                held.add(path)
+                yield
+            finally:
+                held.discard(path)
+                os.close(fd)
+
+    def _refresh_index(self, path: Path) -> None:
+        if self.index is not None:
+            self.index.refresh(self._relative_key(path))
+
+    def _notify_write(self, path: Path, content: Optional[str]) -> None:
+        relative = self._relative_key(path)
+        for listener in self.listeners:
+            listener(relative, content)
+
+    def _before_rewrite(self, path: Path) -> None:
+        relative = self._relative_key(path)
+        for listener in self.rewrite_listeners:
+            listener(relative)
+
+    def _after_write(self, path: Path, written: Optional[str]) -> None:
+        # A coalesced write (None) was already published by the call that
+        # wrote the newer content
+        if written is not None:
+            self._refresh_index(path)
+            if self.cache is not None:
+                # Not written through: a newer write may already have landed
+                # by now, and caching our content under its stat would be stale
+                self.cache.invalidate(self._relative_key(path))
+            self.lines.invalidate(self._relative_key(path))
+            self._notify_write(path, written)
+
     def get_document(self, document_path: str) -> FileInfo:
         """Get a document and its metadata from the vault.
         
@@ -136,13 +658,65 @@ class VaultManager:
             UnsupportedFileTypeError: If file type not supported
         """
 
-        # print("GETTING DOCUMENT 138")
         file_location = self._get_safe_path(document_path)
+        if self.index is not None:
+            meta = self.index.get(self._relative_key(file_location))
+            if meta is None or meta.type != "file":
+                raise PathNotFoundError(f"File {document_path} not found")
+            self._validate_file_type(file_location)
+            try:
+                return self._get_path_info(file_location)
+            except FileNotFoundError:
+                # Deleted behind the watcher's back
+                self.index.invalidate(self._relative_key(file_location))
+                raise PathNotFoundError(f"File {document_path} not found")
         if not file_location.exists() or not file_location.is_file():
             raise PathNotFoundError(f"File {document_path} not found")
         self._validate_file_type(file_location)
         return self._get_path_info(file_location)
 
+    def document_location(self, document_path: str) -> Path:
+        """Absolute path of an existing document, for streaming it from disk
+        instead of reading it into memory.
+
+        Raises:
+            PathNotFoundError: If file doesn't exist
+            UnsupportedFileTypeError: If file type not supported
+        """
+        file_location = self._get_safe_path(document_path)
+        if not file_location.is_file():
+            raise PathNotFoundError(f"File {document_path} not found")
+        self._validate_file_type(file_location)
+        return file_location
+
+    def read_lines(self, document_path: str, start: int = 0, count: int = 100) -> LineWindow:
+        """Read a window of a document's lines without loading the rest.
+
+        Lines are found through a cached newline index (see LineIndex), so
+        paging through a huge transcript or log reads little more than the
+        requested lines.
+
+        Args:
+            document_path: Path to document relative to vault root
+            start: 0-based index of the first line
+            count: Maximum number of lines to return
+
+        Returns:
+            The lines and the document's total line count
+
+        Raises:
+            PathNotFoundError: If file doesn't exist
+            UnsupportedFileTypeError: If file type not supported
+        """
+        file_location = self.document_location(document_path)
+        key = self._relative_key(file_location)
+        try:
+            with timed("read_lines"):
+                total, lines = self.lines.window(key, file_location, start, count)
+        except FileNotFoundError:
+            raise PathNotFoundError(f"File {document_path} not found")
+        return LineWindow(path=key, start=start, total=total, lines=lines)
+
     def list_directory(self, dir_path: str = "", max_depth: int = None) -> DirectoryInfo:
         """List contents of a directory recursively.
         
@@ -157,9 +731,263 @@ class VaultManager:
             PathNotFoundError: If directory doesn't exist
         """
         dir_location = self._get_safe_path(dir_path)
+        if self.index is not None:
+            key = self._relative_key(dir_location)
+            meta = self.index.get(key)
+            if meta is None or meta.type != "directory":
+                raise PathNotFoundError(f"Directory {dir_path} not found")
+            with timed("tree_walk"):
+                return self._get_indexed_info(key, meta, max_depth=max_depth)
         if not dir_location.exists() or not dir_location.is_dir():
             raise PathNotFoundError(f"Directory {dir_path} not found")
-        return self._get_path_info(dir_location, include_content=False, max_depth=max_depth)
+        with timed("tree_walk"):
+            return self._get_path_info(dir_location, include_content=False, max_depth=max_depth)
+
+    def iter_directory(self, dir_path: str = "", max_depth: Optional[int] = None, cursor: Optional[str] = None) -> Iterator[Union[FileInfo, DirectoryInfo]]:
+        """Lazily walk a directory, yielding one flat entry at a time.
+
+        Entries are produced in pre-order with siblings sorted by name, so a
+        walk can be resumed from any previously yielded path. Directories are
+        yielded without a children list.
+
+        Args:
+            dir_path: Directory path relative to vault root
+            max_depth: Maximum depth below dir_path to descend (None for unlimited)
+            cursor: Path (relative to vault root) of the last entry already
+                received; the walk resumes right after it
+
+        Returns:
+            Iterator over FileInfo (without content) and DirectoryInfo (without children)
+
+        Raises:
+            PathNotFoundError: If directory doesn't exist
+        """
+        dir_location = self._get_safe_path(dir_path)
+        if not dir_location.is_dir():
+            raise PathNotFoundError(f"Directory {dir_path} not found")
+        after = None
+        if cursor:
+            after = self._get_safe_path(cursor).relative_to(self.vault_dir).parts
+        return self._walk_entries(dir_location, max_depth, after)
+
+    def _walk_entries(self, dir_location: Path, max_depth: Optional[int], after: Optional[tuple]) -> Iterator[Union[FileInfo, DirectoryInfo]]:
+        if max_depth is None:
+            max_depth = float('inf')
+
+        def sorted_entries(path) -> List[os.DirEntry]:
+            try:
+                with os.scandir(path) as it:
+                    return sorted((entry for entry in it if entry.path != meta_path), key=lambda entry: entry.name)
+            except OSError:
+                return []
+
+        root_prefix = len(str(self.vault_dir)) + 1
+        meta_path = str(self.vault_dir / META_DIR)
+        pending = [(entry, 1) for entry in reversed(sorted_entries(dir_location))] if max_depth >= 1 else []
+        while pending:
+            entry, depth = pending.pop()
+            relative = entry.path[root_prefix:]
+            try:
+                is_dir = entry.is_dir()
+                if not is_dir and not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            parts = tuple(relative.split(os.sep))
+            if after is not None and parts <= after:
+                # Entirely before the cursor, unless it's an ancestor of (or
+                # is) the cursor, whose remaining descendants still follow it
+                if not (is_dir and after[:len(parts)] == parts):
+                    continue
+            elif is_dir:
+                yield DirectoryInfo(path=relative, type="directory", created_at=stat.st_ctime, modified_at=stat.st_mtime)
+            else:
+                yield FileInfo(path=relative, type="file", created_at=stat.st_ctime, modified_at=stat.st_mtime, size=stat.st_size, content=None)
+
+            if is_dir and depth < max_depth:
+                pending.extend((child, depth + 1) for child in reversed(sorted_entries(entry.path)))
+
+    def list_page(self, dir_path: str = "", limit: int = 100, cursor: Optional[str] = None, sort: str = "name") -> ListingPage:
+        """List one page of a directory's direct children.
+
+        Directories come first, then files, each ordered by the sort key with
+        the name as tie-breaker, so cursors stay stable while entries are
+        added or removed around them. Only the page's entries are stat'ed
+        when sorting by name (the rest are ordered from their DirEntry
+        alone), and at most `limit` entries are held at once, so the cost
+        grows with the page rather than the folder.
+
+        Args:
+            dir_path: Directory path relative to vault root
+            limit: Maximum number of children to return
+            cursor: next_cursor of the previous page, or None for the first
+            sort: One of LISTING_SORTS, prefixed with "-" for descending
+
+        Returns:
+            The page of children and the cursor for the next one
+
+        Raises:
+            PathNotFoundError: If directory doesn't exist
+            InvalidCursorError: If the cursor is malformed or for another sort
+        """
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in LISTING_SORTS:
+            raise VaultError(f"Unknown sort key {sort}")
+        dir_location = self._get_safe_path(dir_path)
+        if not dir_location.is_dir():
+            raise PathNotFoundError(f"Directory {dir_path} not found")
+        after = _decode_cursor(cursor, sort) if cursor else None
+        if after is not None and not (
+            after[0] in (0, 1) and isinstance(after[2], str)
+            and isinstance(after[1], str if field == "name" else int)
+        ):
+            raise InvalidCursorError("Malformed cursor")
+
+        # Directories sort first in both directions, so their group flips
+        # along with the comparison
+        dir_group, file_group = (1, 0) if descending else (0, 1)
+
+        def keyed_entries() -> Iterator[Tuple[tuple, os.DirEntry]]:
+            with timed("tree_walk"), os.scandir(dir_location) as it:
+                for entry in it:
+                    if dir_location == self._root and entry.name == META_DIR:
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                        if field == "name":
+                            value = ""
+                        else:
+                            stat = entry.stat()
+                            value = stat.st_mtime_ns if field == "modified" else (0 if is_dir else stat.st_size)
+                    except OSError:
+                        continue
+                    key = (dir_group if is_dir else file_group, value, entry.name)
+                    if after is None or (key < after if descending else key > after):
+                        yield key, entry
+
+        select = heapq.nlargest if descending else heapq.nsmallest
+        # One extra entry tells whether there is a next page
+        page = select(limit + 1, keyed_entries(), key=lambda item: item[0])
+        children = []
+        for key, entry in page[:limit]:
+            try:
+                children.append(self._listing_entry(entry))
+            except OSError:
+                continue  # deleted mid-listing
+        return ListingPage(
+            path=self._relative_key(dir_location),
+            children=children,
+            next_cursor=_encode_cursor(sort, page[limit - 1][0]) if len(page) > limit else None,
+        )
+
+    def _listing_entry(self, entry: os.DirEntry) -> ListingEntry:
+        stat = entry.stat()
+        info = ListingEntry(
+            path=self._relative_key(Path(entry.path)),
+            created_at=stat.st_ctime,
+            modified_at=stat.st_mtime,
+        )
+        if entry.is_dir():
+            info["type"] = "directory"
+            info["has_children"] = self._has_children(entry.path)
+        else:
+            info["type"] = "file"
+            info["size"] = stat.st_size
+        return info
+
+    @staticmethod
+    def _has_children(path: str) -> bool:
+        try:
+            with os.scandir(path) as it:
+                return next(it, None) is not None
+        except OSError:
+            return False
+
+    def get_entry(self, relative_path: str) -> EntryMeta:
+        """Get cached (or freshly stat'ed) metadata for any vault path.
+
+        Args:
+            relative_path: Path relative to vault root
+
+        Returns:
+            Metadata for the file or directory
+
+        Raises:
+            PathNotFoundError: If nothing exists at the path
+        """
+        safe_path = self._get_safe_path(relative_path)
+        with timed("stat"):
+            if self.index is not None:
+                meta = self.index.get(self._relative_key(safe_path))
+            else:
+                try:
+                    meta = meta_from_stat(safe_path.is_dir(), safe_path.stat())
+                except OSError:
+                    meta = None
+        if meta is None:
+            raise PathNotFoundError(f"Path {relative_path} not found")
+        return meta
+
+    def _iter_subtree_meta(self, key: str, max_depth: float) -> Iterator[Tuple[str, EntryMeta]]:
+        """Yield (key, metadata) for every entry a listing of key would contain."""
+        pending = [(key, 0)]
+        while pending:
+            current, depth = pending.pop()
+            if depth >= max_depth:
+                continue
+            if self.index is not None:
+                children = [(child, self.index.get(child)) for child in self.index.children(current)]
+            else:
+                children = []
+                directory = self.vault_dir if current == "." else self.vault_dir / current
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            if current == "." and entry.name == META_DIR:
+                                continue
+                            try:
+                                child_key = entry.name if current == "." else f"{current}/{entry.name}"
+                                children.append((child_key, meta_from_stat(entry.is_dir(), entry.stat())))
+                            except OSError:
+                                continue
+                except OSError:
+                    pass
+            for child_key, meta in children:
+                if meta is None:
+                    continue
+                yield child_key, meta
+                if meta.type == "directory":
+                    pending.append((child_key, depth + 1))
+
+    def directory_fingerprint(self, dir_path: str = "", max_depth: Optional[int] = None) -> Tuple[str, float]:
+        """Summarize a directory listing without building it.
+
+        Args:
+            dir_path: Directory path relative to vault root
+            max_depth: Same meaning as for list_directory
+
+        Returns:
+            (digest of every listed entry's name, type, times and size,
+            newest modification time in the listing)
+
+        Raises:
+            PathNotFoundError: If directory doesn't exist
+        """
+        meta = self.get_entry(dir_path)
+        if meta.type != "directory":
+            raise PathNotFoundError(f"Directory {dir_path} not found")
+        key = self._relative_key(self._get_safe_path(dir_path))
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(f"{max_depth}\0{meta.created_at}\0{meta.mtime_ns}\n".encode())
+        newest = meta.modified_at
+        # Sorted so that the digest doesn't depend on directory order
+        for child_key, child in sorted(self._iter_subtree_meta(key, float('inf') if max_depth is None else max_depth)):
+            digest.update(f"{child_key}\0{child.type}\0{child.created_at}\0{child.mtime_ns}\0{child.size}\n".encode())
+            newest = max(newest, child.modified_at)
+        return digest.hexdigest(), newest
 
     # ... existing create_file, create_directory, update_file methods stay the same
     # but should return FileInfo/DirectoryInfo instead of Path
@@ -181,11 +1009,13 @@ class VaultManager:
         safe_path = self._get_safe_path(file_path)
         self._validate_file_type(safe_path)
         
-        if safe_path.exists():
-            raise FileExistsError(f"File {file_path} already exists")
-            
-        safe_path.parent.mkdir(parents=True, exist_ok=True)
-        safe_path.write_text(content, encoding="utf-8")
+        with self.write_lock(safe_path):
+            if safe_path.exists():
+                raise FileExistsError(f"File {file_path} already exists")
+                
+            safe_path.parent.mkdir(parents=True, exist_ok=True)
+            written = self.writer.write(safe_path, content)
+        self._after_write(safe_path, written)
         return self._get_path_info(safe_path)
 
     def create_directory(self, dir_path: str) -> DirectoryInfo:
@@ -206,6 +1036,7 @@ class VaultManager:
             raise FileExistsError(f"Directory {dir_path} already exists")
             
         safe_path.mkdir(parents=True, exist_ok=True)
+        self._refresh_index(safe_path)
         return self._get_path_info(safe_path)
 
     def update_file(self, file_path: str, content: str) -> FileInfo:
@@ -228,5 +1059,132 @@ class VaultManager:
             raise PathNotFoundError(f"File {file_path} not found")
             
         self._validate_file_type(safe_path)
-        safe_path.write_text(content, encoding="utf-8")
-        return self._get_path_info(safe_path)
\ No newline at end of file
+        with self.write_lock(safe_path):
+            self._before_rewrite(safe_path)
+            written = self.writer.write(safe_path, content)
+        self._after_write(safe_path, written)
+        return self._get_path_info(safe_path)
+
+    def patch_file(self, file_path: str, splices: Sequence[Splice], base_version: str) -> FileInfo:
+        """Apply text splices to an existing file.
+
+        Splices address the base document by UTF-8 byte offsets, must not
+        overlap, and are applied together. A single insertion at the end of
+        the file is appended in place (the common case for chat logs);
+        anything else goes through the atomic write pipeline.
+
+        Args:
+            file_path: Path to file relative to vault root
+            splices: Edits against the base document
+            base_version: Version (see EntryMeta.version) the splices were made against
+
+        Returns:
+            Updated file info, without content
+
+        Raises:
+            PathNotFoundError: If file doesn't exist
+            UnsupportedFileTypeError: If file type not supported
+            VersionConflictError: If the file no longer matches base_version
+            InvalidPatchError: If splices overlap, fall outside the file or split a character
+        """
+        safe_path = self._get_safe_path(file_path)
+
+        if not safe_path.exists() or not safe_path.is_file():
+            raise PathNotFoundError(f"File {file_path} not found")
+
+        self._validate_file_type(safe_path)
+        with self.write_lock(safe_path):
+            current = meta_from_stat(False, safe_path.stat())
+            if current.version != base_version:
+                raise VersionConflictError(f"File {file_path} has changed since version {base_version}")
+
+            edits = sorted(
+                ((splice["offset"], splice["length"], splice["text"].encode("utf-8")) for splice in splices),
+                key=lambda edit: edit[0],
+            )
+            end = 0
+            for offset, length, _ in edits:
+                if offset < end or length < 0 or offset + length > current.size:
+                    raise InvalidPatchError("Splices overlap or fall outside the document")
+                end = offset + length
+
+            is_append = len(edits) == 1 and edits[0][0] == current.size and edits[0][1] == 0
+            with open(safe_path, "r+b") as f:
+                self._check_char_boundaries(f, edits, current.size)
+                if is_append:
+                    # Appends can't damage existing bytes, so skip the temp file
+                    f.seek(0, os.SEEK_END)
+                    f.write(edits[0][2])
+                    f.flush()
+                    os.fsync(f.fileno())
+                else:
+                    f.seek(0)
+                    original = f.read()
+
+            content = None
+            if not is_append:
+                pieces, cursor = [], 0
+                for offset, length, data in edits:
+                    pieces.append(original[cursor:offset])
+                    pieces.append(data)
+                    cursor = offset + length
+                pieces.append(original[cursor:])
+                self._before_rewrite(safe_path)
+                content = self.writer.write(safe_path, b"".join(pieces).decode("utf-8"))
+
+        if content is None:
+            self._after_partial_write(safe_path, appended=True)
+        else:
+            self._after_write(safe_path, content)
+        return self._get_path_info(safe_path, include_content=False)
+
+    def append_file(self, file_path: str, text: str, create: bool = False) -> int:
+        """Durably append text to a file without rewriting it.
+
+        Args:
+            file_path: Path to file relative to vault root
+            text: Text to append
+            create: Create the file (and its parents) if it doesn't exist
+
+        Returns:
+            The byte offset the text was written at
+
+        Raises:
+            PathNotFoundError: If file doesn't exist and create is False
+            UnsupportedFileTypeError: If file type not supported
+        """
+        safe_path = self._get_safe_path(file_path)
+        self._validate_file_type(safe_path)
+        with self.write_lock(safe_path):
+            if not safe_path.is_file():
+                if not create or safe_path.exists():
+                    raise PathNotFoundError(f"File {file_path} not found")
+                safe_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(safe_path, "ab") as f:
+                offset = f.tell()
+                f.write(text.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            if offset == 0:
+                _fsync_dir(safe_path.parent)
+        self._after_partial_write(safe_path, appended=True)
+        return offset
+
+    def _after_partial_write(self, path: Path, appended: bool = False) -> None:
+        self._refresh_index(path)
+        if self.cache is not None:
+            self.cache.invalidate(self._relative_key(path))
+        if not appended:
+            # Only a pure append leaves the indexed lines valid to extend
+            self.lines.invalidate(self._relative_key(path))
+        self._notify_write(path, None)
+
+    @staticmethod
+    def _check_char_boundaries(f, edits: List[Tuple[int, int, bytes]], size: int) -> None:
+        """Reject edits whose boundaries would cut a UTF-8 sequence in half."""
+        for offset, length, _ in edits:
+            for position in (offset, offset + length):
+                if 0 < position < size:
+                    f.seek(position)
+                    if f.read(1)[0] & 0xC0 == 0x80:
+                        raise InvalidPatchError(f"Offset {position} is inside a UTF-8 character")
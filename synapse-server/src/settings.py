@@ -4,6 +4,15 @@ from functools import lru_cache
 
 class Settings(BaseSettings):
     vault_dir: Path
+    watch_poll_interval: float = 5.0  # seconds between re-stats of the whole vault when watchdog isn't installed; 0 disables
+    io_workers: int = 16  # threads doing blocking vault I/O for async routes
+    group_commit_ms: float = 0  # batch fsyncs of writes arriving within this window; 0 disables
+    content_cache_bytes: int = 64 * 1024 * 1024  # decoded documents kept in memory; 0 disables
+    path_cache_size: int = 4096  # resolved request paths remembered per vault; 0 disables
+    history_enabled: bool = True  # record a version of every document save under .synapse/history
+    embedding_model: str = ""  # local model for related notes and semantic search ("hashed-tfidf" or "module:factory"); empty disables. Each save is then re-read and re-embedded in the background
+    worker_coherence: bool = False  # run as one of several worker processes sharing the index and invalidations
+    profile_slow_ms: float = 0  # dump sampled stacks of requests slower than this to .synapse/profiles; 0 disables
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 
 from .main import app
+from .settings import Settings, get_settings
 
 client = TestClient(app)
 
@@ -10,3 +11,17 @@ def test_read_main():
     assert response.status_code == 200
     assert response.json() == {"Hello": "World"}
 
+
+
+def test_metrics_endpoint(tmp_path):
+    app.dependency_overrides[get_settings] = lambda: Settings(vault_dir=tmp_path)
+    try:
+        client.get('/health')
+        response = client.get('/metrics')
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'synapse_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert "synapse_io_queue_depth" in response.text
+    assert "synapse_content_cache_evictions" in response.text
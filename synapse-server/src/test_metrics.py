@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from .metrics import Counter, Histogram, MetricsMiddleware, REQUEST_LATENCY, SlowRequestProfiler, VAULT_OPERATION_LATENCY
+from .repositories.vault import VaultManager
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that histogram buckets are cumulative and end with +Inf"""
+    histogram = Histogram("latency", "test", ("op",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "read")
+    histogram.observe(0.5, "read")
+    histogram.observe(5.0, "read")
+    lines = histogram.render()
+    assert 'latency_bucket{op="read",le="0.1"} 1' in lines
+    assert 'latency_bucket{op="read",le="1.0"} 2' in lines
+    assert 'latency_bucket{op="read",le="+Inf"} 3' in lines
+    assert 'latency_count{op="read"} 3' in lines
+
+def test_counter_renders_labels():
+    """Test that counters keep one series per label set"""
+    counter = Counter("bytes_total", "test", ("dir",))
+    counter.inc(10, "in")
+    counter.inc(5, "in")
+    assert 'bytes_total{dir="in"} 15' in counter.render()
+
+def test_middleware_labels_by_route_template():
+    """Test that requests are recorded under their route template, not the raw path"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": item_id}
+
+    before = REQUEST_LATENCY.count("GET", "/items/{item_id}", "200")
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    assert REQUEST_LATENCY.count("GET", "/items/{item_id}", "200") == before + 2
+
+def test_vault_operations_are_timed(tmp_path):
+    """Test that vault reads and writes feed the operation histogram"""
+    vault = VaultManager(tmp_path)
+    reads, writes = VAULT_OPERATION_LATENCY.count("read"), VAULT_OPERATION_LATENCY.count("write")
+    vault.create_file("a.md", "alpha")
+    assert VAULT_OPERATION_LATENCY.count("write") == writes + 1
+    vault.get_document("a.md")
+    assert VAULT_OPERATION_LATENCY.count("read") > reads
+
+def test_profiler_dumps_only_slow_requests(tmp_path):
+    """Test that collapsed stacks are written for slow requests only"""
+    profiler = SlowRequestProfiler(threshold=0.05, output_dir=tmp_path, interval=0.001)
+    try:
+        profiler.request_started()
+        start = time.perf_counter()
+        assert profiler.request_finished("GET /fast", start, time.perf_counter()) is None
+
+        profiler.request_started()
+        start = time.perf_counter()
+        time.sleep(0.1)
+        path = profiler.request_finished("GET /slow", start, time.perf_counter())
+    finally:
+        profiler.stop()
+    assert path is not None and path.suffix == ".folded"
+    stack, count = path.read_text().splitlines()[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
+
+def test_profiler_skips_event_streams(tmp_path):
+    """Test that a long-lived event stream is neither sampled throughout nor dumped as slow"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.state.profiler = profiler = SlowRequestProfiler(threshold=0.01, output_dir=tmp_path, interval=0.001)
+    active = []
+
+    @app.get("/feed")
+    def feed():
+        def events():
+            time.sleep(0.05)
+            active.append(profiler._active)
+            yield "data: x\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.05)
+        return {}
+
+    try:
+        client = TestClient(app)
+        assert client.get("/feed").text == "data: x\n\n"
+        assert active == [0] and list(tmp_path.iterdir()) == []
+        client.get("/slow")
+        assert len(list(tmp_path.glob("*.folded"))) == 1
+    finally:
+        profiler.stop()